@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import StoredFile
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'references', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['name']
+    readonly_fields = ['name', 'size', 'references', 'created_at']
+    verbose_name = "فایل ذخیره‌شده"
+    verbose_name_plural = "فایل‌های ذخیره‌شده"
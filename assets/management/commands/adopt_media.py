@@ -0,0 +1,101 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from assets.models import StoredFile
+from assets.references import FILE_SOURCES
+from assets.storage import ROOT, derived_names, is_addressed, is_original
+
+
+class Command(BaseCommand):
+    help = 'Move legacy uploads into content-addressed storage, rebuild reference counts and remove orphan files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report legacy files and reference drift')
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        if not FILE_SOURCES:
+            raise CommandError('No file fields use content-addressed storage')
+        storage = FILE_SOURCES[0][0]._meta.get_field(FILE_SOURCES[0][1]).storage
+
+        legacy = defaultdict(list)
+        for model, field_name in FILE_SOURCES:
+            rows = model.objects.order_by().exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for pk, name in rows.values_list('pk', field_name).iterator(chunk_size=2000):
+                if not is_addressed(name):
+                    legacy[name].append((model, field_name, pk))
+
+        if check_only:
+            counts = self.reference_counts()
+            stored = dict(StoredFile.objects.values_list('name', 'references'))
+            drift = sum(1 for name in set(counts) | set(stored) if counts.get(name, 0) != stored.get(name, 0))
+            self.stdout.write(f'{len(legacy)} legacy files, {drift} drifted reference counts')
+            if legacy or drift:
+                raise CommandError('Media storage is not fully content-addressed')
+            return
+
+        adopted = missing = 0
+        for name, rows in legacy.items():
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as content:
+                new_name = storage.save(name, content)
+            # ذخیره ردیف‌ها با save تا شمارش ارجاع، نسخه‌های کوچک و کش‌ها با سیگنال‌های خودشان به‌روز شوند
+            with transaction.atomic():
+                for model, field_name, pk in rows:
+                    instance = model.objects.filter(pk=pk).first()
+                    if instance is None:
+                        continue
+                    setattr(instance, field_name, new_name)
+                    instance.save(update_fields=[field_name] + [
+                        field.name for field in model._meta.concrete_fields
+                        if field.name == 'derivatives_ready' or getattr(field, 'auto_now', False)
+                    ])
+            for derived in derived_names(storage, name):
+                storage.delete(derived)
+            storage.delete(name)
+            adopted += 1
+
+        self.rebuild_references(storage)
+        removed = self.remove_orphans(storage)
+        self.stdout.write(self.style.SUCCESS(
+            f'{adopted} legacy files adopted, {missing} missing, {removed} orphan files removed'
+        ))
+
+    def reference_counts(self):
+        counts = Counter()
+        for model, field_name in FILE_SOURCES:
+            counts.update(
+                name for name in model.objects.order_by().values_list(field_name, flat=True).iterator(chunk_size=2000)
+                if is_addressed(name)
+            )
+        return counts
+
+    def rebuild_references(self, storage):
+        counts = self.reference_counts()
+        with transaction.atomic():
+            StoredFile.objects.exclude(name__in=list(counts)).update(references=0)
+            existing = {stored.name: stored for stored in StoredFile.objects.filter(name__in=list(counts))}
+            for stored in existing.values():
+                stored.references = counts[stored.name]
+            StoredFile.objects.bulk_update(existing.values(), ['references'], batch_size=500)
+            StoredFile.objects.bulk_create([
+                StoredFile(name=name, size=storage.size(name), references=count)
+                for name, count in counts.items() if name not in existing and storage.exists(name)
+            ])
+
+    def remove_orphans(self, storage):
+        """حذف فایل‌های هش‌شده‌ای که هیچ ردیفی به آن‌ها اشاره نمی‌کند"""
+        referenced = set(StoredFile.objects.filter(references__gt=0).values_list('name', flat=True))
+        removed = 0
+        for directory in storage.listdir(ROOT)[0] if storage.exists(ROOT) else []:
+            for filename in storage.listdir(f'{ROOT}/{directory}')[1]:
+                name = f'{ROOT}/{directory}/{filename}'
+                if is_original(name) and name not in referenced:
+                    storage.delete(name)
+                    removed += 1
+        StoredFile.objects.filter(references=0).delete()
+        return removed
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="نام فایل"
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="حجم (بایت)"
+                    ),
+                ),
+                (
+                    "references",
+                    models.PositiveIntegerField(default=0, verbose_name="تعداد ارجاع"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد"),
+                ),
+            ],
+            options={
+                "verbose_name": "فایل ذخیره\u200cشده",
+                "verbose_name_plural": "فایل\u200cهای ذخیره\u200cشده",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
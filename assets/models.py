@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """یک فایل در ذخیره‌ساز محتوامحور و تعداد فیلدهایی که به آن اشاره می‌کنند"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="نام فایل")
+    size = models.PositiveBigIntegerField(default=0, verbose_name="حجم (بایت)")
+    references = models.PositiveIntegerField(default=0, verbose_name="تعداد ارجاع")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+
+    class Meta:
+        verbose_name = "فایل ذخیره‌شده"
+        verbose_name_plural = "فایل‌های ذخیره‌شده"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
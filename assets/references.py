@@ -0,0 +1,86 @@
+"""
+شمارش ارجاع فایل‌های محتوامحور.
+
+هر فیلد فایلی که روی ContentAddressedStorage ذخیره می‌شود با سیگنال‌های
+ذخیره و حذف ردیفش شمارش StoredFile را بالا و پایین می‌برد. وقتی شمارش یک
+فایل به صفر برسد، بعد از commit خود فایل و نسخه‌های ساخته‌شده از آن حذف
+می‌شوند.
+
+تغییرهای گروهی که سیگنال ندارند (update یا bulk_create) شمارش را جابه‌جا
+می‌کنند؛ دستور adopt_media شمارش‌ها را از روی ردیف‌ها بازسازی می‌کند.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import StoredFile
+from .storage import ContentAddressedStorage, is_addressed
+
+# (مدل، نام فیلد) همه فیلدهای فایلی که روی ذخیره‌ساز محتوامحور هستند
+FILE_SOURCES = []
+
+
+def acquire(storage, names):
+    for name, count in Counter(name for name in names if is_addressed(name)).items():
+        stored, _ = StoredFile.objects.get_or_create(name=name, defaults={'size': storage.size(name)})
+        StoredFile.objects.filter(pk=stored.pk).update(references=F('references') + count)
+
+
+def release(storage, names):
+    names = Counter(name for name in names if is_addressed(name))
+    for name, count in names.items():
+        StoredFile.objects.filter(name=name, references__gte=count).update(references=F('references') - count)
+    if names:
+        transaction.on_commit(lambda: delete_unreferenced(storage, list(names)))
+
+
+def delete_unreferenced(storage, names):
+    """حذف فایل‌هایی از names که دیگر ارجاعی ندارند"""
+    with transaction.atomic():
+        stored = list(StoredFile.objects.select_for_update().filter(name__in=names, references=0))
+        for stored_file in stored:
+            storage.delete(stored_file.name)
+        StoredFile.objects.filter(pk__in=[stored_file.pk for stored_file in stored]).delete()
+    return len(stored)
+
+
+def track_files(model, field_name):
+    """اتصال سیگنال‌های شمارش ارجاع برای یک فیلد فایل"""
+    storage = model._meta.get_field(field_name).storage
+    uid = f'assets:{model._meta.label}:{field_name}'
+
+    def remember_previous(sender, instance, raw=False, update_fields=None, **kwargs):
+        instance.__dict__.pop(f'_stored_previous_{field_name}', None)
+        if raw or (update_fields is not None and field_name not in update_fields):
+            return
+        previous = ''
+        if not instance._state.adding and instance.pk:
+            previous = sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first() or ''
+        instance.__dict__[f'_stored_previous_{field_name}'] = previous
+
+    def on_save(sender, instance, raw=False, **kwargs):
+        previous = instance.__dict__.pop(f'_stored_previous_{field_name}', None)
+        current = getattr(instance, field_name).name or ''
+        if previous is None or previous == current:
+            return
+        acquire(storage, [current])
+        release(storage, [previous])
+
+    def on_delete(sender, instance, **kwargs):
+        release(storage, [getattr(instance, field_name).name])
+
+    pre_save.connect(remember_previous, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
+    if (model, field_name) not in FILE_SOURCES:
+        FILE_SOURCES.append((model, field_name))
+
+
+def content_addressed_fields(models):
+    """فیلدهای فایل مدل‌ها که روی ذخیره‌ساز محتوامحور ذخیره می‌شوند"""
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field.name
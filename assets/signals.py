@@ -0,0 +1,8 @@
+from django.apps import apps
+
+from .references import content_addressed_fields, track_files
+
+
+# همه فیلدهای فایل پروژه (عکس‌ها، تبلیغات، رزومه‌ها) روی ذخیره‌ساز محتوامحورند
+for _model, _field_name in content_addressed_fields(apps.get_models()):
+    track_files(_model, _field_name)
@@ -0,0 +1,72 @@
+"""
+ذخیره‌ساز محتوامحور (content-addressed) برای فایل‌های آپلودی.
+
+هر آپلود با هش SHA-256 محتوایش ذخیره می‌شود (cas/ab/abcd….jpg)؛ پس آپلود
+تکراری یک فایل در رستوران‌ها، باشگاه‌ها، مربیان و تبلیغات فقط یک بار روی دیسک
+می‌ماند و آدرسش هرگز محتوای دیگری نمی‌گیرد (قابل کش دائمی).
+
+نام‌هایی که از قبل داخل پوشه cas هستند (مثل نسخه‌های کوچک یک عکس) همان‌طور که
+هستند ذخیره می‌شوند.
+"""
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+ROOT = 'cas'
+_ORIGINAL_RE = re.compile(rf'^{ROOT}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.[^./]+)?$')
+
+
+def is_addressed(name):
+    return bool(name) and name.startswith(f'{ROOT}/')
+
+
+def is_original(name):
+    """فایل آپلودی با نام هش (نه نسخه‌ای که از روی آن ساخته شده)"""
+    return bool(_ORIGINAL_RE.match(name or ''))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def addressed_name(name, content):
+    """نام محتوامحور یک آپلود با پسوند فایل اصلی"""
+    digest = content_hash(content)
+    ext = posixpath.splitext(name)[1].lower()
+    return f'{ROOT}/{digest[:2]}/{digest}{ext}'
+
+
+def derived_names(storage, name):
+    """فایل‌هایی که کنار یک فایل محتوامحور از روی آن ساخته شده‌اند"""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    try:
+        files = storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return []
+    return [posixpath.join(directory, f) for f in files if f != filename and f.startswith(f'{stem}.')]
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, *args, allow_overwrite=True, **kwargs):
+        # محتوای یک نام ثابت است، پس بازنویسی همان بایت‌ها بی‌خطر است
+        super().__init__(*args, allow_overwrite=allow_overwrite, **kwargs)
+
+    def _save(self, name, content):
+        if not is_addressed(name):
+            name = addressed_name(name, content)
+            if self.exists(name):
+                return name
+        return super()._save(name, content)
+
+    def delete(self, name):
+        """حذف فایل همراه نسخه‌های ساخته‌شده از آن"""
+        if is_original(name):
+            for derived in derived_names(self, name):
+                super().delete(derived)
+        super().delete(name)
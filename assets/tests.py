@@ -0,0 +1,164 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from gym.models import Gym, GymImage
+from jobs.queue import run_pending
+from restaurants.models import Advertisement, Restaurant, RestaurantImage
+
+from .models import StoredFile
+from .storage import is_original
+from .views import media
+
+
+def jpeg(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.restaurant = Restaurant.objects.create(name='restaurant', address='address')
+        self.gym = Gym.objects.create(name='gym', address='address')
+
+    def upload(self, model, name, content, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance = model.objects.create(image=SimpleUploadedFile(name, content), **fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        return instance
+
+    def test_identical_uploads_share_one_file(self):
+        content = jpeg()
+        first = self.upload(RestaurantImage, 'ali.jpg', content, restaurant=self.restaurant)
+        second = self.upload(GymImage, 'copy.JPG', content, gym=self.gym)
+        ad = self.upload(Advertisement, 'ad.jpg', content, title='ad', section='gym', position='right')
+        other = self.upload(GymImage, 'other.jpg', jpeg('blue'), gym=self.gym)
+
+        self.assertTrue(is_original(first.image.name))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image.name, ad.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertEqual(StoredFile.objects.get(name=first.image.name).references, 3)
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        content = jpeg()
+        first = self.upload(RestaurantImage, 'ali.jpg', content, restaurant=self.restaurant)
+        second = self.upload(GymImage, 'ali.jpg', content, gym=self.gym)
+        name = first.image.name
+        self.assertTrue(default_storage.exists(name.replace('.jpg', '.card.webp')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(name.replace('.jpg', '.card.webp')))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_addressed_files_are_served_as_immutable(self):
+        image = self.upload(RestaurantImage, 'ali.jpg', jpeg(), restaurant=self.restaurant)
+        response = media(RequestFactory().get('/media/'), image.image.name)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_adopt_media_moves_legacy_copies(self):
+        content = jpeg()
+        # کپی‌های قدیمی با نام تصادفی جنگو، نوشته‌شده بدون ذخیره‌ساز محتوامحور
+        legacy_storage = FileSystemStorage(location=default_storage.location)
+        for name in ('ali.jpg', 'ali_T1Z0Kqq.jpg'):
+            legacy_storage.save(f'restaurants/{name}', ContentFile(content))
+        images = [
+            RestaurantImage.objects.create(restaurant=self.restaurant, image='restaurants/ali.jpg'),
+            RestaurantImage.objects.create(restaurant=self.restaurant, image='restaurants/ali_T1Z0Kqq.jpg'),
+        ]
+        orphan = default_storage.save('orphan.jpg', ContentFile(jpeg('green')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('adopt_media', stdout=StringIO())
+            run_pending()
+
+        names = {image.image.name for image in RestaurantImage.objects.filter(pk__in=[i.pk for i in images])}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_original(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+        self.assertFalse(default_storage.exists('restaurants/ali.jpg'))
+        self.assertFalse(default_storage.exists(orphan))
+        call_command('adopt_media', '--check', stdout=StringIO())
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.content = bytes(range(256)) * 1024
+        self.name = default_storage.save('ad.mp4', ContentFile(self.content))
+        self.url = f'/media/{self.name}'
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_file_is_streamed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(int(response['Content-Length']), len(self.content))
+        self.assertEqual(self.body(response), self.content)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(self.body(response), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(self.body(response), self.content[-10:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=262000-')
+        self.assertEqual(self.body(response), self.content[262000:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_missing_and_escaping_paths(self):
+        self.assertEqual(self.client.get('/media/missing.mp4').status_code, 404)
+        self.assertEqual(self.client.get('/media/../core/settings.py').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_sendfile_offload(self):
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.name))
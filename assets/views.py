@@ -0,0 +1,163 @@
+"""
+سرو فایل‌های مدیا در همه محیط‌ها.
+
+پشتیبانی از درخواست‌های Range (پاسخ 206) برای پخش و جلو/عقب بردن ویدیوهای
+تبلیغ و رزومه‌های PDF، ETag و If-None-Match / If-Modified-Since برای پاسخ 304
+و ارسال تکه‌تکه فایل بدون خواندن کامل آن در حافظه.
+
+اگر MEDIA_SENDFILE تنظیم شده باشد (x-sendfile برای Apache/lighttpd یا
+x-accel-redirect برای nginx) فقط هدرها ساخته می‌شوند و ارسال فایل و Range به
+وب‌سرور سپرده می‌شود.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_original
+
+# محتوای یک آدرس محتوامحور هیچ‌وقت عوض نمی‌شود
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sendfile_mode():
+    return getattr(settings, 'MEDIA_SENDFILE', None)
+
+
+def accel_prefix():
+    return getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+
+def file_etag(path, stat):
+    """هش محتوا برای فایل‌های محتوامحور و زمان تغییر و حجم برای بقیه"""
+    if is_original(path):
+        return quote_etag(posixpath.splitext(posixpath.basename(path))[0])
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def byte_range(header, size):
+    """
+    (شروع، پایان) یک بازه از هدر Range؛ None برای بازه‌های چندتایی یا نامعتبر
+    که کل فایل برایشان فرستاده می‌شود و ValueError برای بازه خارج از فایل.
+    """
+    match = _RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # n بایت آخر فایل
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_applies(request, etag, mtime):
+    """If-Range: بازه فقط وقتی اعمال می‌شود که نسخه فایل عوض نشده باشد"""
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _stream(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _headers(response, path, etag, stat):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if is_original(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
+
+
+@require_safe
+def media(request, path, document_root=None):
+    """سرو یک فایل مدیا با پشتیبانی Range، ETag و sendfile"""
+    document_root = str(document_root or settings.MEDIA_ROOT)
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(document_root, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404('فایل پیدا نشد')
+    if not os.path.isfile(full_path):
+        raise Http404('فایل پیدا نشد')
+
+    etag = file_etag(path, stat)
+    if _not_modified(request, etag, stat.st_mtime):
+        return _headers(HttpResponseNotModified(), path, etag, stat)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    mode = sendfile_mode()
+    if mode:
+        # وب‌سرور خودش Range و ارسال فایل را انجام می‌دهد
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = accel_prefix().rstrip('/') + '/' + path
+        else:
+            response['X-Sendfile'] = full_path
+        return _headers(response, path, etag, stat)
+
+    size = stat.st_size
+    start, end = 0, size - 1
+    status = 200
+    range_header = request.headers.get('Range')
+    if range_header and size and _range_applies(request, etag, stat.st_mtime):
+        try:
+            requested = byte_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _headers(response, path, etag, stat)
+        if requested:
+            start, end = requested
+            status = 206
+
+    length = end - start + 1 if size else 0
+    body = [] if request.method == 'HEAD' else _stream(full_path, start, length)
+    response = StreamingHttpResponse(body, status=status, content_type=content_type)
+    response['Content-Length'] = str(length)
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return _headers(response, path, etag, stat)
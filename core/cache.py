@@ -0,0 +1,56 @@
+"""
+کش فایلی مشترک بین همه workerهای یک سرور با add و incr اتمی.
+
+FileBasedCache جنگو add و incr را با یک خواندن و یک نوشتن جدا انجام می‌دهد و
+دو worker هم‌زمان می‌توانند افزایش یکدیگر را گم کنند؛ اینجا هر دو زیر قفل فایل
+اجرا می‌شوند. شمارنده‌های نسخه (core.versioning) و قفل stampede کش صفحه به همین
+اتمی بودن تکیه دارند.
+
+برای اجرا روی چند سرور CACHES باید به Redis یا Memcached برود که add و incr را
+خودشان اتمی انجام می‌دهند.
+"""
+import os
+import pickle
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class AtomicFileBasedCache(FileBasedCache):
+    lock_name = 'atomic.lock'
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        # incr جنگو مقدار را با set و مهلت پیش‌فرض (300 ثانیه) می‌نویسد و شمارنده‌ای
+        # که با add(..., None) بی‌انقضا ساخته شده بود چند دقیقه بعد از کش می‌رفت؛
+        # اینجا انقضای فعلی کلید حفظ می‌شود
+        with self._locked():
+            fname = self._key_to_file(key, version)
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            if expiry is not None and expiry < time.time():
+                raise ValueError(f"Key '{key}' not found")
+            new_value = value + delta
+            self.set(key, new_value, None if expiry is None else expiry - time.time(), version)
+            return new_value
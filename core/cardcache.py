@@ -0,0 +1,123 @@
+"""
+کش قطعه‌ای (fragment) کارت هر آیتم در لیست‌ها.
+
+کلید هر کارت شامل شناسه، updated_at و ستون‌های امتیاز آیتم است؛ پس کارت فقط
+وقتی دوباره رندر می‌شود که خود آیتم یا امتیازش تغییر کرده باشد. تغییر در
+زیرمجموعه‌ها (عکس، تلفن، رابطه‌های چندبه‌چند) updated_at آیتم والد را جلو
+می‌برد و اثر محتوای قالب کارت هم در کلید هست تا بعد از تغییر قالب کارت کهنه
+سرو نشود.
+همه کارت‌های یک صفحه با یک get_many خوانده می‌شوند و prefetch فقط برای
+کارت‌های ازدست‌رفته اجرا می‌شود.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.template.loader import get_template, render_to_string
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .versioning import bump_version, get_version
+
+
+def card_timeout():
+    return getattr(settings, 'CARD_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def version_name(vertical):
+    return f'cards:{vertical}'
+
+
+def _template_sources(template_name, seen):
+    """متن یک قالب و همه قالب‌هایی که extends یا include می‌کند (با نام ثابت)"""
+    if template_name in seen:
+        return
+    seen.add(template_name)
+    template = get_template(template_name).template
+    yield template.source
+    for node in template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+        name = (node.parent_name if isinstance(node, ExtendsNode) else node.template).var
+        if isinstance(name, str):
+            yield from _template_sources(name, seen)
+
+
+@lru_cache(maxsize=None)
+def template_digest(template_name):
+    """اثر محتوای قالب همراه قالب پایه و قالب‌های include شده‌اش"""
+    digest = hashlib.md5(usedforsecurity=False)
+    for source in _template_sources(template_name, set()):
+        digest.update(source.encode())
+    return digest.hexdigest()[:8]
+
+
+def card_key(vertical, version, obj):
+    return (
+        f'card:{vertical}:{version}:{obj.pk}:'
+        f'{obj.updated_at.timestamp() if obj.updated_at else 0}:{obj.rating_sum}:{obj.rating_count}'
+    )
+
+
+def render_cards(vertical, objects, template_name, context_name, prefetch=()):
+    """HTML کارت‌های یک صفحه به همان ترتیب objects، با یک get_many و رندر فقط کارت‌های تغییرکرده"""
+    objects = list(objects)
+    version = f'{get_version(version_name(vertical))}.{template_digest(template_name)}'
+    keys = [card_key(vertical, version, obj) for obj in objects]
+    cards = cache.get_many(keys)
+
+    missed = [(key, obj) for key, obj in zip(keys, objects) if key not in cards]
+    if missed:
+        if prefetch:
+            prefetch_related_objects([obj for _, obj in missed], *prefetch)
+        rendered = {key: render_to_string(template_name, {context_name: obj}) for key, obj in missed}
+        cache.set_many(rendered, card_timeout())
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def touch(model, pks):
+    """جلو بردن updated_at آیتم‌ها بدون اجرای save و سیگنال‌هایش"""
+    pks = [pk for pk in pks if pk]
+    if pks:
+        model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def invalidate_cards(*verticals):
+    for vertical in verticals:
+        bump_version(version_name(vertical))
+
+
+def track_card_children(child_model, parent_field):
+    """به‌روزرسانی updated_at والد با هر تغییر در زیرمجموعه‌ای که در کارت دیده می‌شود"""
+    field = child_model._meta.get_field(parent_field)
+    parent_model, attname = field.related_model, field.attname
+
+    def on_change(sender, instance, raw=False, **kwargs):
+        if not raw:
+            touch(parent_model, [getattr(instance, attname)])
+
+    uid = f'cardcache:{child_model._meta.label}'
+    post_save.connect(on_change, sender=child_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_change, sender=child_model, weak=False, dispatch_uid=uid)
+
+
+def track_card_relations(model, vertical):
+    """رابطه‌های چندبه‌چند آیتم: سمت مستقیم updated_at را جلو می‌برد و سمت معکوس نسخه بخش را"""
+    def on_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if not action.startswith('post_'):
+            return
+        if reverse:
+            transaction.on_commit(lambda: invalidate_cards(vertical))
+        else:
+            touch(model, [instance.pk])
+
+    for field in model._meta.local_many_to_many:
+        m2m_changed.connect(
+            on_m2m_changed, sender=field.remote_field.through, weak=False,
+            dispatch_uid=f'cardcache:{model._meta.label}:{field.name}',
+        )
+
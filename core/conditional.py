@@ -0,0 +1,104 @@
+"""
+GET شرطی (ETag) برای صفحه‌های جزئیات.
+
+ETag با یک کوئری سبک روی ردیف خود آیتم ساخته می‌شود: updated_at و ستون‌های
+تجمیعی امتیاز، به‌علاوه نسخه دسته‌ها و اثر کل زنجیره قالب (قالب پایه و
+includeها). تغییر نظرها updated_at آیتم را جلو می‌برد، پس برای درخواست تکراری
+بدون بارگذاری عکس‌ها، نظرها و امتیازها پاسخ 304 داده می‌شود.
+
+Last-Modified فرستاده نمی‌شود: تغییر دسته‌ها یا قالب زمانی ندارد و
+If-Modified-Since بعد از چنین تغییری 304 اشتباه می‌داد.
+
+بدنه صفحه جزئیات (بدون فرم نظر و پیام‌ها) برای همه کاربران یکسان است؛ پس با
+کلید ETag در کش سرور نگه داشته می‌شود و برای کش‌های مشترک public است.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cardcache import template_digest, touch
+from .versioning import get_version
+
+
+def _etag(request, model, pk, template_name):
+    """ETag آیتم با یک کوئری؛ برای هر درخواست یک بار محاسبه می‌شود"""
+    if not hasattr(request, '_detail_etag'):
+        request._detail_etag = None
+        row = model.objects.filter(pk=pk).values_list('updated_at', 'rating_sum', 'rating_count').first()
+        if row:
+            updated_at, rating_sum, rating_count = row
+            parts = [
+                pk, updated_at.timestamp(), rating_sum, rating_count,
+                template_digest(template_name), get_version('lookups:categories'),
+            ]
+            etag = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+            request._detail_etag = f'W/"{etag}"'
+    return request._detail_etag
+
+
+def body_timeout():
+    return getattr(settings, 'DETAIL_CACHE_TIMEOUT', 60 * 60)
+
+
+def _is_public(request):
+    """پاسخ به کوکی یا سشن کاربر وابسته نشده باشد"""
+    session = getattr(request, 'session', None)
+    return not (session is not None and session.accessed) and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+
+
+def conditional_detail(model, template_name):
+    """
+    پاسخ 304 برای صفحه جزئیات وقتی ETag تغییری نکرده باشد و
+    سرو بدنه از کش سرور برای بقیه درخواست‌های GET.
+
+    کش‌های مرورگر و پروکسی می‌توانند صفحه را نگه دارند ولی هر بار با ETag
+    اعتبارسنجی می‌کنند (no-cache)، پس هیچ‌وقت نسخه کهنه نمی‌بینند.
+    """
+    def etag_func(request, pk):
+        return _etag(request, model, pk, template_name)
+
+    def decorator(view):
+        def cached_view(request, pk):
+            etag = _etag(request, model, pk, template_name)
+            if request.method not in ('GET', 'HEAD') or etag is None:
+                return view(request, pk)
+            key = f'detail:{model._meta.label_lower}:{pk}:{etag}'
+            content = cache.get(key)
+            if content is not None:
+                return HttpResponse(content)
+            response = view(request, pk)
+            if response.status_code == 200 and _is_public(request):
+                cache.set(key, response.content.decode(response.charset), body_timeout())
+            return response
+
+        conditional_view = condition(etag_func=etag_func)(cached_view)
+
+        @wraps(view)
+        def wrapper(request, pk):
+            response = conditional_view(request, pk)
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                visibility = 'public' if _is_public(request) else 'private'
+                patch_cache_control(response, no_cache=True, **{visibility: True})
+            return response
+        return wrapper
+    return decorator
+
+
+def track_detail_children(child_model, parent_field):
+    """تغییر زیرمجموعه‌ای که فقط در صفحه جزئیات دیده می‌شود (مثل نظرها) updated_at والد را جلو می‌برد"""
+    field = child_model._meta.get_field(parent_field)
+    parent_model, attname = field.related_model, field.attname
+
+    def on_change(sender, instance, raw=False, **kwargs):
+        if not raw:
+            touch(parent_model, [getattr(instance, attname)])
+
+    uid = f'conditional:{child_model._meta.label}'
+    post_save.connect(on_change, sender=child_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_change, sender=child_model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,94 @@
+"""
+عکس کاور غیرنرمال‌شده روی موجودیت‌ها (cover_image).
+
+کاور همیشه اولین عکس به ترتیب order و بعد جدیدترین است، مگر اینکه ادمین عکسی
+را سنجاق (cover_pinned) کرده باشد. با هر افزودن، جابه‌جایی یا حذف عکس کاور با
+یک UPDATE همراه زیرکوئری دوباره محاسبه می‌شود؛ پس لیست‌ها و صفحه جزئیات عکس
+کاور را بدون کوئری جداگانه روی عکس‌ها دارند.
+
+تغییرهای گروهی که سیگنال ندارند (update یا bulk_create) باید refresh_covers را
+صدا بزنند یا دستور rebuild_cover_images اجرا شود.
+"""
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+# (مدل عکس، نام فیلد موجودیت) برای همه مدل‌هایی که عکس کاور دارند
+COVER_SOURCES = []
+
+
+def cover_subquery(image_model, entity_field):
+    """شناسه عکسی که باید کاور هر ردیف موجودیت باشد"""
+    return Subquery(
+        image_model.objects.filter(**{entity_field: OuterRef('pk')})
+        .order_by('order', '-created_at', '-id').values('pk')[:1]
+    )
+
+
+def stale_covers(image_model, entity_field):
+    """شرط ردیف‌هایی که کاورشان باید دوباره محاسبه شود: سنجاق‌نشده، خالی یا متعلق به موجودیت دیگر"""
+    return (
+        Q(cover_pinned=False)
+        | Q(cover_image__isnull=True)
+        | ~Q(**{f'cover_image__{entity_field}': F('pk')})
+    )
+
+
+def refresh_covers(image_model, entity_field, pks):
+    """محاسبه دوباره کاور موجودیت‌ها با یک UPDATE؛ کاور سنجاق‌شده معتبر دست نمی‌خورد"""
+    pks = [pk for pk in pks if pk]
+    if not pks:
+        return 0
+    entity_model = image_model._meta.get_field(entity_field).related_model
+    return entity_model.objects.filter(pk__in=pks).filter(stale_covers(image_model, entity_field)).update(
+        cover_image=cover_subquery(image_model, entity_field), cover_pinned=False,
+    )
+
+
+def track_covers(image_model, entity_field):
+    """اتصال سیگنال‌های نگهداری cover_image برای یک مدل عکس"""
+    attname = image_model._meta.get_field(entity_field).attname
+    uid = f'covers:{image_model._meta.label}'
+
+    def remember_previous(sender, instance, raw=False, **kwargs):
+        instance._cover_previous = None
+        if not (raw or instance._state.adding or not instance.pk):
+            instance._cover_previous = sender.objects.filter(pk=instance.pk).values_list(attname, flat=True).first()
+
+    def on_change(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        # عکسی که به موجودیت دیگری منتقل شده کاور قبلی را هم باید آزاد کند
+        previous = getattr(instance, '_cover_previous', None)
+        instance._cover_previous = None
+        refresh_covers(image_model, entity_field, {getattr(instance, attname), previous})
+
+    pre_save.connect(remember_previous, sender=image_model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_change, sender=image_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_change, sender=image_model, weak=False, dispatch_uid=uid)
+    if (image_model, entity_field) not in COVER_SOURCES:
+        COVER_SOURCES.append((image_model, entity_field))
+
+
+class CoverImageAdminMixin:
+    """
+    انتخاب عکس کاور در ادمین فقط از عکس‌های همان موجودیت؛ انتخاب دستی عکس را
+    سنجاق می‌کند و برداشتن سنجاق کاور خودکار را برمی‌گرداند.
+    """
+    cover_entity_field = None
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'cover_image':
+            object_id = request.resolver_match.kwargs.get('object_id') if request.resolver_match else None
+            kwargs['queryset'] = db_field.related_model.objects.filter(**{self.cover_entity_field: object_id})
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        if 'cover_image' in form.changed_data:
+            obj.cover_pinned = obj.cover_image_id is not None
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        image_model = form.instance._meta.get_field('cover_image').related_model
+        refresh_covers(image_model, self.cover_entity_field, [form.instance.pk])
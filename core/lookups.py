@@ -0,0 +1,77 @@
+"""
+کش داخل پروسه برای جدول‌های مرجع (دسته‌بندی، شهر، نوع ورزش، امکانات، بازه قیمت و نوع وعده).
+
+این جدول‌ها تقریباً هیچ‌وقت تغییر نمی‌کنند؛ هر پروسه آن‌ها را یک بار می‌خواند و
+لیست مرتب‌شده آماده را نگه می‌دارد. ذخیره یا حذف هر ردیف از پنل ادمین نسخه
+مشترک را بالا می‌برد تا همه workerها در درخواست بعدی دوباره بخوانند.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .versioning import ProcessLocal
+
+
+def _other_last(items):
+    """گزینه «سایر موارد» همیشه آخر لیست"""
+    return sorted(items, key=lambda item: (item.name == 'other', item.name))
+
+
+def _choices_order(items):
+    """ترتیب تعریف‌شده در choices مدل (مثلاً صبحانه، ناهار، شام)"""
+    if not items:
+        return items
+    codes = [code for code, label in items[0]._meta.get_field('name').choices]
+    return sorted(items, key=lambda item: codes.index(item.name) if item.name in codes else len(codes))
+
+
+# نام جدول: (مدل، تابع ساخت کوئری، مرتب‌سازی نهایی در پایتون)
+LOOKUP_TABLES = {
+    'categories': ('restaurants.Category', lambda qs: qs.filter(is_active=True).order_by('order'), None),
+    'cities': ('restaurants.City', None, None),
+    'meal_types': ('restaurants.MealType', None, _choices_order),
+    'sport_types': ('gym.SportType', None, _other_last),
+    'facilities': ('gym.Facility', None, _other_last),
+    'price_ranges': ('gym.PriceRange', None, None),
+}
+
+
+def _builder(name):
+    label, query, arrange = LOOKUP_TABLES[name]
+
+    def build():
+        queryset = apps.get_model(label).objects.all()
+        if query:
+            queryset = query(queryset)
+        items = list(queryset)
+        if arrange:
+            items = arrange(items)
+        return tuple(items)
+    return build
+
+
+_tables = {name: ProcessLocal(f'lookups:{name}', _builder(name)) for name in LOOKUP_TABLES}
+
+
+def get_lookup(name):
+    """لیست مرتب‌شده (tuple) یک جدول مرجع از کش پروسه"""
+    return _tables[name].get()
+
+
+def invalidate_lookup(name):
+    _tables[name].invalidate()
+
+
+def track_lookups(model):
+    """اتصال سیگنال‌های باطل‌سازی کش برای همه جدول‌های مرجعی که از این مدل ساخته می‌شوند"""
+    names = [name for name, (label, _, _) in LOOKUP_TABLES.items() if label == model._meta.label]
+
+    def on_change(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        for name in names:
+            transaction.on_commit(lambda name=name: invalidate_lookup(name))
+
+    uid = f'lookups:{model._meta.label}'
+    post_save.connect(on_change, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_change, sender=model, weak=False, dispatch_uid=uid)
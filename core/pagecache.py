@@ -0,0 +1,127 @@
+"""
+کش کامل صفحه برای لیست‌ها با کلید پارامترهای فیلتر.
+
+کلید شامل نسخه هر بخش (page:<vertical>) است؛ هر نوشتنی که روی محتوای لیست
+اثر دارد نسخه را بالا می‌برد، پس صفحه باطل‌شده هرگز سرو نمی‌شود. برای جلوگیری از
+هجوم هم‌زمان (stampede) فقط یک worker با قفل کش صفحه را می‌سازد و بقیه کمی
+منتظر نتیجه می‌مانند. هر دو به کش مشترک با add و incr اتمی (core.cache) تکیه
+دارند.
+
+بخش‌های متغیر هر درخواست (مثل تبلیغات چرخشی) با تابع refresh روی HTML
+کش‌شده جایگزین می‌شوند.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from .versioning import bump_version, get_version
+
+# پارامترهایی که روی خروجی لیست اثر دارند؛ درخواست با پارامتر دیگر کش نمی‌شود
+LIST_PARAMS = (
+    'city', 'rating', 'sport_type', 'facility', 'meal_type', 'price_range',
+    'search', 'sort', 'match', 'page', 'cursor',
+)
+
+LOCK_TIMEOUT = 10
+WAIT_SECONDS = 2
+WAIT_INTERVAL = 0.05
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+
+
+def version_name(vertical):
+    return f'page:{vertical}'
+
+
+def normalized_params(request):
+    """
+    کوئری‌استرینگ درخواست، یا None اگر پارامتر ناشناخته‌ای باشد.
+
+    مقادیر همان‌طور که view می‌خواند در کلید می‌آیند (بدون strip، با همه تکرارها
+    و به همان ترتیب)؛ view فقط مقدار اول پارامترهای تکی را می‌خواند و لینک‌های
+    صفحه‌بندی کوئری‌استرینگ کامل را تکرار می‌کنند، پس دو درخواستی که view با آن‌ها
+    متفاوت رفتار می‌کند نباید کلید مشترک داشته باشند.
+    """
+    if set(request.GET) - set(LIST_PARAMS):
+        return None
+    return request.GET.urlencode()
+
+
+def page_key(vertical, params):
+    digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+    return f'page:{vertical}:{get_version(version_name(vertical))}:{digest}'
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        content = cache.get(key)
+        if content is not None:
+            return content
+    return None
+
+
+def cached_list_page(vertical, refresh=None):
+    """
+    کش نسخه‌دار صفحه لیست یک بخش.
+
+    refresh(request, content) در هر بار سرو از کش روی HTML اعمال می‌شود.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            params = normalized_params(request) if request.method == 'GET' else None
+            if params is None:
+                return view(request, *args, **kwargs)
+
+            key = page_key(vertical, params)
+            content = cache.get(key)
+            lock_key = f'{key}:lock'
+            locked = False
+            if content is None:
+                locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+                if not locked:
+                    content = _wait_for(key)
+            if content is not None:
+                if refresh:
+                    content = refresh(request, content)
+                return HttpResponse(content)
+
+            try:
+                response = view(request, *args, **kwargs)
+                if locked and response.status_code == 200 and not response.streaming:
+                    cache.set(key, response.content.decode(response.charset), page_timeout())
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_pages(*verticals):
+    for vertical in verticals:
+        bump_version(version_name(vertical))
+
+
+def track_pages(model, *verticals):
+    """باطل‌سازی کش صفحه بخش‌ها با هر تغییر در مدل (شامل رابطه‌های چندبه‌چند آن)"""
+    def on_change(sender, raw=False, action=None, **kwargs):
+        if raw or (action and not action.startswith('post_')):
+            return
+        transaction.on_commit(lambda: invalidate_pages(*verticals))
+
+    uid = f'pagecache:{model._meta.label}'
+    post_save.connect(on_change, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_change, sender=model, weak=False, dispatch_uid=uid)
+    for field in model._meta.local_many_to_many:
+        m2m_changed.connect(on_change, sender=field.remote_field.through, weak=False, dispatch_uid=f'{uid}:{field.name}')
@@ -0,0 +1,168 @@
+"""
+صفحه‌بندی keyset (cursor) برای لیست‌ها.
+
+به جای OFFSET و COUNT(*)، هر صفحه با شرط «بعد از آخرین آیتم صفحه قبل» روی
+کلید مرتب‌سازی (مثلاً created_at و id) خوانده می‌شود، پس هزینه صفحه ۵۰۰ با
+صفحه ۱ یکی است. توکن‌های بعدی/قبلی امضا شده‌اند و تعداد کل به‌صورت تقریبی
+در کش نگه داشته می‌شود.
+"""
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+# ترتیب‌های قابل انتخاب در لیست‌ها؛ آخرین فیلد همیشه id است تا کلید یکتا باشد
+LIST_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'rating': ('-avg_rating', '-rating_count', '-id'),
+    'popular': ('-rating_count', '-avg_rating', '-id'),
+}
+DEFAULT_SORT = 'newest'
+
+CURSOR_SALT = 'core.pagination.cursor'
+TOTAL_CACHE_TIMEOUT = 300
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    """یک صفحه از نتایج keyset با توکن‌های صفحه بعد و قبل"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor, approx_total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approx_total = approx_total
+        self.base_query = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, ordering, total_cache_key=None):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.total_cache_key = total_cache_key
+
+    def _encode(self, obj, direction):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'v': values, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            model = self.queryset.model
+            values = [model._meta.get_field(name).to_python(value) for name, value in zip(self.fields, data['v'])]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError) as exc:
+            raise InvalidCursor(str(exc)) from exc
+        if len(values) != len(self.fields) or data.get('d') not in ('next', 'prev'):
+            raise InvalidCursor('malformed cursor')
+        return values, data['d']
+
+    def _seek(self, values, forward):
+        """شرط «بعد از» (یا «قبل از») یک کلید مرتب‌سازی چندستونی"""
+        conditions = []
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {self.fields[j]: values[j] for j in range(i)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+        return reduce(or_, conditions)
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def approx_total(self, compute):
+        if not self.total_cache_key:
+            return None
+        total = cache.get(self.total_cache_key)
+        if total is None and compute:
+            total = self.queryset.order_by().count()
+            cache.set(self.total_cache_key, total, TOTAL_CACHE_TIMEOUT)
+        return total
+
+    def page(self, cursor=None):
+        values, direction = self._decode(cursor) if cursor else (None, 'next')
+        forward = direction == 'next'
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if not forward:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        items = list(queryset[:self.per_page + 1])
+        more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not forward:
+            items.reverse()
+
+        if forward:
+            has_next, has_previous = more, values is not None
+        else:
+            has_next, has_previous = True, more
+        next_cursor = self._encode(items[-1], 'next') if items and has_next else None
+        previous_cursor = self._encode(items[0], 'prev') if items and has_previous else None
+        # COUNT فقط در صفحه اول و فقط وقتی در کش نباشد اجرا می‌شود
+        return KeysetPage(items, next_cursor, previous_cursor, self.approx_total(compute=values is None))
+
+
+def _base_query(request):
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    return params.urlencode()
+
+
+def paginate_list(request, queryset, per_page, ordering=None):
+    """
+    صفحه‌بندی لیست‌ها: با ترتیب مشخص keyset و در غیر این صورت (مثلاً رتبه جستجو)
+    یا با پارامتر page قدیمی، صفحه‌بندی معمولی.
+    """
+    base_query = _base_query(request)
+    cursor = request.GET.get('cursor')
+    if ordering is None or (request.GET.get('page') and not cursor):
+        page = Paginator(queryset, per_page).get_page(request.GET.get('page', 1))
+        page.base_query = base_query
+        return page
+
+    normalized = '&'.join(sorted(base_query.split('&')))
+    digest = hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()
+    total_key = f'list-total:{queryset.model._meta.label_lower}:{digest}'
+    paginator = KeysetPaginator(queryset, per_page, ordering, total_cache_key=total_key)
+    try:
+        page = paginator.page(cursor)
+    except InvalidCursor:
+        page = paginator.page()
+    page.base_query = base_query
+    return page
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+# (مدل امتیاز، نام فیلد موجودیت) برای همه مدل‌هایی که امتیاز تجمیعی دارند
+RATING_SOURCES = []
+
+
+def apply_rating_delta(model, pk, delta_sum, delta_count):
+    """اعمال تغییر روی ستون‌های تجمیعی امتیاز با یک UPDATE اتمیک"""
+    if not pk or (not delta_sum and not delta_count):
+        return
+    new_sum = F('rating_sum') + delta_sum
+    new_count = F('rating_count') + delta_count
+    model.objects.filter(pk=pk).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        avg_rating=Case(
+            When(rating_count__lte=-delta_count, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def track_ratings(rating_model, entity_field):
+    """اتصال سیگنال‌های نگهداری امتیاز تجمیعی برای یک مدل امتیاز"""
+    field = rating_model._meta.get_field(entity_field)
+    entity_model = field.related_model
+    attname = field.attname
+    uid = f'rating_aggregates:{rating_model._meta.label}'
+
+    def remember_previous(sender, instance, raw=False, **kwargs):
+        instance._rating_previous = None
+        if raw or instance._state.adding or not instance.pk:
+            return
+        instance._rating_previous = sender.objects.filter(pk=instance.pk).values_list(attname, 'rating').first()
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        entity_id = getattr(instance, attname)
+        previous = getattr(instance, '_rating_previous', None)
+        instance._rating_previous = None
+        with transaction.atomic():
+            if previous is None:
+                apply_rating_delta(entity_model, entity_id, instance.rating, 1)
+            elif previous[0] == entity_id:
+                apply_rating_delta(entity_model, entity_id, instance.rating - previous[1], 0)
+            else:
+                apply_rating_delta(entity_model, previous[0], -previous[1], -1)
+                apply_rating_delta(entity_model, entity_id, instance.rating, 1)
+
+    def on_delete(sender, instance, **kwargs):
+        apply_rating_delta(entity_model, getattr(instance, attname), -instance.rating, -1)
+
+    pre_save.connect(remember_previous, sender=rating_model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=rating_model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=rating_model, weak=False, dispatch_uid=uid)
+    if (rating_model, entity_field) not in RATING_SOURCES:
+        RATING_SOURCES.append((rating_model, entity_field))
+
+
+def rating_summary(entity):
+    """خلاصه امتیاز یک موجودیت: میانگین، تعداد و توزیع ستاره‌ها (۱ تا ۵) با حداکثر یک کوئری"""
+    count = entity.rating_count
+    histogram = {stars: 0 for stars in range(1, 6)}
+    if count:
+        histogram.update(
+            entity.ratings.order_by().values_list('rating').annotate(total=Count('id'))
+        )
+    return {
+        'average': round(entity.avg_rating, 1) if count else 0,
+        'count': count,
+        'histogram': [
+            {
+                'stars': stars,
+                'count': histogram[stars],
+                'percent': round(histogram[stars] * 100 / count) if count else 0,
+            }
+            for stars in range(5, 0, -1)
+        ],
+    }
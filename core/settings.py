@@ -40,6 +40,9 @@ INSTALLED_APPS = [
     "restaurants",
     "gym",
     "trainers",
+    "search",
+    "assets",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -66,6 +69,9 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "restaurants.context_processors.categories",
             ],
+            "libraries": {
+                "listing_tags": "core.templatetags.listing_tags",
+            },
         },
     },
 ]
@@ -84,6 +90,21 @@ DATABASES = {
 }
 
 
+# کش مشترک بین همه workerها؛ شمارنده‌های نسخه (core.versioning)، کش صفحه و کارت
+# و قفل‌ها باید برای همه پروسه‌ها یکی باشند و کش داخل پروسه (LocMem) پذیرفته
+# نمی‌شود. برای چند سرور این را به Redis یا Memcached ببرید.
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.AtomicFileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+}
+
+# تست‌ها روی پوشه کش موقت و خالی اجرا می‌شوند
+TEST_RUNNER = "core.test_runner.DiscoverRunner"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,6 +146,12 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# آپلودها با هش محتوا ذخیره می‌شوند تا فایل تکراری یک بار روی دیسک بماند
+STORAGES = {
+    "default": {"BACKEND": "assets.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
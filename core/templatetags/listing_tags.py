@@ -0,0 +1,43 @@
+"""
+فیلترهای مشترک قالب‌های باشگاه، رستوران و مربی (فیلترها و عکس‌ها).
+
+core اپ نصب‌شده نیست، پس این کتابخانه در TEMPLATES['OPTIONS']['libraries'] با
+نام listing_tags ثبت شده است.
+"""
+from django import template
+
+from core import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def facet_count(counts, value):
+    """تعداد نتایج یک گزینه فیلتر با فیلترهای فعلی"""
+    if not counts:
+        return 0
+    return counts.get(value, 0)
+
+
+@register.filter
+def variant_url(image, variant):
+    """آدرس نسخه JPEG یک اندازه از عکس (یا فایل اصلی تا ساخته شدن نسخه‌ها)"""
+    return thumbnails.variant_url(image, variant)
+
+
+@register.filter
+def srcset(image, variant):
+    """srcset نسخه‌های JPEG یک اندازه از عکس"""
+    return thumbnails.srcset(image, variant)
+
+
+@register.filter
+def webp_srcset(image, variant):
+    """srcset نسخه‌های WebP یک اندازه از عکس"""
+    return thumbnails.srcset(image, variant, ext='webp')
+
+
+@register.filter
+def placeholder_style(image):
+    """style پس‌زمینه عکس با پیش‌نمایش کوچک و رنگ غالب تا بارگذاری فایل اصلی"""
+    return thumbnails.placeholder_style(image)
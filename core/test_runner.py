@@ -0,0 +1,33 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as BaseDiscoverRunner
+from django.utils.module_loading import import_string
+
+
+class DiscoverRunner(BaseDiscoverRunner):
+    """
+    اجرای تست‌ها با کش فایلی موقت.
+
+    کش فایلی بین اجراها باقی می‌ماند و شمارنده‌های نسخه و صفحه‌های کش‌شده یک
+    اجرای قبلی روی دیتابیس تست تازه سرو می‌شدند.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp()
+        caches = {
+            alias: {**config, 'LOCATION': f'{self._cache_dir}/{alias}'}
+            if issubclass(import_string(config['BACKEND']), FileBasedCache) else config
+            for alias, config in settings.CACHES.items()
+        }
+        self._cache_override = override_settings(CACHES=caches)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,222 @@
+"""
+نسخه‌های کوچک‌شده (derivative) عکس‌های آپلودی برای کارت‌ها، نوار عکس‌های
+کوچک، عکس اصلی جزئیات و تبلیغات.
+
+برای هر اندازه دو تراکم (1x و 2x) و دو فرمت (JPEG و WebP) کنار فایل اصلی
+ذخیره می‌شود؛ مثلا gyms/a.jpg ← gyms/a.card-2x.webp. نام‌ها قطعی‌اند، پس
+قالب‌ها آدرس‌ها را بدون کوئری می‌سازند و تا وقتی derivatives_ready ردیف
+روشن نشده همان فایل اصلی سرو می‌شود. عرض فایل اصلی (image_width) هم ذخیره
+می‌شود تا srcset عرض واقعی نسخه‌های عکس‌های کوچک را اعلام کند.
+
+ساخت در صف پس‌زمینه (صف media) انجام می‌شود و با save(update_fields) پرچم را
+روشن می‌کند تا سیگنال‌های موجود (کش کارت، کش صفحه، تبلیغات) هم باطل شوند.
+
+برای مدل‌هایی که فیلد placeholder دارند در همان کار یک پیش‌نمایش چندبایتی
+(data URI یک WebP حدودا 16 پیکسلی) و رنگ غالب عکس هم روی ردیف ذخیره می‌شود تا
+قالب‌ها آن را درون صفحه بگذارند و جای عکس پیش از رسیدن فایل اصلی رنگ بگیرد.
+"""
+import base64
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save, pre_save
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue, register
+
+# نام: (عرض، ارتفاع) در تراکم 1x؛ ارتفاع None یعنی حفظ نسبت بدون برش
+VARIANTS = {
+    'thumb': (120, 120),
+    'card': (400, 220),
+    'hero': (960, None),
+    'ad': (280, None),
+}
+DENSITIES = (1, 2)
+FORMATS = {'jpg': 'JPEG', 'webp': 'WEBP'}
+QUALITY = 80
+# بزرگ‌ترین ضلع پیش‌نمایش؛ مرورگر آن را کش می‌دهد و خودبه‌خود محو می‌شود
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# (مدل، نام فیلد عکس، اندازه‌ها) برای همه مدل‌هایی که derivative دارند
+DERIVATIVE_SOURCES = []
+
+
+def derivative_name(name, variant, density=1, ext='jpg'):
+    root, _ = posixpath.splitext(name)
+    suffix = '' if density == 1 else f'-{density}x'
+    return f'{root}.{variant}{suffix}.{ext}'
+
+
+def _resize(image, variant, density):
+    width, height = VARIANTS[variant]
+    width = min(width * density, image.width)
+    if height is None:
+        return ImageOps.contain(image, (width, image.height))
+    height = min(height * density, image.height)
+    return ImageOps.fit(image, (width, height))
+
+
+def open_image(field_file):
+    """عکس RGB با چرخش EXIF اعمال‌شده؛ None اگر فایل خوانده نشود"""
+    try:
+        with field_file.storage.open(field_file.name) as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            return image.convert('RGB')
+    except (OSError, ValueError):
+        return None
+
+
+def generate_derivatives(field_file, variants, image=None):
+    """ساخت همه نسخه‌های یک فایل عکس؛ False اگر فایل اصلی خوانده نشود"""
+    storage = field_file.storage
+    if image is None:
+        image = open_image(field_file)
+    if image is None:
+        return False
+
+    for variant in variants:
+        for density in DENSITIES:
+            resized = _resize(image, variant, density)
+            for ext, image_format in FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, image_format, quality=QUALITY)
+                name = derivative_name(field_file.name, variant, density, ext)
+                if storage.exists(name):
+                    storage.delete(name)
+                # ذخیره‌ساز محتوامحور فقط کنار فایل‌های هش‌شده همان نام را نگه می‌دارد
+                if storage.save(name, ContentFile(buffer.getvalue())) != name:
+                    return False
+    return True
+
+
+def dominant_color(image):
+    """پرتکرارترین رنگ عکس پس از کاهش به چند رنگ، به شکل #rrggbb"""
+    small = ImageOps.contain(image, (64, 64)).quantize(colors=4)
+    _, index = max(small.getcolors())
+    red, green, blue = small.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def placeholder(image):
+    """(data URI پیش‌نمایش کوچک WebP، رنگ غالب) برای نمایش پیش از بارگذاری عکس"""
+    tiny = ImageOps.contain(image, (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    tiny.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f'data:image/webp;base64,{encoded}', dominant_color(image)
+
+
+def has_placeholder(model):
+    return any(field.name == 'placeholder' for field in model._meta.concrete_fields)
+
+
+def build_placeholder(model, field_name, pk):
+    """ساخت فقط پیش‌نمایش یک ردیف برای عکس‌هایی که نسخه‌هایشان از قبل ساخته شده"""
+    instance = model.objects.filter(pk=pk).first()
+    field_file = instance and getattr(instance, field_name)
+    image = open_image(field_file) if field_file else None
+    if image is None:
+        return False
+    instance.placeholder, instance.dominant_color = placeholder(image)
+    instance.save(update_fields=['placeholder', 'dominant_color'])
+    return True
+
+
+def build_derivatives(model, field_name, variants, pk):
+    """ساخت نسخه‌های عکس یک ردیف و روشن کردن derivatives_ready"""
+    instance = model.objects.filter(pk=pk).first()
+    field_file = instance and getattr(instance, field_name)
+    image = open_image(field_file) if field_file else None
+    if image is None or not generate_derivatives(field_file, variants, image):
+        return False
+    instance.derivatives_ready = True
+    instance.image_width = image.width
+    update_fields = ['derivatives_ready', 'image_width']
+    if has_placeholder(model):
+        instance.placeholder, instance.dominant_color = placeholder(image)
+        update_fields += ['placeholder', 'dominant_color']
+    instance.save(update_fields=update_fields)
+    return True
+
+
+@register('thumbnails.build', lane='media', max_attempts=3)
+def build_derivatives_job(model, pk):
+    model = apps.get_model(model)
+    for source_model, field_name, variants in DERIVATIVE_SOURCES:
+        if source_model is model:
+            build_derivatives(model, field_name, variants, pk)
+
+
+def track_derivatives(model, field_name, variants):
+    """ساخت نسخه‌ها با هر آپلود عکس جدید برای یک مدل"""
+    uid = f'thumbnails:{model._meta.label}'
+
+    def remember_change(sender, instance, raw=False, update_fields=None, **kwargs):
+        instance._derivatives_pending = False
+        if raw or (update_fields is not None and field_name not in update_fields):
+            return
+        previous = None
+        if not instance._state.adding and instance.pk:
+            previous = sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        name = getattr(instance, field_name).name
+        if name != previous:
+            instance.derivatives_ready = False
+            if has_placeholder(sender):
+                instance.placeholder = instance.dominant_color = ''
+            instance._derivatives_pending = bool(name)
+
+    def on_save(sender, instance, raw=False, **kwargs):
+        if getattr(instance, '_derivatives_pending', False):
+            instance._derivatives_pending = False
+            label = sender._meta.label
+            enqueue('thumbnails.build', key=f'thumbnails:{label}:{instance.pk}', model=label, pk=instance.pk)
+
+    pre_save.connect(remember_change, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    if model not in [source[0] for source in DERIVATIVE_SOURCES]:
+        DERIVATIVE_SOURCES.append((model, field_name, variants))
+
+
+def variant_url(image, variant, field_name='image', density=1, ext='jpg'):
+    """آدرس یک نسخه از عکس یا آدرس فایل اصلی اگر نسخه‌ها هنوز ساخته نشده‌اند"""
+    field_file = getattr(image, field_name, None) if image else None
+    if not field_file:
+        return ''
+    if not getattr(image, 'derivatives_ready', False):
+        return field_file.url
+    return field_file.storage.url(derivative_name(field_file.name, variant, density, ext))
+
+
+def variant_width(variant, density, source_width):
+    """عرض واقعی یک نسخه؛ _resize عکس را از عرض فایل اصلی بزرگ‌تر نمی‌کند"""
+    return min(VARIANTS[variant][0] * density, source_width)
+
+
+def srcset(image, variant, field_name='image', ext='jpg'):
+    """
+    مقدار srcset با عرض واقعی هر تراکم؛ تراکمی که عکس اصلی برای آن کوچک است
+    (و همان فایل تراکم قبلی را دارد) کنار گذاشته می‌شود. خالی تا وقتی نسخه‌ها
+    ساخته نشده‌اند یا عرض عکس اصلی ثبت نشده است.
+    """
+    source_width = getattr(image, 'image_width', None) if image else None
+    if not source_width or not getattr(image, 'derivatives_ready', False):
+        return ''
+    candidates = {}
+    for density in DENSITIES:
+        candidates.setdefault(variant_width(variant, density, source_width), density)
+    return ', '.join(
+        f'{variant_url(image, variant, field_name, density, ext)} {width}w'
+        for width, density in candidates.items()
+    )
+
+
+def placeholder_style(image):
+    """CSS پس‌زمینه عکس تا رسیدن فایل اصلی: رنگ غالب و پیش‌نمایش کش‌داده‌شده"""
+    color = getattr(image, 'dominant_color', '') if image else ''
+    preview = getattr(image, 'placeholder', '') if image else ''
+    if not preview:
+        return f'background-color: {color};' if color else ''
+    return f'background: {color or "transparent"} url({preview}) center / cover no-repeat;'
@@ -15,17 +15,20 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from assets.views import media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("restaurants/", include("restaurants.urls")),
     path("trainers/", include("trainers.urls")),
+    path("search/", include("search.urls")),
+    # مدیا در همه محیط‌ها از این view سرو می‌شود (با MEDIA_SENDFILE ارسال به وب‌سرور سپرده می‌شود)
+    re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), media, name="media"),
     path("", include("gym.urls")),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
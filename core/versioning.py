@@ -0,0 +1,103 @@
+"""
+شمارنده‌های نسخه در کش مشترک جنگو برای باطل کردن کش‌های داخل پروسه.
+
+هر پروسه نسخه‌ای را که داده‌هایش با آن ساخته شده نگه می‌دارد و در هر درخواست
+فقط نسخه فعلی را از کش می‌خواند؛ هر تغییری در دیتابیس نسخه را بالا می‌برد تا
+همه workerها در درخواست بعدی داده را دوباره بسازند.
+
+این فقط وقتی درست است که کش پیش‌فرض بین پروسه‌ها مشترک باشد و add و incr آن
+اتمی باشند؛ بررسی core.E001 کش داخل پروسه را هنگام شروع رد می‌کند.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+KEY_PREFIX = 'version:'
+
+# کش‌هایی که هر پروسه نسخه جدای خودش را دارد
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [checks.Error(
+            f'The default cache ({backend}) is not shared between worker processes.',
+            hint='Version counters would never reach other workers; use core.cache.AtomicFileBasedCache, '
+                 'Redis or Memcached.',
+            id='core.E001',
+        )]
+    return []
+
+
+def _seed():
+    # نسخه‌ای که از کش بیرون رانده شده با مقداری تازه شروع می‌شود، نه 1؛ وگرنه
+    # داده‌های کش‌شده با نسخه‌های قدیمی دوباره معتبر به نظر می‌رسیدند
+    return time.time_ns()
+
+
+def get_version(name):
+    key = KEY_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        seed = _seed()
+        cache.add(key, seed, None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump_version(name):
+    key = KEY_PREFIX + name
+    try:
+        return cache.incr(key)
+    except ValueError:
+        seed = _seed()
+        cache.add(key, seed, None)
+        return cache.get(key, seed)
+
+
+class ProcessLocal:
+    """
+    ساختار داده‌ای که یک بار در هر پروسه ساخته می‌شود و با نسخه مشترک همگام می‌ماند.
+
+    تغییرات این پروسه می‌توانند به‌صورت افزایشی روی داده اعمال شوند؛ بالا رفتن
+    نسخه باعث می‌شود بقیه پروسه‌ها در اولین دسترسی داده را از نو بسازند.
+    """
+
+    def __init__(self, name, build):
+        self.name = name
+        self._build = build
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+
+    def get(self):
+        version = get_version(self.name)
+        if self._value is None or self._version != version:
+            with self._lock:
+                if self._value is None or self._version != version:
+                    self._value = self._build()
+                    self._version = version
+        return self._value
+
+    def update(self, change):
+        """اعمال تغییر روی داده ساخته‌شده این پروسه و اطلاع به بقیه پروسه‌ها"""
+        with self._lock:
+            previous = get_version(self.name)
+            synced = self._version is not None and self._version == previous
+            if self._value is not None:
+                change(self._value)
+            version = bump_version(self.name)
+            # اگر پروسه دیگری هم‌زمان نسخه را بالا برده تغییر او اینجا نیست
+            if synced and version == previous + 1:
+                self._version = version
+
+    def invalidate(self):
+        bump_version(self.name)
@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from core.covers import CoverImageAdminMixin
 from .models import Gym, GymPhoneNumber, GymImage, GymComment, GymRating, SportType, PriceRange, Facility
 
 
@@ -12,18 +14,20 @@ class GymPhoneNumberInline(admin.TabularInline):
 class GymImageInline(admin.TabularInline):
     model = GymImage
     extra = 1
+    fields = ['image', 'description', 'order']
     verbose_name = "عکس"
     verbose_name_plural = "عکس‌های باشگاه"
 
 
 @admin.register(Gym)
-class GymAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'price_range', 'created_at']
+class GymAdmin(CoverImageAdminMixin, admin.ModelAdmin):
+    cover_entity_field = 'gym'
+    list_display = ['name', 'city', 'price_range', 'avg_rating', 'rating_count', 'created_at']
     list_filter = ['city', 'price_range', 'sport_types', 'facilities', 'created_at']
     search_fields = ['name', 'address', 'description']
     inlines = [GymPhoneNumberInline, GymImageInline]
     filter_horizontal = ['sport_types', 'facilities']
-    fields = ['name', 'city', 'address', 'description', 'sport_types', 'price_range', 'facilities']
+    fields = ['name', 'city', 'address', 'description', 'sport_types', 'price_range', 'facilities', 'cover_image', 'cover_pinned']
     verbose_name = "باشگاه"
     verbose_name_plural = "باشگاه‌ها"
 
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:09
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Gym = apps.get_model("gym", "Gym")
+    GymRating = apps.get_model("gym", "GymRating")
+    totals = (
+        GymRating.objects.order_by()
+        .values("gym")
+        .annotate(total=Sum("rating"), count=Count("id"))
+    )
+    for row in totals:
+        Gym.objects.filter(pk=row["gym"]).update(
+            rating_sum=row["total"],
+            rating_count=row["count"],
+            avg_rating=row["total"] / row["count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0002_facility_pricerange_sporttype_gym_facilities_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gym",
+            name="avg_rating",
+            field=models.FloatField(
+                db_index=True, default=0, verbose_name="میانگین امتیاز"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gym",
+            name="rating_count",
+            field=models.IntegerField(
+                db_index=True, default=0, verbose_name="تعداد امتیازها"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gym",
+            name="rating_sum",
+            field=models.IntegerField(default=0, verbose_name="مجموع امتیازها"),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0003_rating_aggregates"),
+        ("restaurants", "0010_list_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="gym",
+            index=models.Index(fields=["-created_at", "-id"], name="gym_newest_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="gym",
+            index=models.Index(
+                fields=["-avg_rating", "-rating_count", "-id"], name="gym_rating_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gym",
+            index=models.Index(
+                fields=["-rating_count", "-avg_rating", "-id"], name="gym_popular_idx"
+            ),
+        ),
+    ]
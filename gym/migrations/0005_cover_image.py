@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0004_list_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="gymimage",
+            options={
+                "ordering": ["order", "-created_at", "-id"],
+                "verbose_name": "عکس باشگاه",
+                "verbose_name_plural": "عکس\u200cهای باشگاه",
+            },
+        ),
+        migrations.AddField(
+            model_name="gym",
+            name="cover_image",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="gym.gymimage",
+                verbose_name="عکس کاور",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gym",
+            name="cover_pinned",
+            field=models.BooleanField(default=False, verbose_name="کاور ثابت"),
+        ),
+        migrations.AddField(
+            model_name="gymimage",
+            name="order",
+            field=models.PositiveIntegerField(default=0, verbose_name="ترتیب"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0005_cover_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gymimage",
+            name="derivatives_ready",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name="نسخه\u200cهای کوچک ساخته شده",
+            ),
+        ),
+    ]
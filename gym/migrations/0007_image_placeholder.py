@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0006_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gymimage",
+            name="dominant_color",
+            field=models.CharField(
+                blank=True, editable=False, max_length=7, verbose_name="رنگ غالب"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gymimage",
+            name="placeholder",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="پیش\u200cنمایش کوچک"
+            ),
+        ),
+    ]
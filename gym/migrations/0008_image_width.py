@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0007_image_placeholder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gymimage",
+            name="image_width",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="عرض عکس اصلی"
+            ),
+        ),
+    ]
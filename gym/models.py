@@ -76,13 +76,31 @@ class Gym(models.Model):
     sport_types = models.ManyToManyField(SportType, related_name='gyms', verbose_name="نوع ورزش", blank=True)
     price_range = models.ForeignKey(PriceRange, on_delete=models.SET_NULL, null=True, blank=True, related_name='gyms', verbose_name="محدوده قیمت")
     facilities = models.ManyToManyField(Facility, related_name='gyms', verbose_name="امکانات", blank=True)
+    rating_sum = models.IntegerField(default=0, verbose_name="مجموع امتیازها")
+    rating_count = models.IntegerField(default=0, db_index=True, verbose_name="تعداد امتیازها")
+    avg_rating = models.FloatField(default=0, db_index=True, verbose_name="میانگین امتیاز")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ بروزرسانی")
+    cover_image = models.ForeignKey(
+        'GymImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="عکس کاور"
+    )
+    cover_pinned = models.BooleanField(default=False, verbose_name="کاور ثابت")
 
     class Meta:
         verbose_name = "باشگاه"
         verbose_name_plural = "باشگاه‌ها"
         ordering = ['-created_at']
+        # ایندکس‌های ترکیبی برای صفحه‌بندی cursor روی هر ترتیب لیست
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='gym_newest_idx'),
+            models.Index(fields=['-avg_rating', '-rating_count', '-id'], name='gym_rating_idx'),
+            models.Index(fields=['-rating_count', '-avg_rating', '-id'], name='gym_popular_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -119,12 +137,17 @@ class GymImage(models.Model):
         null=True,
         verbose_name="توضیحات"
     )
+    order = models.PositiveIntegerField(default=0, verbose_name="ترتیب")
+    derivatives_ready = models.BooleanField(default=False, editable=False, verbose_name="نسخه‌های کوچک ساخته شده")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="عرض عکس اصلی")
+    placeholder = models.TextField(blank=True, editable=False, verbose_name="پیش‌نمایش کوچک")
+    dominant_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="رنگ غالب")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
 
     class Meta:
         verbose_name = "عکس باشگاه"
         verbose_name_plural = "عکس‌های باشگاه"
-        ordering = ['-created_at']
+        ordering = ['order', '-created_at', '-id']
 
     def __str__(self):
         return f"{self.gym.name} - {self.description or 'عکس'}"
@@ -0,0 +1,33 @@
+from core.cardcache import track_card_children, track_card_relations
+from core.conditional import track_detail_children
+from core.covers import track_covers
+from core.lookups import track_lookups
+from core.pagecache import track_pages
+from core.ratings import track_ratings
+from core.thumbnails import track_derivatives
+from .models import Facility, Gym, GymComment, GymImage, GymPhoneNumber, GymRating, PriceRange, SportType
+
+
+track_ratings(GymRating, 'gym')
+
+for _model in (SportType, Facility, PriceRange):
+    track_lookups(_model)
+
+# هر تغییری که روی محتوای لیست باشگاه‌ها اثر دارد نسخه کش صفحه را بالا می‌برد
+for _model in (Gym, GymRating, GymImage, GymPhoneNumber, Facility, PriceRange):
+    track_pages(_model, 'gym')
+track_pages(SportType, 'gym', 'trainer')
+
+# کارت‌های لیست: تغییر عکس، تلفن و رابطه‌ها کارت باشگاه را باطل می‌کند
+track_card_children(GymImage, 'gym')
+track_card_children(GymPhoneNumber, 'gym')
+track_card_relations(Gym, 'gym')
+
+# عکس کاور با هر افزودن، جابه‌جایی یا حذف عکس دوباره محاسبه می‌شود
+track_covers(GymImage, 'gym')
+
+# نسخه‌های کوچک و WebP هر عکس بعد از آپلود ساخته می‌شوند
+track_derivatives(GymImage, 'image', ('thumb', 'card', 'hero'))
+
+# نظرها فقط در صفحه جزئیات دیده می‌شوند؛ اعتبارسنج GET شرطی از updated_at والد ساخته می‌شود
+track_detail_children(GymComment, 'gym')
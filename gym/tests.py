@@ -1,3 +1,532 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from functools import partial
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.cardcache import invalidate_cards, render_cards, template_digest
+from core.pagecache import invalidate_pages, page_key, version_name
+from core.pagination import CURSOR_SALT, LIST_ORDERINGS, InvalidCursor, KeysetPaginator
+from core.ratings import rating_summary
+from core import lookups, thumbnails
+from core.thumbnails import derivative_name
+from core.versioning import KEY_PREFIX, ProcessLocal
+from jobs.queue import run_pending
+
+from restaurants.models import Category, City
+
+from .models import Gym, GymComment, GymImage, GymPhoneNumber, GymRating, SportType
+from .views import CARD_PREFETCH
+
+
+class GymListCardQueryTests(TestCase):
+    def create_gyms(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                gym = Gym.objects.create(name=f'gym{i}', address='address', description='x' * 2000)
+                for j in range(4):
+                    GymImage.objects.create(gym=gym, image=f'gyms/{i}_{j}.jpg')
+                GymPhoneNumber.objects.create(gym=gym, phone='02100000000')
+                for rating in range(1, 6):
+                    GymRating.objects.create(gym=gym, rating=rating)
+
+    def get_uncached_list(self):
+        invalidate_pages('gym')
+        invalidate_cards('gym')
+        return self.client.get('/')
+
+    def test_card_page_has_fixed_query_count(self):
+        self.create_gyms(9)
+        self.client.get('/')
+        # صفحه همراه عکس کاور + تلفن‌ها، مستقل از تعداد آیتم‌ها، عکس‌ها و امتیازها
+        with self.assertNumQueries(2):
+            self.get_uncached_list()
+        self.create_gyms(30)
+        self.client.get('/')
+        with self.assertNumQueries(2):
+            self.get_uncached_list()
+
+    def test_card_page_loads_bounded_rows(self):
+        self.create_gyms(12)
+        response = self.get_uncached_list()
+        gyms = list(response.context['gyms'])
+        self.assertEqual(len(gyms), 9)
+        for gym in gyms:
+            self.assertIn('cover_image', gym._state.fields_cache)
+            self.assertNotIn('images', gym._prefetched_objects_cache)
+            self.assertNotIn('ratings', gym._prefetched_objects_cache)
+            self.assertIn('description', gym.get_deferred_fields())
+        self.assertContains(response, 'gym11')
+
+
+class GymCardCacheTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(name='gym-old', address='address')
+        GymPhoneNumber.objects.create(gym=self.gym, phone='02100000000')
+        # کش بین تست‌ها مشترک است و با rollback دیتابیس خالی نمی‌شود
+        invalidate_cards('gym')
+
+    def cards(self):
+        gyms = list(Gym.objects.all())
+        return ''.join(render_cards('gym', gyms, 'gym/card.html', 'gym', prefetch=CARD_PREFETCH))
+
+    def test_listing_save_and_rating_change_render_fresh_cards(self):
+        self.assertIn('gym-old', self.cards())
+        self.gym.name = 'gym-new'
+        self.gym.save()
+        self.assertIn('gym-new', self.cards())
+
+        GymRating.objects.create(gym=self.gym, rating=4)
+        self.assertIn('4.0 از 5', self.cards())
+        GymPhoneNumber.objects.create(gym=self.gym, phone='02199999999')
+        self.assertIn('02199999999', self.cards())
+
+    def test_cached_cards_skip_prefetch_queries(self):
+        gyms = list(Gym.objects.all())
+        with self.assertNumQueries(1):
+            render_cards('gym', gyms, 'gym/card.html', 'gym', prefetch=CARD_PREFETCH)
+        gyms = list(Gym.objects.all())
+        with self.assertNumQueries(0):
+            cards = render_cards('gym', gyms, 'gym/card.html', 'gym', prefetch=CARD_PREFETCH)
+        self.assertIn('02100000000', cards[0])
+
+
+class LookupCacheTests(TestCase):
+    def test_other_worker_rebuilds_after_save(self):
+        # جدول مرجع در یک worker دیگر با همان نسخه مشترک
+        other_worker = ProcessLocal('lookups:sport_types', lookups._builder('sport_types'))
+        self.assertEqual(list(other_worker.get()), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            other = SportType.objects.create(name='other')
+            yoga = SportType.objects.create(name='yoga')
+        self.assertEqual(list(other_worker.get()), [yoga, other])
+        self.assertEqual(list(lookups.get_lookup('sport_types')), [yoga, other])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            yoga.delete()
+        self.assertEqual(list(other_worker.get()), [other])
+
+
+class GymRatingAggregateTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(name='gym', address='address')
+        self.other = Gym.objects.create(name='other', address='address')
+
+    def assertAggregates(self, gym, rating_sum, rating_count):
+        gym.refresh_from_db()
+        self.assertEqual((gym.rating_sum, gym.rating_count), (rating_sum, rating_count))
+        self.assertAlmostEqual(gym.avg_rating, rating_sum / rating_count if rating_count else 0)
+
+    def test_create_change_and_move(self):
+        ratings = [GymRating.objects.create(gym=self.gym, rating=value) for value in (5, 4, 2)]
+        self.assertAggregates(self.gym, 11, 3)
+
+        ratings[2].rating = 5
+        ratings[2].save()
+        self.assertAggregates(self.gym, 14, 3)
+
+        # امتیاز همراه نظرش به باشگاه دیگری منتقل می‌شود
+        ratings[0].gym = self.other
+        ratings[0].rating = 3
+        ratings[0].save()
+        self.assertAggregates(self.gym, 9, 2)
+        self.assertAggregates(self.other, 3, 1)
+
+    def test_instance_queryset_and_cascade_deletes(self):
+        first = GymRating.objects.create(gym=self.gym, rating=5)
+        for value in (4, 3, 1):
+            GymRating.objects.create(gym=self.gym, rating=value)
+        GymRating.objects.create(gym=self.other, rating=2)
+
+        first.delete()
+        self.assertAggregates(self.gym, 8, 3)
+        GymRating.objects.filter(gym=self.gym, rating__lt=4).delete()
+        self.assertAggregates(self.gym, 4, 1)
+        GymRating.objects.filter(gym=self.gym).delete()
+        self.assertAggregates(self.gym, 0, 0)
+
+        # حذف باشگاه امتیازهایش را cascade حذف می‌کند و به بقیه دست نمی‌زند
+        self.other.delete()
+        self.assertFalse(GymRating.objects.exists())
+        self.assertAggregates(self.gym, 0, 0)
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        for value in (5, 3):
+            GymRating.objects.create(gym=self.gym, rating=value)
+        call_command('rebuild_rating_aggregates', '--check', stdout=StringIO())
+
+        Gym.objects.filter(pk=self.gym.pk).update(rating_sum=1, rating_count=7, avg_rating=0.1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rating_aggregates', '--check', stdout=StringIO())
+        # --check چیزی نمی‌نویسد
+        self.gym.refresh_from_db()
+        self.assertEqual(self.gym.rating_count, 7)
+
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.assertAggregates(self.gym, 8, 2)
+        call_command('rebuild_rating_aggregates', '--check', stdout=StringIO())
+
+
+class GymRatingSummaryTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(name='gym', address='address')
+
+    def test_detail_histogram_buckets(self):
+        for value in (5, 5, 4, 1):
+            GymRating.objects.create(gym=self.gym, rating=value)
+        response = self.client.get(f'/{self.gym.pk}/')
+        self.assertEqual(response.context['avg_rating'], 3.8)
+        self.assertEqual(response.context['total_ratings'], 4)
+        self.assertEqual(response.context['rating_histogram'], [
+            {'stars': 5, 'count': 2, 'percent': 50},
+            {'stars': 4, 'count': 1, 'percent': 25},
+            {'stars': 3, 'count': 0, 'percent': 0},
+            {'stars': 2, 'count': 0, 'percent': 0},
+            {'stars': 1, 'count': 1, 'percent': 25},
+        ])
+
+    def test_summary_costs_at_most_one_query(self):
+        with self.assertNumQueries(0):
+            summary = rating_summary(self.gym)
+        self.assertEqual((summary['average'], summary['count']), (0, 0))
+        self.assertEqual([bar['count'] for bar in summary['histogram']], [0] * 5)
+
+        for value in (3, 2):
+            GymRating.objects.create(gym=self.gym, rating=value)
+        self.gym.refresh_from_db()
+        with self.assertNumQueries(1):
+            summary = rating_summary(self.gym)
+        self.assertEqual(summary['average'], 2.5)
+        self.assertEqual([bar['count'] for bar in summary['histogram']], [0, 0, 1, 1, 0])
+
+
+class GymKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.gyms = [Gym.objects.create(name=f'gym{i}', address='address') for i in range(7)]
+
+    def paginator(self, sort='newest', **kwargs):
+        return KeysetPaginator(Gym.objects.all(), 3, LIST_ORDERINGS[sort], **kwargs)
+
+    def walk(self, paginator):
+        """همه صفحه‌ها رو به جلو و سپس برگشت تا صفحه اول؛ (صفحه‌های رفت، صفحه‌های برگشت)"""
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        back = [pages[-1]]
+        while back[-1].has_previous():
+            back.append(paginator.page(back[-1].previous_cursor))
+        return pages, back[::-1]
+
+    def assertWalksInOrder(self, sort):
+        expected = list(Gym.objects.order_by(*LIST_ORDERINGS[sort]))
+        forward, backward = self.walk(self.paginator(sort))
+        self.assertEqual([list(page) for page in forward], [expected[:3], expected[3:6], expected[6:]])
+        self.assertEqual([list(page) for page in backward], [list(page) for page in forward])
+
+    def test_cursor_round_trip_and_edges(self):
+        self.assertWalksInOrder('newest')
+        forward, backward = self.walk(self.paginator())
+        self.assertFalse(forward[0].has_previous())
+        self.assertTrue(forward[0].has_next())
+        self.assertTrue(forward[-1].has_previous())
+        self.assertFalse(forward[-1].has_next())
+        self.assertFalse(backward[0].has_previous())
+
+    def test_ties_on_datetime_and_float_keys(self):
+        Gym.objects.update(created_at=self.gyms[0].created_at)
+        self.assertWalksInOrder('newest')
+        Gym.objects.filter(pk__in=[gym.pk for gym in self.gyms[:5]]).update(avg_rating=4.5, rating_count=2)
+        Gym.objects.filter(pk=self.gyms[5].pk).update(avg_rating=4.5, rating_count=3)
+        self.assertWalksInOrder('rating')
+        self.assertWalksInOrder('popular')
+
+    def test_tampered_and_invalid_cursors_are_rejected(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        gym = self.gyms[0]
+        invalid = [
+            cursor[:-2] + ('A' if cursor[-2] != 'A' else 'B') + cursor[-1],
+            signing.dumps({'v': [gym.created_at.isoformat(), gym.pk], 'd': 'next'}, salt='other'),
+            signing.dumps({'v': [gym.pk], 'd': 'next'}, salt=CURSOR_SALT),
+            signing.dumps({'v': [gym.created_at.isoformat(), gym.pk], 'd': 'sideways'}, salt=CURSOR_SALT),
+            signing.dumps({'v': ['yesterday', gym.pk], 'd': 'next'}, salt=CURSOR_SALT),
+            'garbage',
+        ]
+        for bad in invalid:
+            with self.subTest(cursor=bad), self.assertRaises(InvalidCursor):
+                paginator.page(bad)
+        # لیست با توکن نامعتبر صفحه اول را نشان می‌دهد
+        self.assertEqual(self.client.get('/', {'sort': 'newest', 'cursor': 'garbage'}).status_code, 200)
+
+    def test_deep_pages_skip_the_count(self):
+        paginator = self.paginator(total_cache_key='gym-keyset-test-total')
+        cache.delete('gym-keyset-test-total')
+        first = paginator.page()
+        self.assertEqual(first.approx_total, 7)
+        with self.assertNumQueries(1):
+            second = paginator.page(first.next_cursor)
+        self.assertEqual(second.approx_total, 7)
+
+
+class GymListPageCacheTests(TestCase):
+    def setUp(self):
+        # کش بین تست‌ها مشترک است و با rollback دیتابیس خالی نمی‌شود
+        invalidate_pages('gym')
+
+    def create_gym(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Gym.objects.create(name=name, address='address')
+
+    def test_writes_invalidate_cached_pages(self):
+        self.create_gym('gym-a')
+        self.assertContains(self.client.get('/'), 'gym-a')
+        self.assertIsNotNone(cache.get(page_key('gym', '')))
+        self.create_gym('gym-b')
+        self.assertIsNone(cache.get(page_key('gym', '')))
+        self.assertContains(self.client.get('/'), 'gym-b')
+
+    def test_evicted_version_never_revives_old_pages(self):
+        version_key = KEY_PREFIX + version_name('gym')
+        self.create_gym('gym-a')
+        cache.delete(version_key)
+        self.client.get('/')
+        self.create_gym('gym-b')
+        # کلید نسخه از کش بیرون رانده می‌شود؛ صفحه نسخه اول هنوز در کش است
+        cache.delete(version_key)
+        self.assertContains(self.client.get('/'), 'gym-b')
+
+    def test_only_the_lock_holder_renders_a_missing_page(self):
+        key = page_key('gym', '')
+        # worker دیگری قفل را گرفته و صفحه را کمی بعد در کش می‌گذارد
+        cache.add(f'{key}:lock', 1, 10)
+        timer = threading.Timer(0.2, cache.set, args=(key, 'rendered by another worker', 60))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(self.client.get('/').content, b'rendered by another worker')
+
+    def test_waiting_request_renders_without_caching_when_lock_holder_is_slow(self):
+        self.create_gym('gym-a')
+        key = page_key('gym', '')
+        cache.add(f'{key}:lock', 1, 10)
+        with mock.patch('core.pagecache.WAIT_SECONDS', 0.1):
+            self.assertContains(self.client.get('/'), 'gym-a')
+        self.assertIsNone(cache.get(key))
+
+    def test_padded_filter_value_has_its_own_page(self):
+        city = City.objects.create(name='tehran')
+        with self.captureOnCommitCallbacks(execute=True):
+            Gym.objects.create(name='gym-tehran', address='address', city=city)
+        # view مقدار را بدون strip می‌خواند و شهری با نام 'tehran ' پیدا نمی‌کند
+        self.assertNotContains(self.client.get('/?city=tehran%20'), 'gym-tehran')
+        self.assertContains(self.client.get('/?city=tehran'), 'gym-tehran')
+
+    def test_padded_sort_value_has_its_own_page(self):
+        top = self.create_gym('gym-top')
+        with self.captureOnCommitCallbacks(execute=True):
+            GymRating.objects.create(gym=top, rating=5)
+        self.create_gym('gym-new')
+        padded = self.client.get('/?sort=rating%20').content.decode()
+        self.assertLess(padded.index('gym-new'), padded.index('gym-top'))
+        rating = self.client.get('/?sort=rating').content.decode()
+        self.assertLess(rating.index('gym-top'), rating.index('gym-new'))
+
+
+class GymDetailConditionalTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(name='gym', address='address')
+        self.url = f'/{self.gym.pk}/'
+
+    def test_etag_answers_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='W/"stale"').status_code, 200)
+
+    def test_if_modified_since_alone_never_answers_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='gym')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_new_comment_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.post(f'/{self.gym.pk}/comment/', {'name': 'ali', 'comment': 'خوب', 'rating': '4'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(GymComment.objects.filter(gym=self.gym).exists())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'خوب')
+
+    def test_comment_form_is_a_separate_private_fragment(self):
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        fragment = self.client.get(f'/{self.gym.pk}/comment/', {'partial': 1})
+        self.assertContains(fragment, 'csrfmiddlewaretoken')
+        self.assertNotContains(fragment, '<html')
+        self.assertIn('private', fragment['Cache-Control'])
+        self.assertIn('no-store', fragment['Cache-Control'])
+
+    def test_template_digest_covers_parent_and_included_templates(self):
+        def digest(part):
+            template_digest.cache_clear()
+            loader = ('django.template.loaders.locmem.Loader', {
+                'page.html': '{% extends "base.html" %}{% block body %}page{% endblock %}',
+                'base.html': '{% block body %}{% endblock %}{% include "part.html" %}',
+                'part.html': part,
+            })
+            templates = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'OPTIONS': {'loaders': [loader]}}]
+            with override_settings(TEMPLATES=templates):
+                return template_digest('page.html')
+
+        self.addCleanup(template_digest.cache_clear)
+        self.assertEqual(digest('a'), digest('a'))
+        self.assertNotEqual(digest('a'), digest('b'))
+
+
+class GymCoverImageTests(TestCase):
+    def setUp(self):
+        self.gym = Gym.objects.create(name='gym', address='address')
+
+    def add_image(self, name, order=0):
+        return GymImage.objects.create(gym=self.gym, image=f'gyms/{name}.jpg', order=order)
+
+    def cover(self):
+        self.gym.refresh_from_db()
+        return self.gym.cover_image
+
+    def test_cover_follows_added_reordered_and_deleted_images(self):
+        self.assertIsNone(self.cover())
+        first = self.add_image('first', order=1)
+        self.assertEqual(self.cover(), first)
+        second = self.add_image('second', order=2)
+        self.assertEqual(self.cover(), first)
+        second.order = 0
+        second.save()
+        self.assertEqual(self.cover(), second)
+        second.delete()
+        self.assertEqual(self.cover(), first)
+        first.delete()
+        self.assertIsNone(self.cover())
+
+    def test_pinned_cover_survives_until_deleted(self):
+        self.add_image('first')
+        pinned = self.add_image('pinned', order=5)
+        Gym.objects.filter(pk=self.gym.pk).update(cover_image=pinned, cover_pinned=True)
+        self.add_image('newest')
+        self.assertEqual(self.cover(), pinned)
+        pinned.delete()
+        self.assertEqual(self.cover().image.name, 'gyms/newest.jpg')
+        self.assertFalse(self.gym.cover_pinned)
+
+    def test_moved_image_releases_pinned_cover(self):
+        other = Gym.objects.create(name='other', address='address')
+        image = self.add_image('moved')
+        Gym.objects.filter(pk=self.gym.pk).update(cover_pinned=True)
+        image.gym = other
+        image.save()
+        self.assertIsNone(self.cover())
+        other.refresh_from_db()
+        self.assertEqual(other.cover_image, image)
+
+    def test_backfill_command(self):
+        images = GymImage.objects.bulk_create([
+            GymImage(gym=self.gym, image='gyms/a.jpg', order=3),
+            GymImage(gym=self.gym, image='gyms/b.jpg', order=1),
+        ])
+        self.assertIsNone(self.cover())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_cover_images', '--check', stdout=StringIO())
+        call_command('rebuild_cover_images', stdout=StringIO())
+        self.assertEqual(self.cover(), images[1])
+        call_command('rebuild_cover_images', '--check', stdout=StringIO())
+
+
+class GymImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.gym = Gym.objects.create(name='gym', address='address')
+
+    def upload(self, size=(2400, 1600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+        with self.captureOnCommitCallbacks(execute=True):
+            image = GymImage.objects.create(gym=self.gym, image=SimpleUploadedFile('photo.jpg', buffer.getvalue()))
+        # نسخه‌ها در صف پس‌زمینه ساخته می‌شوند
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        return image
+
+    def test_upload_builds_resized_variants(self):
+        image = self.upload()
+        image.refresh_from_db()
+        self.assertTrue(image.derivatives_ready)
+        for ext in ('jpg', 'webp'):
+            with default_storage.open(derivative_name(image.image.name, 'card', 2, ext)) as f:
+                self.assertEqual(Image.open(f).size, (800, 440))
+            with default_storage.open(derivative_name(image.image.name, 'hero', 1, ext)) as f:
+                self.assertEqual(Image.open(f).size, (960, 640))
+        self.assertTrue(default_storage.exists(derivative_name(image.image.name, 'thumb', 1, 'webp')))
+
+    def test_srcset_lists_real_widths_of_small_uploads(self):
+        image = self.upload()
+        image.refresh_from_db()
+        self.assertEqual(image.image_width, 2400)
+        self.assertTrue(thumbnails.srcset(image, 'card').endswith(' 800w'))
+
+        image = self.upload((500, 300))
+        image.refresh_from_db()
+        url = partial(thumbnails.variant_url, image, 'card')
+        self.assertEqual(thumbnails.srcset(image, 'card'), f'{url()} 400w, {url(density=2)} 500w')
+        with default_storage.open(derivative_name(image.image.name, 'card', 2)) as f:
+            self.assertEqual(Image.open(f).width, 500)
+        # عکس کوچک‌تر از نسخه 1x: هر دو تراکم یک فایل‌اند و فقط یکی اعلام می‌شود
+        self.assertEqual(thumbnails.srcset(image, 'hero'), f'{thumbnails.variant_url(image, "hero")} 500w')
+
+    def test_templates_serve_variants_with_lazy_loading(self):
+        image = self.upload()
+        card = derivative_name(image.image.name, 'card', 1, 'webp')
+        response = self.client.get('/')
+        self.assertContains(response, f'/media/{card} 400w')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertNotContains(response, f'src="/media/{image.image.name}"')
+        response = self.client.get(f'/{self.gym.pk}/')
+        self.assertContains(response, derivative_name(image.image.name, 'hero', 2, 'webp'))
+        self.assertContains(response, derivative_name(image.image.name, 'thumb', 1, 'jpg'))
+
+    def test_upload_stores_inline_placeholder(self):
+        image = self.upload()
+        image.refresh_from_db()
+        self.assertTrue(image.placeholder.startswith('data:image/webp;base64,'))
+        self.assertLess(len(image.placeholder), 1000)
+        self.assertGreater(int(image.dominant_color[1:3], 16), 200)
+        self.assertEqual(image.dominant_color[3:], '0000')
+        self.assertContains(self.client.get('/'), f'url({image.placeholder})')
+        self.assertContains(self.client.get(f'/{self.gym.pk}/'), f'background: {image.dominant_color} url(')
+
+    def test_placeholder_backfill_command(self):
+        image = self.upload()
+        GymImage.objects.filter(pk=image.pk).update(placeholder='', dominant_color='')
+        call_command('build_image_placeholders', stdout=StringIO())
+        image.refresh_from_db()
+        self.assertTrue(image.placeholder.startswith('data:image/webp;base64,'))
+        self.assertTrue(image.dominant_color)
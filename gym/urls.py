@@ -6,6 +6,7 @@ app_name = 'gym'
 urlpatterns = [
     path('', views.gym_list, name='list'),
     path('<int:pk>/', views.gym_detail, name='detail'),
+    path('<int:pk>/comment/', views.gym_comment, name='comment'),
 ]
 
 
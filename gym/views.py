@@ -1,25 +1,37 @@
+from django.db.models import prefetch_related_objects
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 from django.contrib import messages
-from django.db.models import Avg, Count
-from .models import Gym, GymComment, GymRating, SportType, PriceRange, Facility
+from .models import Gym, GymComment, GymRating
 from .forms import GymCommentForm
-from restaurants.models import City, Advertisement
+from core.cardcache import render_cards
+from core.conditional import conditional_detail
+from core.lookups import get_lookup
+from core.pagecache import cached_list_page
+from core.pagination import DEFAULT_SORT, LIST_ORDERINGS, paginate_list
+from core.ratings import rating_summary
+from search.facets import bits_from_ids, facet_counts, facet_queryset
+from search.index import search_queryset
+from restaurants import ad_stats
+from restaurants.ads import get_sidebar_ads, refresh_sidebars
 
 
+# ستون‌ها و روابطی که در کارت لیست نمایش داده می‌شوند؛ عکس کاور با join از
+# cover_image (همراه پیش‌نمایش کوچکش) و امتیاز از ستون‌های تجمیعی خوانده می‌شود
+CARD_FIELDS = (
+    'id', 'name', 'address', 'avg_rating', 'rating_sum', 'rating_count', 'created_at', 'updated_at',
+    'cover_image__image', 'cover_image__derivatives_ready',
+    'cover_image__image_width', 'cover_image__placeholder', 'cover_image__dominant_color',
+)
+CARD_PREFETCH = ('phone_numbers',)
+
+
+@cached_list_page('gym', refresh=refresh_sidebars('gym'))
 def gym_list(request):
     """نمایش لیست تمام باشگاه‌ها با صفحه‌بندی و فیلتر"""
-    gyms_list = Gym.objects.prefetch_related(
-        'phone_numbers', 
-        'images', 
-        'ratings',
-        'city',
-        'sport_types',
-        'facilities'
-    ).annotate(
-        avg_rating=Avg('ratings__rating'),
-        total_ratings=Count('ratings')
-    )
+    # فقط ستون‌های کارت؛ روابط کارت‌ها فقط برای کارت‌هایی که در کش نیستند prefetch می‌شوند
+    gyms_list = Gym.objects.select_related('cover_image').only(*CARD_FIELDS)
     
     # فیلترها
     city_filter = request.GET.get('city')
@@ -28,18 +40,12 @@ def gym_list(request):
     price_range_filter = request.GET.get('price_range')
     facilities_filter = request.GET.getlist('facility')
     search_query = request.GET.get('search', '').strip()
+    sort = request.GET.get('sort', '')
+    match_mode = request.GET.get('match', '')
     
-    # جستجوی پیشرفته
+    # جستجوی پیشرفته با ایندکس معکوس (رتبه‌بندی با اولویت نام)
     if search_query:
-        from django.db.models import Q
-        gyms_list = gyms_list.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    if city_filter:
-        gyms_list = gyms_list.filter(city__name=city_filter)
+        gyms_list = search_queryset(gyms_list, 'gym', search_query)
     
     if rating_filter:
         try:
@@ -48,36 +54,44 @@ def gym_list(request):
         except ValueError:
             pass
     
-    if sport_types_filter:
-        gyms_list = gyms_list.filter(sport_types__name__in=sport_types_filter).distinct()
-    
-    if price_range_filter:
-        gyms_list = gyms_list.filter(price_range__name=price_range_filter)
-    
-    if facilities_filter:
-        gyms_list = gyms_list.filter(facilities__name__in=facilities_filter).distinct()
-    
-    # صفحه‌بندی: 9 باشگاه در هر صفحه
-    paginator = Paginator(gyms_list, 9)
-    page_number = request.GET.get('page', 1)
-    gyms = paginator.get_page(page_number)
-    
-    # دریافت تبلیغات فعال برای باشگاه
-    left_ads = Advertisement.objects.filter(section='gym', position='right', is_active=True).order_by('order')[:3]
-    right_ads = Advertisement.objects.filter(section='gym', position='left', is_active=True).order_by('order')[:3]
-    
-    # دریافت لیست‌ها برای فیلتر
-    cities = City.objects.all()
-    # ترتیب نوع ورزش: سایر موارد در آخر
-    sport_types_list = list(SportType.objects.all())
-    sport_types = sorted(sport_types_list, key=lambda x: (x.name == 'other', x.name))
-    price_ranges = PriceRange.objects.all()
-    # ترتیب امکانات: سایر موارد در آخر
-    facilities_list = list(Facility.objects.all())
-    facilities = sorted(facilities_list, key=lambda x: (x.name == 'other', x.name))
+    # فیلترهای بخش‌ها (facet)؛ شمارش هر گزینه روی نتایج جستجو و امتیاز محاسبه می‌شود
+    selected_facets = {
+        'city': [city_filter] if city_filter else [],
+        'price_range': [price_range_filter] if price_range_filter else [],
+        'sport_type': sport_types_filter,
+        'facility': facilities_filter,
+    }
+    base_bits = None
+    if search_query or rating_filter:
+        base_bits = bits_from_ids(gyms_list.order_by().values_list('pk', flat=True))
+    facet_counts_by_option = facet_counts('gym', selected_facets, match_all=match_mode == 'all', base_bits=base_bits)
+    
+    # فیلترها با ایندکس bitset (OR بین مقادیر هر فیلتر، یا AND با match=all)
+    gyms_list = facet_queryset(gyms_list, 'gym', selected_facets, match_all=match_mode == 'all')
+    
+    # مرتب‌سازی روی ستون‌های ایندکس‌شده؛ جستجو بدون مرتب‌سازی صریح ترتیب رتبه را نگه می‌دارد
+    ordering = None
+    if not search_query or sort in LIST_ORDERINGS:
+        ordering = LIST_ORDERINGS.get(sort, LIST_ORDERINGS[DEFAULT_SORT])
+        gyms_list = gyms_list.order_by(*ordering)
+    
+    # صفحه‌بندی: 9 باشگاه در هر صفحه (cursor روی کلید مرتب‌سازی، بدون COUNT در صفحات عمیق)
+    gyms = paginate_list(request, gyms_list, 9, ordering)
+    cards = render_cards('gym', gyms, 'gym/card.html', 'gym', prefetch=CARD_PREFETCH)
+    
+    # تبلیغات سایدبار از کش جایگاه‌ها (نگاشت RTL داخل سرویس)
+    left_ads, right_ads = get_sidebar_ads('gym')
+    ad_stats.record_impressions(left_ads + right_ads)
+    
+    # دریافت لیست‌ها برای فیلتر از کش جدول‌های مرجع (سایر موارد در آخر)
+    cities = get_lookup('cities')
+    sport_types = get_lookup('sport_types')
+    price_ranges = get_lookup('price_ranges')
+    facilities = get_lookup('facilities')
     
     context = {
         'gyms': gyms,
+        'cards': cards,
         'left_ads': left_ads,
         'right_ads': right_ads,
         'cities': cities,
@@ -86,6 +100,9 @@ def gym_list(request):
         'facilities': facilities,
         'current_city': city_filter,
         'current_rating': rating_filter,
+        'current_sort': sort,
+        'current_match': match_mode,
+        'facet_counts': facet_counts_by_option,
         'current_sport_types': sport_types_filter,
         'current_price_range': price_range_filter,
         'current_facilities': facilities_filter,
@@ -95,21 +112,41 @@ def gym_list(request):
     return render(request, 'gym/list.html', context)
 
 
+def _gym_detail_context(gym):
+    """داده‌های عمومی صفحه جزئیات (بدون فرم و پیام‌های کاربر)"""
+    # خلاصه امتیاز از ستون‌های تجمیعی و یک کوئری برای توزیع ستاره‌ها
+    summary = rating_summary(gym)
+    
+    # نمایش کامنت‌های تایید شده
+    comments = gym.comments.filter(is_approved=True)
+    
+    return {
+        'gym': gym,
+        'comments': comments,
+        'avg_rating': summary['average'],
+        'total_ratings': summary['count'],
+        'rating_histogram': summary['histogram'],
+    }
+
+
+@conditional_detail(Gym, 'gym/detail.html')
 def gym_detail(request, pk):
-    """نمایش جزئیات یک باشگاه"""
+    """نمایش جزئیات یک باشگاه؛ بدنه عمومی و قابل کش بدون توکن CSRF و پیام‌ها"""
+    # فرم‌های قدیمی که به آدرس جزئیات ارسال می‌شوند
+    if request.method == 'POST':
+        return gym_comment(request, pk)
+    
     gym = get_object_or_404(
-        Gym.objects.prefetch_related('phone_numbers', 'images', 'comments', 'ratings'),
+        Gym.objects.select_related('cover_image').prefetch_related('phone_numbers', 'images'),
         pk=pk
     )
-    
-    # محاسبه میانگین ریتینگ
-    ratings = gym.ratings.all()
-    avg_rating = 0
-    if ratings.exists():
-        avg_rating = sum(r.rating for r in ratings) / ratings.count()
-    
-    # نمایش کامنت‌های تایید شده
-    comments = gym.comments.filter(is_approved=True)
+    return render(request, 'gym/detail.html', _gym_detail_context(gym))
+
+
+@never_cache
+def gym_comment(request, pk):
+    """فرم ثبت نظر و پیام‌های کاربر؛ بخش شخصی صفحه جزئیات که جداگانه بارگذاری می‌شود"""
+    gym = get_object_or_404(Gym, pk=pk)
     
     # فرم کامنت
     if request.method == 'POST':
@@ -129,16 +166,15 @@ def gym_detail(request, pk):
             comment.save()
             
             messages.success(request, 'نظر و امتیاز شما با موفقیت ثبت شد!')
-            return redirect('gym:detail', pk=gym.pk)
+            return redirect(reverse('gym:detail', args=[gym.pk]) + '#comment-form')
     else:
         form = GymCommentForm()
     
-    context = {
-        'gym': gym,
-        'comments': comments,
-        'avg_rating': round(avg_rating, 1) if avg_rating > 0 else 0,
-        'total_ratings': ratings.count(),
-        'form': form,
-    }
+    if request.GET.get('partial'):
+        return render(request, 'gym/comment_form.html', {'gym': gym, 'form': form})
     
+    # بدون جاوااسکریپت یا با خطای فرم: کل صفحه همراه با فرم
+    prefetch_related_objects([gym], 'phone_numbers', 'images')
+    context = _gym_detail_context(gym)
+    context['form'] = form
     return render(request, 'gym/detail.html', context)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from . import queue
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'key', 'lane', 'status', 'attempts', 'run_after', 'created_at']
+    list_filter = ['status', 'lane', 'task']
+    search_fields = ['task', 'key', 'last_error']
+    readonly_fields = ['locked_by', 'locked_at', 'last_error', 'created_at']
+    actions = ['retry']
+    verbose_name = "کار پس‌زمینه"
+    verbose_name_plural = "کارهای پس‌زمینه"
+
+    @admin.action(description="اجرای دوباره کارهای ناموفق")
+    def retry(self, request, queryset):
+        queue.retry(queryset)
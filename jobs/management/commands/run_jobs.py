@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lane', action='append', dest='lanes', choices=queue.LANES,
+            help='Lanes to process in priority order (default: all lanes)',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, help='Exit after running this many jobs')
+
+    def handle(self, *args, **options):
+        lanes = options['lanes'] or queue.LANES
+        max_jobs = options['max_jobs']
+        if max_jobs is not None and max_jobs < 1:
+            raise CommandError('--max-jobs must be positive')
+
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            close_old_connections()
+            remaining = None if max_jobs is None else max_jobs - processed
+            ran = queue.run_pending(lanes, limit=remaining)
+            processed += ran
+            if not ran:
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} jobs processed'))
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=100, verbose_name="کار")),
+                (
+                    "kwargs",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="ورودی\u200cها"
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        blank=True,
+                        max_length=200,
+                        null=True,
+                        verbose_name="کلید یکتایی",
+                    ),
+                ),
+                (
+                    "lane",
+                    models.CharField(
+                        choices=[
+                            ("high", "فوری"),
+                            ("default", "عادی"),
+                            ("media", "پردازش فایل"),
+                            ("low", "کم\u200cاهمیت"),
+                        ],
+                        default="default",
+                        max_length=20,
+                        verbose_name="صف",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "در انتظار"),
+                            ("running", "در حال اجرا"),
+                            ("failed", "ناموفق"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="وضعیت",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="تعداد تلاش"
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        default=5, verbose_name="حداکثر تلاش"
+                    ),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="اجرا بعد از"
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(blank=True, max_length=100, verbose_name="worker"),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="زمان شروع اجرا"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="آخرین خطا")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد"),
+                ),
+            ],
+            options={
+                "verbose_name": "کار پس\u200cزمینه",
+                "verbose_name_plural": "کارهای پس\u200cزمینه",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "lane", "run_after", "id"],
+                        name="jobs_claim_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "pending")),
+                        fields=("key",),
+                        name="jobs_pending_key_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
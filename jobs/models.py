@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """یک کار پس‌زمینه در صف دیتابیسی؛ کارهای موفق بعد از اجرا حذف می‌شوند"""
+    # به ترتیب اولویت؛ worker هر بار از اولین صفی که کار آماده دارد برمی‌دارد
+    LANE_CHOICES = [
+        ('high', 'فوری'),
+        ('default', 'عادی'),
+        ('media', 'پردازش فایل'),
+        ('low', 'کم‌اهمیت'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'در انتظار'),
+        ('running', 'در حال اجرا'),
+        ('failed', 'ناموفق'),
+    ]
+
+    task = models.CharField(max_length=100, verbose_name="کار")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="ورودی‌ها")
+    key = models.CharField(max_length=200, blank=True, null=True, verbose_name="کلید یکتایی")
+    lane = models.CharField(max_length=20, choices=LANE_CHOICES, default='default', verbose_name="صف")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="وضعیت")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="تعداد تلاش")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="حداکثر تلاش")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="اجرا بعد از")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="worker")
+    locked_at = models.DateTimeField(blank=True, null=True, verbose_name="زمان شروع اجرا")
+    last_error = models.TextField(blank=True, verbose_name="آخرین خطا")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+
+    class Meta:
+        verbose_name = "کار پس‌زمینه"
+        verbose_name_plural = "کارهای پس‌زمینه"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'lane', 'run_after', 'id'], name='jobs_claim_idx'),
+        ]
+        constraints = [
+            # از هر کلید فقط یک کار در انتظار؛ کار در حال اجرا جلوی ثبت تغییر تازه را نمی‌گیرد
+            models.UniqueConstraint(
+                fields=['key'], condition=models.Q(status='pending'), name='jobs_pending_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
@@ -0,0 +1,153 @@
+"""
+صف کار پس‌زمینه روی دیتابیس، بدون broker بیرونی.
+
+کارها با register ثبت و با enqueue در همان تراکنش تغییر داده ذخیره می‌شوند؛
+پس اگر تراکنش برگردد کاری هم ثبت نمی‌شود و worker فقط تغییرهای commit‌شده را
+می‌بیند. کار با کلید یکسان تا وقتی در انتظار است دوباره ثبت نمی‌شود و خطاها با
+تاخیر نمایی دوباره امتحان می‌شوند.
+
+worker با دستور run_jobs اجرا می‌شود.
+"""
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+LANES = [lane for lane, _ in Job.LANE_CHOICES]
+
+# نام کار: (تابع، صف پیش‌فرض، حداکثر تلاش)
+TASKS = {}
+
+
+def retry_delay():
+    return getattr(settings, 'JOBS_RETRY_DELAY', 30)
+
+
+def lock_timeout():
+    return getattr(settings, 'JOBS_LOCK_TIMEOUT', 10 * 60)
+
+
+def register(name, lane='default', max_attempts=5):
+    """ثبت یک تابع به‌عنوان کار پس‌زمینه؛ ورودی‌ها باید قابل تبدیل به JSON باشند"""
+    def decorator(func):
+        TASKS[name] = (func, lane, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, key=None, lane=None, delay=0, **kwargs):
+    """ثبت کار؛ اگر کاری با همین کلید در انتظار باشد None برمی‌گرداند"""
+    _, default_lane, max_attempts = TASKS[name]
+    job = Job(
+        task=name, kwargs=kwargs, key=key, lane=lane or default_lane, max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    if Job.objects.filter(key=key, status='pending').exists():
+        return None
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale():
+    """کارهایی که worker آن‌ها از کار افتاده به صف برمی‌گردند"""
+    deadline = timezone.now() - timedelta(seconds=lock_timeout())
+    requeued = 0
+    for job in Job.objects.filter(status='running', locked_at__lt=deadline):
+        requeued += _reschedule(job, 'worker stopped before finishing the job', delay=0)
+    return requeued
+
+
+def claim(lanes=None, worker=None):
+    """برداشتن اولین کار آماده به ترتیب اولویت صف‌ها با یک UPDATE شرطی"""
+    now = timezone.now()
+    for lane in lanes or LANES:
+        while True:
+            pk = Job.objects.filter(status='pending', lane=lane, run_after__lte=now).values_list('pk', flat=True).first()
+            if pk is None:
+                break
+            claimed = Job.objects.filter(pk=pk, status='pending').update(
+                status='running', locked_by=worker or worker_name(), locked_at=now, attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+    return None
+
+
+def execute(job):
+    """اجرای کار در تراکنش خودش؛ موفق حذف و ناموفق دوباره زمان‌بندی می‌شود"""
+    entry = TASKS.get(job.task)
+    if entry is None:
+        Job.objects.filter(pk=job.pk).update(status='failed', last_error=f'Unknown task {job.task!r}')
+        return False
+    try:
+        with transaction.atomic():
+            entry[0](**job.kwargs)
+    except Exception:
+        _reschedule(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def _reschedule(job, error, delay=None):
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status='failed', last_error=error)
+        return 0
+    if delay is None:
+        delay = retry_delay() * 2 ** max(job.attempts - 1, 0)
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                status='pending', locked_by='', locked_at=None, last_error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        # کار تازه‌تری با همین کلید در انتظار است و همان کار را انجام می‌دهد
+        Job.objects.filter(pk=job.pk).delete()
+    return 1
+
+
+def retry(queryset):
+    """برگرداندن کارهای ناموفق به صف"""
+    retried = 0
+    for job in queryset.filter(status='failed'):
+        try:
+            with transaction.atomic():
+                retried += Job.objects.filter(pk=job.pk).update(
+                    status='pending', attempts=0, run_after=timezone.now(), last_error='',
+                )
+        except IntegrityError:
+            Job.objects.filter(pk=job.pk).delete()
+    return retried
+
+
+def run_pending(lanes=None, limit=None):
+    """اجرای کارهای آماده تا خالی شدن صف (یا رسیدن به limit)؛ تعداد کارهای اجراشده"""
+    requeue_stale()
+    worker = worker_name()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim(lanes, worker)
+        if job is None:
+            break
+        execute(job)
+        processed += 1
+    return processed
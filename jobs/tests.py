@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+CALLS = []
+
+
+@queue.register('tests.record', max_attempts=2)
+def record(value):
+    CALLS.append(value)
+
+
+@queue.register('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+        Job.objects.all().delete()
+
+    def test_pending_key_is_deduplicated(self):
+        self.assertIsNotNone(queue.enqueue('tests.record', key='a', value=1))
+        self.assertIsNone(queue.enqueue('tests.record', key='a', value=2))
+        self.assertIsNotNone(queue.enqueue('tests.record', key='b', value=3))
+        self.assertEqual(queue.run_pending(), 2)
+        self.assertEqual(CALLS, [1, 3])
+        self.assertFalse(Job.objects.exists())
+
+    def test_running_key_accepts_a_new_job(self):
+        queue.enqueue('tests.record', key='a', value=1)
+        job = queue.claim()
+        self.assertIsNotNone(queue.enqueue('tests.record', key='a', value=2))
+        queue.execute(job)
+        queue.run_pending()
+        self.assertEqual(CALLS, [1, 2])
+
+    def test_lanes_run_in_priority_order(self):
+        queue.enqueue('tests.record', lane='low', value='low')
+        queue.enqueue('tests.record', lane='media', value='media')
+        queue.enqueue('tests.record', lane='high', value='high')
+        queue.enqueue('tests.record', value='default')
+        queue.run_pending()
+        self.assertEqual(CALLS, ['high', 'default', 'media', 'low'])
+
+    def test_worker_only_runs_selected_lanes(self):
+        queue.enqueue('tests.record', lane='media', value='media')
+        queue.enqueue('tests.record', value='default')
+        call_command('run_jobs', '--burst', '--lane', 'media', stdout=StringIO())
+        self.assertEqual(CALLS, ['media'])
+
+    @override_settings(JOBS_RETRY_DELAY=60)
+    def test_failures_are_retried_with_backoff_then_kept(self):
+        job = queue.enqueue('tests.fail')
+        queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+        queue.retry(Job.objects.all())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 0))
+
+    def test_failed_task_rolls_back_its_writes(self):
+        @queue.register('tests.partial')
+        def partial():
+            queue.enqueue('tests.record', value='side effect')
+            raise ValueError('boom')
+
+        queue.enqueue('tests.partial')
+        queue.run_pending(limit=1)
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['tests.partial'])
+
+    def test_job_is_dropped_with_rolled_back_transaction(self):
+        try:
+            with transaction.atomic():
+                queue.enqueue('tests.record', value=1)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_stale_running_jobs_are_requeued(self):
+        queue.enqueue('tests.record', value=1)
+        job = queue.claim(worker='dead')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        queue.run_pending()
+        self.assertEqual(CALLS, [1])
@@ -0,0 +1,140 @@
+"""
+شمارنده‌های بافرشده نمایش و کلیک تبلیغات.
+
+هر worker افزایش‌ها را در حافظه جمع می‌کند و هر AD_STATS_FLUSH_SECONDS ثانیه یا
+پس از AD_STATS_FLUSH_EVENTS رویداد، آن‌ها را با چند UPDATE اتمیک (F + n) در
+جدول AdDailyStat می‌نویسد؛ چون هر worker فقط مقدار خودش را اضافه می‌کند،
+جمع نهایی با چند worker هم درست می‌ماند.
+
+خطای نوشتن (مثلا قفل بودن SQLite) درخواست لیست را خراب نمی‌کند؛ بافر برمی‌گردد
+و درخواست بعدی دوباره تلاش می‌کند.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import AdDailyStat, Advertisement
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+_pending = defaultdict(lambda: [0, 0])
+_events = 0
+_last_flush = time.monotonic()
+
+
+def flush_seconds():
+    return getattr(settings, 'AD_STATS_FLUSH_SECONDS', 10)
+
+
+def flush_events():
+    return getattr(settings, 'AD_STATS_FLUSH_EVENTS', 500)
+
+
+def _record(ad_ids, impressions, clicks):
+    global _events
+    today = timezone.localdate()
+    with _lock:
+        for ad_id in ad_ids:
+            counts = _pending[(ad_id, today)]
+            counts[0] += impressions
+            counts[1] += clicks
+        _events += len(ad_ids)
+        due = _events >= flush_events() or time.monotonic() - _last_flush >= flush_seconds()
+    if due:
+        try:
+            flush()
+        except DatabaseError:
+            # بافر در flush برگردانده شده و با درخواست بعدی دوباره نوشته می‌شود
+            logger.exception('Flushing ad stats failed; keeping %d buffered counters', len(_pending))
+
+
+def record_impressions(ads):
+    """ثبت یک نمایش برای هر تبلیغ رندرشده"""
+    ad_ids = [ad.pk for ad in ads]
+    if ad_ids:
+        _record(ad_ids, 1, 0)
+
+
+def record_click(ad_id):
+    _record([ad_id], 0, 1)
+
+
+def _take_pending():
+    global _events, _last_flush
+    with _lock:
+        batch, events = dict(_pending), _events
+        _pending.clear()
+        _events = 0
+        _last_flush = time.monotonic()
+    return batch, events
+
+
+def _restore(batch, events):
+    global _events
+    with _lock:
+        for key, (impressions, clicks) in batch.items():
+            counts = _pending[key]
+            counts[0] += impressions
+            counts[1] += clicks
+        _events += events
+
+
+def flush():
+    """نوشتن افزایش‌های بافرشده این worker در دیتابیس"""
+    batch, events = _take_pending()
+    if not batch:
+        return 0
+    try:
+        # تبلیغ‌هایی که در این فاصله حذف شده‌اند کنار گذاشته می‌شوند
+        existing = set(Advertisement.objects.filter(pk__in={ad_id for ad_id, _ in batch}).values_list('pk', flat=True))
+        batch = {key: counts for key, counts in batch.items() if key[0] in existing}
+        with transaction.atomic():
+            # ردیف‌های روز جاری که هنوز وجود ندارند (برخورد با workerهای دیگر نادیده گرفته می‌شود)
+            AdDailyStat.objects.bulk_create(
+                [AdDailyStat(advertisement_id=ad_id, date=date) for ad_id, date in batch],
+                ignore_conflicts=True,
+            )
+            for (ad_id, date), (impressions, clicks) in batch.items():
+                AdDailyStat.objects.filter(advertisement_id=ad_id, date=date).update(
+                    impressions=F('impressions') + impressions,
+                    clicks=F('clicks') + clicks,
+                )
+    except Exception:
+        _restore(batch, events)
+        raise
+    return len(batch)
+
+
+def daily_totals(ad_id, start=None, end=None):
+    """آمار روزانه یک تبلیغ: [{'date', 'impressions', 'clicks'}] به ترتیب تاریخ"""
+    stats = AdDailyStat.objects.filter(advertisement_id=ad_id)
+    if start:
+        stats = stats.filter(date__gte=start)
+    if end:
+        stats = stats.filter(date__lte=end)
+    return list(stats.order_by('date').values('date', 'impressions', 'clicks'))
+
+
+def totals(ad_id):
+    """جمع کل نمایش و کلیک یک تبلیغ"""
+    result = AdDailyStat.objects.filter(advertisement_id=ad_id).aggregate(
+        impressions=Sum('impressions'), clicks=Sum('clicks'),
+    )
+    return {key: value or 0 for key, value in result.items()}
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
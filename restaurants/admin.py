@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Restaurant, PhoneNumber, RestaurantImage, Comment, Rating, Advertisement, City, MealType, Category
+
+from core.covers import CoverImageAdminMixin
+from .models import Restaurant, PhoneNumber, RestaurantImage, Comment, Rating, Advertisement, AdDailyStat, City, MealType, Category
 
 
 class PhoneNumberInline(admin.TabularInline):
@@ -12,6 +14,7 @@ class PhoneNumberInline(admin.TabularInline):
 class RestaurantImageInline(admin.TabularInline):
     model = RestaurantImage
     extra = 1
+    fields = ['image', 'description', 'order']
     verbose_name = "عکس"
     verbose_name_plural = "عکس‌های رستوران"
 
@@ -39,12 +42,13 @@ class MealTypeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Restaurant)
-class RestaurantAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'created_at']
+class RestaurantAdmin(CoverImageAdminMixin, admin.ModelAdmin):
+    cover_entity_field = 'restaurant'
+    list_display = ['name', 'city', 'avg_rating', 'rating_count', 'created_at']
     list_filter = ['city', 'meal_types', 'created_at']
     search_fields = ['name', 'address', 'description']
     filter_horizontal = ['meal_types']
-    fields = ['name', 'city', 'address', 'description', 'meal_types']
+    fields = ['name', 'city', 'address', 'description', 'meal_types', 'cover_image', 'cover_pinned']
     inlines = [PhoneNumberInline, RestaurantImageInline]
     verbose_name = "رستوران"
     verbose_name_plural = "رستوران‌ها"
@@ -70,9 +74,19 @@ class RatingAdmin(admin.ModelAdmin):
 
 @admin.register(Advertisement)
 class AdvertisementAdmin(admin.ModelAdmin):
-    list_display = ['title', 'section', 'ad_type', 'position', 'order', 'is_active', 'created_at']
+    list_display = ['title', 'section', 'ad_type', 'position', 'order', 'weight', 'is_active', 'starts_at', 'ends_at', 'created_at']
     list_filter = ['section', 'ad_type', 'position', 'is_active', 'created_at']
     search_fields = ['title']
-    fields = ['title', 'section', 'ad_type', 'position', 'order', 'is_active', 'link', 'image', 'gif_file', 'video_file', 'video_url']
+    fields = ['title', 'section', 'ad_type', 'position', 'order', 'weight', 'is_active', 'starts_at', 'ends_at', 'link', 'image', 'gif_file', 'video_file', 'video_url']
     verbose_name = "تبلیغ"
     verbose_name_plural = "تبلیغات"
+
+
+@admin.register(AdDailyStat)
+class AdDailyStatAdmin(admin.ModelAdmin):
+    list_display = ['advertisement', 'date', 'impressions', 'clicks']
+    list_filter = ['date', 'advertisement__section']
+    search_fields = ['advertisement__title']
+    readonly_fields = ['advertisement', 'date', 'impressions', 'clicks']
+    verbose_name = "آمار روزانه تبلیغ"
+    verbose_name_plural = "آمار روزانه تبلیغات"
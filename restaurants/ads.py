@@ -0,0 +1,172 @@
+"""
+سرویس جایگاه‌های تبلیغ کنار لیست‌ها.
+
+تبلیغ‌های فعال و زمان‌بندی‌شده یک بار در هر پروسه خوانده می‌شوند و با ذخیره یا
+حذف هر تبلیغ از طریق نسخه مشترک باطل می‌شوند. از روی آن‌ها مجموعه فعال هر
+(بخش، سمت) برای بازه زمانی فعلی (تا نزدیک‌ترین شروع یا پایان بعدی) از قبل
+محاسبه می‌شود و در مرز بازه بدون کوئری جایگزین می‌شود؛ پس سرو تبلیغ یک
+lookup ساده است و تبلیغ‌های منقضی بدون ویرایش is_active کنار می‌روند.
+
+وقتی یک جایگاه بیش از ADS_PER_SLOT تبلیغ دارد، در هر درخواست زیرمجموعه‌ای
+متناسب با وزن‌ها با جدول alias (نمونه‌برداری O(1)) انتخاب می‌شود.
+"""
+import random
+import re
+
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.versioning import ProcessLocal
+
+from . import ad_stats
+from .models import Advertisement
+
+ADS_PER_SLOT = 3
+
+# نگاشت RTL: سمت چپ صفحه = موقعیت right در دیتابیس و برعکس
+SIDE_POSITIONS = {
+    'left': 'right',
+    'right': 'left',
+}
+
+
+class AliasTable:
+    """جدول alias (روش Vose) برای نمونه‌برداری وزن‌دار O(1) از n گزینه"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        self.size = n
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        scaled = [weight * n / total for weight in weights]
+        small = [i for i, value in enumerate(scaled) if value < 1]
+        large = [i for i, value in enumerate(scaled) if value >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng):
+        i = rng.randrange(self.size)
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class Slot:
+    """تبلیغ‌های در حال نمایش یک جایگاه و جدول alias وزن‌هایشان"""
+
+    def __init__(self, ads):
+        self.ads = tuple(ads)
+        self.table = AliasTable([ad.weight for ad in self.ads]) if len(self.ads) > ADS_PER_SLOT else None
+
+    def pick(self, count, rng):
+        """انتخاب count تبلیغ متمایز با احتمال متناسب با وزن، به ترتیب نمایش جایگاه"""
+        if self.table is None or count >= len(self.ads):
+            return self.ads[:count]
+        chosen = set()
+        # رد نمونه‌های تکراری؛ برای وزن‌های بسیار نامتوازن تعداد تلاش محدود است
+        for _ in range(count * 8):
+            chosen.add(self.table.sample(rng))
+            if len(chosen) == count:
+                break
+        for i in range(len(self.ads)):
+            if len(chosen) == count:
+                break
+            chosen.add(i)
+        return tuple(self.ads[i] for i in sorted(chosen))
+
+
+class AdSchedule:
+    """تبلیغ‌های زمان‌بندی‌شده و مجموعه فعال محاسبه‌شده برای بازه زمانی فعلی"""
+
+    def __init__(self, ads, now):
+        self.ads = ads
+        self.boundaries = sorted({
+            moment
+            for ad in ads
+            for moment in (ad.starts_at, ad.ends_at)
+            if moment and moment > now
+        })
+        self.window = self._compute(now)
+
+    def _compute(self, now):
+        positions = {position: side for side, position in SIDE_POSITIONS.items()}
+        slots = {}
+        for ad in self.ads:
+            # وزن صفر یعنی تبلیغ موقتاً در چرخش نیست
+            if ad.weight and ad.is_running(now):
+                slots.setdefault((ad.section, positions.get(ad.position)), []).append(ad)
+        valid_until = next((moment for moment in self.boundaries if moment > now), None)
+        return valid_until, {key: Slot(ads) for key, ads in slots.items()}
+
+    def slots(self, now):
+        valid_until, slots = self.window
+        if valid_until is not None and now >= valid_until:
+            # جایگزینی اتمیک کل بازه؛ درخواست‌های هم‌زمان یا نسخه قبلی را می‌بینند یا جدید را
+            self.window = self._compute(now)
+            slots = self.window[1]
+        return slots
+
+
+def _build_schedule():
+    now = timezone.now()
+    ads = list(
+        Advertisement.objects.filter(is_active=True)
+        .filter(Q(ends_at__isnull=True) | Q(ends_at__gt=now))
+        .order_by('order', '-weight', '-created_at')
+    )
+    return AdSchedule(ads, now)
+
+
+_schedule = ProcessLocal('ads:slots', _build_schedule)
+
+
+_EMPTY_SLOT = Slot(())
+
+
+def get_slot_ads(section, side, now=None):
+    """همه تبلیغ‌های در حال نمایش یک جایگاه، به ترتیب نمایش"""
+    return _schedule.get().slots(now or timezone.now()).get((section, side), _EMPTY_SLOT).ads
+
+
+def get_sidebar_ads(section, rng=None):
+    """
+    تبلیغ‌های سایدبار چپ و راست یک بخش: (left_ads, right_ads)
+
+    rng یک random.Random است؛ با seed ثابت انتخاب‌ها قابل تکرار (و قابل تست) هستند.
+    """
+    rng = rng or random
+    slots = _schedule.get().slots(timezone.now())
+    return (
+        slots.get((section, 'left'), _EMPTY_SLOT).pick(ADS_PER_SLOT, rng),
+        slots.get((section, 'right'), _EMPTY_SLOT).pick(ADS_PER_SLOT, rng),
+    )
+
+
+def invalidate():
+    _schedule.invalidate()
+
+
+SIDEBAR_TEMPLATE = 'restaurants/ad_sidebar.html'
+_SIDEBAR_RE = re.compile(r'<!--ad-slot:(left|right)-->.*?<!--/ad-slot:\1-->\n?', re.S)
+
+
+def refresh_sidebars(section):
+    """
+    تابع refresh کش صفحه: سایدبارهای HTML کش‌شده را با انتخاب تازه چرخش
+    جایگزین می‌کند و نمایش‌ها را ثبت می‌کند.
+    """
+    def refresh(request, content):
+        left_ads, right_ads = get_sidebar_ads(section)
+        ad_stats.record_impressions(left_ads + right_ads)
+        sidebars = {
+            side: render_to_string(SIDEBAR_TEMPLATE, {'ads': ads, 'side': side}, request)
+            for side, ads in (('left', left_ads), ('right', right_ads))
+        }
+        return _SIDEBAR_RE.sub(lambda match: sidebars[match.group(1)], content)
+    return refresh
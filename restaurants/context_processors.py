@@ -1,12 +1,8 @@
-from .models import Category
+from core.lookups import get_lookup
 
 
 def categories(request):
-    """افزودن دسته‌بندی‌ها به context همه صفحات"""
+    """افزودن دسته‌بندی‌ها به context همه صفحات (از کش جدول‌های مرجع)"""
     return {
-        'categories': Category.objects.filter(is_active=True).order_by('order')
+        'categories': get_lookup('categories')
     }
-
-
-
-
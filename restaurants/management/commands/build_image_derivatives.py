@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.thumbnails import DERIVATIVE_SOURCES, build_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnail and WebP derivatives for uploaded images that do not have them (or their source width) yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives for every image')
+
+    def handle(self, *args, **options):
+        for model, field_name, variants in DERIVATIVE_SOURCES:
+            rows = model.objects.order_by().exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if not options['force']:
+                rows = rows.filter(Q(derivatives_ready=False) | Q(image_width__isnull=True))
+
+            built = failed = 0
+            for pk in rows.values_list('pk', flat=True).iterator(chunk_size=2000):
+                if build_derivatives(model, field_name, variants, pk):
+                    built += 1
+                else:
+                    failed += 1
+
+            label = model._meta.label
+            style = self.style.WARNING if failed else self.style.SUCCESS
+            self.stdout.write(style(f'{label}: {built} images built, {failed} unreadable'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.thumbnails import DERIVATIVE_SOURCES, build_placeholder, has_placeholder
+
+
+class Command(BaseCommand):
+    help = 'Compute the inline low-quality preview and dominant colour for uploaded images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompute placeholders for every image')
+
+    def handle(self, *args, **options):
+        for model, field_name, variants in DERIVATIVE_SOURCES:
+            if not has_placeholder(model):
+                continue
+            rows = model.objects.order_by().exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if not options['force']:
+                rows = rows.filter(placeholder='')
+
+            built = failed = 0
+            for pk in rows.values_list('pk', flat=True).iterator(chunk_size=2000):
+                if build_placeholder(model, field_name, pk):
+                    built += 1
+                else:
+                    failed += 1
+
+            label = model._meta.label
+            style = self.style.WARNING if failed else self.style.SUCCESS
+            self.stdout.write(style(f'{label}: {built} placeholders built, {failed} unreadable'))
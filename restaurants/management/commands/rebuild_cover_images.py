@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.covers import COVER_SOURCES, cover_subquery, stale_covers
+
+
+class Command(BaseCommand):
+    help = 'Populate denormalized cover images (cover_image) from each entity\'s first image and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not write anything')
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        total_drift = 0
+
+        for image_model, entity_field in COVER_SOURCES:
+            entity_model = image_model._meta.get_field(entity_field).related_model
+            # کاورهای سنجاق‌شده معتبر بازسازی نمی‌شوند
+            rows = entity_model.objects.order_by().filter(stale_covers(image_model, entity_field)).annotate(
+                expected=cover_subquery(image_model, entity_field),
+            ).values_list('pk', 'cover_image_id', 'cover_pinned', 'expected')
+            drifted = [pk for pk, cover, pinned, expected in rows.iterator(chunk_size=2000) if (cover, pinned) != (expected, False)]
+
+            label = entity_model._meta.label
+            total_drift += len(drifted)
+            if check_only:
+                style = self.style.WARNING if drifted else self.style.SUCCESS
+                self.stdout.write(style(f'{label}: {len(drifted)} drifted rows'))
+                continue
+
+            with transaction.atomic():
+                entity_model.objects.filter(pk__in=drifted).update(
+                    cover_image=cover_subquery(image_model, entity_field), cover_pinned=False,
+                )
+            self.stdout.write(self.style.SUCCESS(f'{label}: {len(drifted)} rows rebuilt'))
+
+        if check_only and total_drift:
+            raise CommandError(f'Cover images drifted on {total_drift} rows')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from core.ratings import RATING_SOURCES
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized rating aggregates (rating_sum, rating_count, avg_rating) and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not write anything')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        batch_size = options['batch_size']
+        total_drift = 0
+
+        for rating_model, entity_field in RATING_SOURCES:
+            entity_model = rating_model._meta.get_field(entity_field).related_model
+            totals = {
+                row[entity_field]: (row['total'], row['count'])
+                for row in rating_model.objects.order_by().values(entity_field).annotate(
+                    total=Sum('rating'), count=Count('id')
+                )
+            }
+
+            drifted = []
+            entities = entity_model.objects.order_by().only('pk', 'rating_sum', 'rating_count', 'avg_rating')
+            for entity in entities.iterator(chunk_size=2000):
+                rating_sum, rating_count = totals.get(entity.pk, (0, 0))
+                avg_rating = rating_sum / rating_count if rating_count else 0
+                if (entity.rating_sum, entity.rating_count) != (rating_sum, rating_count) or abs(entity.avg_rating - avg_rating) > 1e-9:
+                    entity.rating_sum = rating_sum
+                    entity.rating_count = rating_count
+                    entity.avg_rating = avg_rating
+                    drifted.append(entity)
+
+            label = entity_model._meta.label
+            total_drift += len(drifted)
+            if check_only:
+                style = self.style.WARNING if drifted else self.style.SUCCESS
+                self.stdout.write(style(f'{label}: {len(drifted)} drifted rows'))
+                continue
+
+            with transaction.atomic():
+                entity_model.objects.bulk_update(
+                    drifted, ['rating_sum', 'rating_count', 'avg_rating'], batch_size=batch_size
+                )
+            self.stdout.write(self.style.SUCCESS(f'{label}: {len(drifted)} rows rebuilt'))
+
+        if check_only and total_drift:
+            raise CommandError(f'Rating aggregates drifted on {total_drift} rows')
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:09
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Restaurant = apps.get_model("restaurants", "Restaurant")
+    Rating = apps.get_model("restaurants", "Rating")
+    totals = (
+        Rating.objects.order_by()
+        .values("restaurant")
+        .annotate(total=Sum("rating"), count=Count("id"))
+    )
+    for row in totals:
+        Restaurant.objects.filter(pk=row["restaurant"]).update(
+            rating_sum=row["total"],
+            rating_count=row["count"],
+            avg_rating=row["total"] / row["count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0008_alter_advertisement_section"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="restaurant",
+            name="avg_rating",
+            field=models.FloatField(
+                db_index=True, default=0, verbose_name="میانگین امتیاز"
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="rating_count",
+            field=models.IntegerField(
+                db_index=True, default=0, verbose_name="تعداد امتیازها"
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="rating_sum",
+            field=models.IntegerField(default=0, verbose_name="مجموع امتیازها"),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
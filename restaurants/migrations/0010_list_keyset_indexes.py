@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0009_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="restaurant",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="restaurant_newest_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="restaurant",
+            index=models.Index(
+                fields=["-avg_rating", "-rating_count", "-id"],
+                name="restaurant_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="restaurant",
+            index=models.Index(
+                fields=["-rating_count", "-avg_rating", "-id"],
+                name="restaurant_popular_idx",
+            ),
+        ),
+    ]
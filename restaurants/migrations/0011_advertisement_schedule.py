@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0010_list_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="advertisement",
+            name="ends_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="پایان نمایش"
+            ),
+        ),
+        migrations.AddField(
+            model_name="advertisement",
+            name="starts_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="شروع نمایش"
+            ),
+        ),
+        migrations.AddField(
+            model_name="advertisement",
+            name="weight",
+            field=models.PositiveIntegerField(default=1, verbose_name="وزن در جایگاه"),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0011_advertisement_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="تاریخ")),
+                (
+                    "impressions",
+                    models.PositiveIntegerField(default=0, verbose_name="نمایش"),
+                ),
+                ("clicks", models.PositiveIntegerField(default=0, verbose_name="کلیک")),
+                (
+                    "advertisement",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="restaurants.advertisement",
+                        verbose_name="تبلیغ",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "آمار روزانه تبلیغ",
+                "verbose_name_plural": "آمار روزانه تبلیغات",
+                "ordering": ["-date"],
+                "unique_together": {("advertisement", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0012_ad_daily_stats"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="restaurantimage",
+            options={
+                "ordering": ["order", "-created_at", "-id"],
+                "verbose_name": "عکس رستوران",
+                "verbose_name_plural": "عکس\u200cهای رستوران",
+            },
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="cover_image",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="restaurants.restaurantimage",
+                verbose_name="عکس کاور",
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="cover_pinned",
+            field=models.BooleanField(default=False, verbose_name="کاور ثابت"),
+        ),
+        migrations.AddField(
+            model_name="restaurantimage",
+            name="order",
+            field=models.PositiveIntegerField(default=0, verbose_name="ترتیب"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurants", "0013_cover_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="advertisement",
+            name="derivatives_ready",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name="نسخه\u200cهای کوچک ساخته شده",
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurantimage",
+            name="derivatives_ready",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name="نسخه\u200cهای کوچک ساخته شده",
+            ),
+        ),
+    ]
@@ -97,13 +97,31 @@ class Restaurant(models.Model):
     address = models.TextField(verbose_name="آدرس")
     description = models.TextField(blank=True, null=True, verbose_name="توضیحات")
     meal_types = models.ManyToManyField(MealType, blank=True, related_name='restaurants', verbose_name="انواع وعده")
+    rating_sum = models.IntegerField(default=0, verbose_name="مجموع امتیازها")
+    rating_count = models.IntegerField(default=0, db_index=True, verbose_name="تعداد امتیازها")
+    avg_rating = models.FloatField(default=0, db_index=True, verbose_name="میانگین امتیاز")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ بروزرسانی")
+    cover_image = models.ForeignKey(
+        'RestaurantImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="عکس کاور"
+    )
+    cover_pinned = models.BooleanField(default=False, verbose_name="کاور ثابت")
 
     class Meta:
         verbose_name = "رستوران"
         verbose_name_plural = "رستوران‌ها"
         ordering = ['-created_at']
+        # ایندکس‌های ترکیبی برای صفحه‌بندی cursor روی هر ترتیب لیست
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='restaurant_newest_idx'),
+            models.Index(fields=['-avg_rating', '-rating_count', '-id'], name='restaurant_rating_idx'),
+            models.Index(fields=['-rating_count', '-avg_rating', '-id'], name='restaurant_popular_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -140,12 +158,17 @@ class RestaurantImage(models.Model):
         null=True,
         verbose_name="توضیحات"
     )
+    order = models.PositiveIntegerField(default=0, verbose_name="ترتیب")
+    derivatives_ready = models.BooleanField(default=False, editable=False, verbose_name="نسخه‌های کوچک ساخته شده")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="عرض عکس اصلی")
+    placeholder = models.TextField(blank=True, editable=False, verbose_name="پیش‌نمایش کوچک")
+    dominant_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="رنگ غالب")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
 
     class Meta:
         verbose_name = "عکس رستوران"
         verbose_name_plural = "عکس‌های رستوران"
-        ordering = ['-created_at']
+        ordering = ['order', '-created_at', '-id']
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.description or 'عکس'}"
@@ -237,6 +260,11 @@ class Advertisement(models.Model):
     position = models.CharField(max_length=10, choices=POSITION_CHOICES, verbose_name="موقعیت")
     order = models.IntegerField(default=0, verbose_name="ترتیب نمایش")
     is_active = models.BooleanField(default=True, verbose_name="فعال")
+    starts_at = models.DateTimeField(blank=True, null=True, verbose_name="شروع نمایش")
+    ends_at = models.DateTimeField(blank=True, null=True, verbose_name="پایان نمایش")
+    weight = models.PositiveIntegerField(default=1, verbose_name="وزن در جایگاه")
+    derivatives_ready = models.BooleanField(default=False, editable=False, verbose_name="نسخه‌های کوچک ساخته شده")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="عرض عکس اصلی")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
 
     class Meta:
@@ -246,3 +274,28 @@ class Advertisement(models.Model):
 
     def __str__(self):
         return f"{self.title} - {self.get_section_display()} - {self.get_position_display()}"
+
+    def is_running(self, at):
+        """آیا تبلیغ در لحظه at در بازه زمان‌بندی خود قرار دارد"""
+        if not self.is_active:
+            return False
+        if self.starts_at and at < self.starts_at:
+            return False
+        return not (self.ends_at and at >= self.ends_at)
+
+
+class AdDailyStat(models.Model):
+    """تعداد نمایش و کلیک روزانه هر تبلیغ (تجمیع‌شده از بافر workerها)"""
+    advertisement = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="تبلیغ")
+    date = models.DateField(verbose_name="تاریخ")
+    impressions = models.PositiveIntegerField(default=0, verbose_name="نمایش")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="کلیک")
+
+    class Meta:
+        verbose_name = "آمار روزانه تبلیغ"
+        verbose_name_plural = "آمار روزانه تبلیغات"
+        ordering = ['-date']
+        unique_together = ['advertisement', 'date']
+
+    def __str__(self):
+        return f"{self.advertisement.title} - {self.date}"
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core.cardcache import track_card_children, track_card_relations
+from core.conditional import track_detail_children
+from core.covers import track_covers
+from core.lookups import track_lookups
+from core.pagecache import track_pages
+from core.ratings import track_ratings
+from core.thumbnails import track_derivatives
+from . import ads
+from .models import Advertisement, Category, City, Comment, MealType, PhoneNumber, Rating, Restaurant, RestaurantImage
+
+
+track_ratings(Rating, 'restaurant')
+
+for _model in (Category, City, MealType):
+    track_lookups(_model)
+
+# هر تغییری که روی محتوای لیست رستوران‌ها اثر دارد نسخه کش صفحه را بالا می‌برد
+for _model in (Restaurant, Rating, RestaurantImage, PhoneNumber, MealType):
+    track_pages(_model, 'restaurant')
+# شهرها و دسته‌بندی‌ها در هر سه لیست دیده می‌شوند
+for _model in (City, Category):
+    track_pages(_model, 'gym', 'restaurant', 'trainer')
+
+# کارت‌های لیست: تغییر عکس، تلفن و رابطه‌ها کارت رستوران را باطل می‌کند
+track_card_children(RestaurantImage, 'restaurant')
+track_card_children(PhoneNumber, 'restaurant')
+track_card_relations(Restaurant, 'restaurant')
+
+# عکس کاور با هر افزودن، جابه‌جایی یا حذف عکس دوباره محاسبه می‌شود
+track_covers(RestaurantImage, 'restaurant')
+
+# نسخه‌های کوچک و WebP هر عکس بعد از آپلود ساخته می‌شوند
+track_derivatives(RestaurantImage, 'image', ('thumb', 'card', 'hero'))
+track_derivatives(Advertisement, 'image', ('ad',))
+
+# نظرها فقط در صفحه جزئیات دیده می‌شوند؛ اعتبارسنج GET شرطی از updated_at والد ساخته می‌شود
+track_detail_children(Comment, 'restaurant')
+
+
+def _invalidate_ads(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(ads.invalidate)
+
+
+post_save.connect(_invalidate_ads, sender=Advertisement, dispatch_uid='ad_slots')
+post_delete.connect(_invalidate_ads, sender=Advertisement, dispatch_uid='ad_slots')
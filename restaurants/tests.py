@@ -1,3 +1,143 @@
-from django.test import TestCase
+import random
+from collections import Counter
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.versioning import ProcessLocal
+
+from . import ad_stats, ads
+from .ads import AdSchedule, AliasTable, get_sidebar_ads, get_slot_ads
+from .models import AdDailyStat, Advertisement
+
+
+class AdRotationTests(TestCase):
+    def setUp(self):
+        for i, weight in enumerate([1, 1, 1, 1, 6]):
+            Advertisement.objects.create(title=f'ad{i}', section='gym', position='right', order=i, weight=weight)
+        # باطل‌سازی on_commit داخل TestCase اجرا نمی‌شود
+        ads.invalidate()
+
+    def test_alias_table_is_weight_proportional(self):
+        table = AliasTable([1, 3, 6])
+        rng = random.Random(7)
+        counts = Counter(table.sample(rng) for _ in range(30000))
+        for i, share in enumerate([0.1, 0.3, 0.6]):
+            self.assertAlmostEqual(counts[i] / 30000, share, delta=0.02)
+
+    def test_rotation_is_deterministic_under_seed(self):
+        first = [get_sidebar_ads('gym', random.Random(42))[0] for _ in range(20)]
+        second = [get_sidebar_ads('gym', random.Random(42))[0] for _ in range(20)]
+        self.assertEqual(first, second)
+
+    def test_rotation_serves_every_ad_with_heavy_ad_most_often(self):
+        rng = random.Random(1)
+        shown = Counter(ad.title for _ in range(2000) for ad in get_sidebar_ads('gym', rng)[0])
+        self.assertEqual(set(shown), {f'ad{i}' for i in range(5)})
+        self.assertEqual(shown.most_common(1)[0][0], 'ad4')
+        self.assertTrue(all(len(get_sidebar_ads('gym', rng)[0]) == 3 for _ in range(50)))
+
+
+class AdScheduleTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.switch = self.now + timedelta(hours=1)
+        self.end = self.now + timedelta(hours=2)
+        # تبلیغ اول دقیقاً در لحظه شروع تبلیغ دوم تمام می‌شود
+        Advertisement.objects.create(title='current', section='gym', position='right', ends_at=self.switch)
+        Advertisement.objects.create(
+            title='later', section='gym', position='right', starts_at=self.switch, ends_at=self.end,
+        )
+        ads.invalidate()
+
+    def titles(self, slots):
+        return [ad.title for ad in slots.get(('gym', 'left'), ads._EMPTY_SLOT).ads]
+
+    def test_starts_at_is_inclusive_and_ends_at_is_exclusive(self):
+        schedule = AdSchedule(list(Advertisement.objects.all()), self.now)
+        tick = timedelta(microseconds=1)
+        self.assertEqual(self.titles(schedule.slots(self.switch - tick)), ['current'])
+        self.assertEqual(self.titles(schedule.slots(self.switch)), ['later'])
+        self.assertEqual(self.titles(schedule.slots(self.end - tick)), ['later'])
+        self.assertEqual(self.titles(schedule.slots(self.end)), [])
+
+    def test_window_moves_past_a_boundary_without_a_save(self):
+        self.assertEqual([ad.title for ad in get_slot_ads('gym', 'left', self.now)], ['current'])
+        # بازه بعدی از تبلیغ‌های همان پروسه محاسبه می‌شود، بدون کوئری
+        with self.assertNumQueries(0):
+            self.assertEqual([ad.title for ad in get_slot_ads('gym', 'left', self.switch)], ['later'])
+            self.assertEqual(get_slot_ads('gym', 'left', self.end), ())
+
+
+class AdSlotCacheTests(TestCase):
+    def titles(self, schedule):
+        return [ad.title for ad in schedule.slots(timezone.now()).get(('gym', 'left'), ads._EMPTY_SLOT).ads]
+
+    def test_other_worker_rebuilds_after_save(self):
+        # جایگاه‌های تبلیغ در یک worker دیگر با همان نسخه مشترک
+        other_worker = ProcessLocal('ads:slots', ads._build_schedule)
+        self.assertEqual(self.titles(other_worker.get()), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            ad = Advertisement.objects.create(title='new', section='gym', position='right')
+        self.assertEqual(self.titles(other_worker.get()), ['new'])
+        self.assertEqual([ad.title for ad in get_slot_ads('gym', 'left')], ['new'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad.weight = 0
+            ad.save()
+        self.assertEqual(self.titles(other_worker.get()), [])
+
+
+@override_settings(AD_STATS_FLUSH_EVENTS=5, AD_STATS_FLUSH_SECONDS=3600)
+class AdStatsTests(TestCase):
+    def setUp(self):
+        # بافر سراسری worker از تست‌های دیگر خالی می‌شود
+        ad_stats._take_pending()
+        self.addCleanup(ad_stats._take_pending)
+        self.ad = Advertisement.objects.create(title='ad', section='gym', position='right')
+        self.other = Advertisement.objects.create(title='other', section='gym', position='left')
+
+    def test_increments_are_batched_until_the_threshold(self):
+        ad_stats.record_impressions([self.ad, self.other])
+        ad_stats.record_click(self.ad.pk)
+        self.assertFalse(AdDailyStat.objects.exists())
+        # بررسی وجود تبلیغ‌ها، savepoint، یک INSERT و یک UPDATE برای هر تبلیغ
+        with self.assertNumQueries(6):
+            ad_stats.record_impressions([self.ad, self.other])
+        self.assertEqual(ad_stats.totals(self.ad.pk), {'impressions': 2, 'clicks': 1})
+        self.assertEqual(ad_stats.totals(self.other.pk), {'impressions': 2, 'clicks': 0})
+
+    def test_totals_add_up_across_flushes(self):
+        for _ in range(3):
+            for _ in range(4):
+                ad_stats.record_impressions([self.ad])
+            ad_stats.record_click(self.ad.pk)
+        ad_stats.record_impressions([self.ad])
+        ad_stats.flush()
+        self.assertEqual(AdDailyStat.objects.count(), 1)
+        self.assertEqual(ad_stats.totals(self.ad.pk), {'impressions': 13, 'clicks': 3})
+
+    def test_daily_totals(self):
+        for day, impressions in ((3, 30), (1, 10), (2, 20)):
+            AdDailyStat.objects.create(advertisement=self.ad, date=date(2025, 1, day), impressions=impressions)
+        self.assertEqual(
+            [row['impressions'] for row in ad_stats.daily_totals(self.ad.pk)], [10, 20, 30],
+        )
+        rows = ad_stats.daily_totals(self.ad.pk, start=date(2025, 1, 2), end=date(2025, 1, 2))
+        self.assertEqual(rows, [{'date': date(2025, 1, 2), 'impressions': 20, 'clicks': 0}])
+        self.assertEqual(ad_stats.totals(self.ad.pk), {'impressions': 60, 'clicks': 0})
+
+    @override_settings(AD_STATS_FLUSH_EVENTS=1)
+    def test_failed_flush_keeps_the_buffer_and_the_page(self):
+        ads.invalidate()
+        locked = OperationalError('database is locked')
+        with mock.patch.object(AdDailyStat.objects, 'bulk_create', side_effect=locked):
+            with self.assertLogs('restaurants.ad_stats', 'ERROR'):
+                self.assertEqual(self.client.get('/').status_code, 200)
+        self.assertFalse(AdDailyStat.objects.exists())
+        ad_stats.record_click(self.ad.pk)
+        self.assertEqual(ad_stats.totals(self.ad.pk), {'impressions': 1, 'clicks': 1})
+        self.assertEqual(ad_stats.totals(self.other.pk), {'impressions': 1, 'clicks': 0})
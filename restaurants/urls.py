@@ -6,6 +6,8 @@ app_name = 'restaurants'
 urlpatterns = [
     path('', views.restaurant_list, name='list'),
     path('<int:pk>/', views.restaurant_detail, name='detail'),
+    path('<int:pk>/comment/', views.restaurant_comment, name='comment'),
+    path('ads/<int:pk>/click/', views.ad_click, name='ad_click'),
 ]
 
 
@@ -1,41 +1,49 @@
+from django.db.models import prefetch_related_objects
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 from django.contrib import messages
-from django.db.models import Avg, Count, Q
-from .models import Restaurant, Comment, Rating, Advertisement, City, Category
+from . import ad_stats
+from .ads import get_sidebar_ads, refresh_sidebars
+from .models import Restaurant, Comment, Rating, Advertisement
 from .forms import CommentForm
+from core.cardcache import render_cards
+from core.conditional import conditional_detail
+from core.lookups import get_lookup
+from core.pagecache import cached_list_page
+from core.pagination import DEFAULT_SORT, LIST_ORDERINGS, paginate_list
+from core.ratings import rating_summary
+from search.facets import bits_from_ids, facet_counts, facet_queryset
+from search.index import search_queryset
 
 
+# ستون‌ها و روابطی که در کارت لیست نمایش داده می‌شوند؛ عکس کاور با join از
+# cover_image (همراه پیش‌نمایش کوچکش) و امتیاز از ستون‌های تجمیعی خوانده می‌شود
+CARD_FIELDS = (
+    'id', 'name', 'address', 'avg_rating', 'rating_sum', 'rating_count', 'created_at', 'updated_at',
+    'cover_image__image', 'cover_image__derivatives_ready',
+    'cover_image__image_width', 'cover_image__placeholder', 'cover_image__dominant_color',
+)
+CARD_PREFETCH = ('phone_numbers',)
+
+
+@cached_list_page('restaurant', refresh=refresh_sidebars('restaurant'))
 def restaurant_list(request):
     """نمایش لیست تمام رستوران‌ها با صفحه‌بندی و فیلتر"""
-    restaurants_list = Restaurant.objects.prefetch_related(
-        'phone_numbers', 
-        'images', 
-        'ratings',
-        'city',
-        'meal_types'
-    ).annotate(
-        avg_rating=Avg('ratings__rating'),
-        total_ratings=Count('ratings')
-    )
+    # فقط ستون‌های کارت؛ روابط کارت‌ها فقط برای کارت‌هایی که در کش نیستند prefetch می‌شوند
+    restaurants_list = Restaurant.objects.select_related('cover_image').only(*CARD_FIELDS)
     
     # فیلترها
     city_filter = request.GET.get('city')
     rating_filter = request.GET.get('rating')
     meal_type_filters = request.GET.getlist('meal_type')  # چند انتخابی
     search_query = request.GET.get('search', '').strip()
+    sort = request.GET.get('sort', '')
+    match_mode = request.GET.get('match', '')
     
-    # جستجوی پیشرفته
+    # جستجوی پیشرفته با ایندکس معکوس (رتبه‌بندی با اولویت نام)
     if search_query:
-        from django.db.models import Q
-        restaurants_list = restaurants_list.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    if city_filter:
-        restaurants_list = restaurants_list.filter(city__name=city_filter)
+        restaurants_list = search_queryset(restaurants_list, 'restaurant', search_query)
     
     if rating_filter:
         try:
@@ -44,34 +52,49 @@ def restaurant_list(request):
         except ValueError:
             pass
     
-    if meal_type_filters:
-        # فیلتر بر اساس چند نوع وعده
-        restaurants_list = restaurants_list.filter(meal_types__name__in=meal_type_filters).distinct()
+    # فیلترهای بخش‌ها (facet)؛ شمارش هر گزینه روی نتایج جستجو و امتیاز محاسبه می‌شود
+    selected_facets = {
+        'city': [city_filter] if city_filter else [],
+        'meal_type': meal_type_filters,
+    }
+    base_bits = None
+    if search_query or rating_filter:
+        base_bits = bits_from_ids(restaurants_list.order_by().values_list('pk', flat=True))
+    facet_counts_by_option = facet_counts('restaurant', selected_facets, match_all=match_mode == 'all', base_bits=base_bits)
+    
+    # فیلترها با ایندکس bitset (OR بین مقادیر هر فیلتر، یا AND با match=all)
+    restaurants_list = facet_queryset(restaurants_list, 'restaurant', selected_facets, match_all=match_mode == 'all')
     
-    # صفحه‌بندی: 9 رستوران در هر صفحه
-    paginator = Paginator(restaurants_list, 9)
-    page_number = request.GET.get('page', 1)
-    restaurants = paginator.get_page(page_number)
+    # مرتب‌سازی روی ستون‌های ایندکس‌شده؛ جستجو بدون مرتب‌سازی صریح ترتیب رتبه را نگه می‌دارد
+    ordering = None
+    if not search_query or sort in LIST_ORDERINGS:
+        ordering = LIST_ORDERINGS.get(sort, LIST_ORDERINGS[DEFAULT_SORT])
+        restaurants_list = restaurants_list.order_by(*ordering)
     
-    # دریافت تبلیغات فعال برای رستوران - اصلاح موقعیت
-    # در RTL: left در template = right در دیتابیس
-    left_ads = Advertisement.objects.filter(section='restaurant', position='right', is_active=True).order_by('order')[:3]
-    right_ads = Advertisement.objects.filter(section='restaurant', position='left', is_active=True).order_by('order')[:3]
+    # صفحه‌بندی: 9 رستوران در هر صفحه (cursor روی کلید مرتب‌سازی، بدون COUNT در صفحات عمیق)
+    restaurants = paginate_list(request, restaurants_list, 9, ordering)
+    cards = render_cards('restaurant', restaurants, 'restaurants/card.html', 'restaurant', prefetch=CARD_PREFETCH)
     
-    # دریافت لیست شهرها برای فیلتر
-    cities = City.objects.all()
+    # تبلیغات سایدبار از کش جایگاه‌ها (نگاشت RTL داخل سرویس)
+    left_ads, right_ads = get_sidebar_ads('restaurant')
+    ad_stats.record_impressions(left_ads + right_ads)
     
-    # دریافت دسته‌بندی‌های فعال
-    categories = Category.objects.filter(is_active=True).order_by('order')
+    # دریافت لیست‌ها برای فیلتر از کش جدول‌های مرجع
+    cities = get_lookup('cities')
+    meal_types = get_lookup('meal_types')
     
     context = {
         'restaurants': restaurants,
+        'cards': cards,
         'left_ads': left_ads,
         'right_ads': right_ads,
         'cities': cities,
-        'categories': categories,
+        'meal_types': meal_types,
         'current_city': city_filter,
         'current_rating': rating_filter,
+        'current_sort': sort,
+        'current_match': match_mode,
+        'facet_counts': facet_counts_by_option,
         'current_meal_types': meal_type_filters,
         'search_query': search_query,
     }
@@ -79,21 +102,41 @@ def restaurant_list(request):
     return render(request, 'restaurants/list.html', context)
 
 
+def _restaurant_detail_context(restaurant):
+    """داده‌های عمومی صفحه جزئیات (بدون فرم و پیام‌های کاربر)"""
+    # خلاصه امتیاز از ستون‌های تجمیعی و یک کوئری برای توزیع ستاره‌ها
+    summary = rating_summary(restaurant)
+    
+    # نمایش کامنت‌های تایید شده
+    comments = restaurant.comments.filter(is_approved=True)
+    
+    return {
+        'restaurant': restaurant,
+        'comments': comments,
+        'avg_rating': summary['average'],
+        'total_ratings': summary['count'],
+        'rating_histogram': summary['histogram'],
+    }
+
+
+@conditional_detail(Restaurant, 'restaurants/detail.html')
 def restaurant_detail(request, pk):
-    """نمایش جزئیات یک رستوران"""
+    """نمایش جزئیات یک رستوران؛ بدنه عمومی و قابل کش بدون توکن CSRF و پیام‌ها"""
+    # فرم‌های قدیمی که به آدرس جزئیات ارسال می‌شوند
+    if request.method == 'POST':
+        return restaurant_comment(request, pk)
+    
     restaurant = get_object_or_404(
-        Restaurant.objects.prefetch_related('phone_numbers', 'images', 'comments', 'ratings'),
+        Restaurant.objects.select_related('cover_image').prefetch_related('phone_numbers', 'images'),
         pk=pk
     )
-    
-    # محاسبه میانگین ریتینگ
-    ratings = restaurant.ratings.all()
-    avg_rating = 0
-    if ratings.exists():
-        avg_rating = sum(r.rating for r in ratings) / ratings.count()
-    
-    # نمایش کامنت‌های تایید شده
-    comments = restaurant.comments.filter(is_approved=True)
+    return render(request, 'restaurants/detail.html', _restaurant_detail_context(restaurant))
+
+
+@never_cache
+def restaurant_comment(request, pk):
+    """فرم ثبت نظر و پیام‌های کاربر؛ بخش شخصی صفحه جزئیات که جداگانه بارگذاری می‌شود"""
+    restaurant = get_object_or_404(Restaurant, pk=pk)
     
     # فرم کامنت
     if request.method == 'POST':
@@ -112,20 +155,22 @@ def restaurant_detail(request, pk):
             comment.save()
             
             messages.success(request, 'نظر و امتیاز شما با موفقیت ثبت شد!')
-            return redirect('restaurants:detail', pk=restaurant.pk)
+            return redirect(reverse('restaurants:detail', args=[restaurant.pk]) + '#comment-form')
     else:
         form = CommentForm()
     
-    # دریافت دسته‌بندی‌های فعال
-    categories = Category.objects.filter(is_active=True).order_by('order')
-    
-    context = {
-        'restaurant': restaurant,
-        'comments': comments,
-        'avg_rating': round(avg_rating, 1) if avg_rating > 0 else 0,
-        'total_ratings': ratings.count(),
-        'form': form,
-        'categories': categories,
-    }
+    if request.GET.get('partial'):
+        return render(request, 'restaurants/comment_form.html', {'restaurant': restaurant, 'form': form})
     
+    # بدون جاوااسکریپت یا با خطای فرم: کل صفحه همراه با فرم
+    prefetch_related_objects([restaurant], 'phone_numbers', 'images')
+    context = _restaurant_detail_context(restaurant)
+    context['form'] = form
     return render(request, 'restaurants/detail.html', context)
+
+
+def ad_click(request, pk):
+    """ثبت کلیک تبلیغ در شمارنده بافرشده و انتقال به لینک تبلیغ"""
+    ad = get_object_or_404(Advertisement.objects.only('pk', 'link'), pk=pk)
+    ad_stats.record_click(ad.pk)
+    return redirect(ad.link or '/')
@@ -0,0 +1,130 @@
+"""
+تکمیل خودکار جستجو از یک ایندکس پیشوندی داخل پروسه (آرایه مرتب + bisect).
+
+کلیدها متن نرمال‌شده نام باشگاه‌ها، رستوران‌ها، مربیان، شهرها و انواع ورزش
+هستند؛ برای هر کلمه نام یک کلید جدا ساخته می‌شود تا «یوگا» نام «باشگاه یوگا»
+را هم پیدا کند. تغییرات مدل‌ها بعد از commit به‌صورت افزایشی اعمال می‌شود و
+نسخه مشترک در کش باعث بازسازی ایندکس در بقیه workerها می‌شود.
+"""
+from bisect import bisect_left, insort
+
+from django.urls import reverse
+
+from core.versioning import ProcessLocal
+
+from .normalizer import words
+from .registry import DETAIL_URLS, VERTICALS, get_model
+
+DEFAULT_LIMIT = 8
+# حداکثر کلیدهایی که برای یک درخواست بررسی می‌شوند
+MAX_SCAN = 200
+
+
+def normalize_key(text):
+    return ' '.join(words(text))
+
+
+class PrefixIndex:
+    """ایندکس پیشوندی روی آرایه مرتب (کلید، موقعیت کلمه، شناسه)"""
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry_keys(self, entry_id, label, aliases):
+        keys = []
+        for text in (label, *aliases):
+            parts = normalize_key(text).split()
+            keys.extend((' '.join(parts[i:]), i, entry_id) for i in range(len(parts)))
+        return keys
+
+    def add(self, entry_id, label, aliases=()):
+        self.remove(entry_id)
+        keys = self._entry_keys(entry_id, label, aliases)
+        for key in keys:
+            insort(self._keys, key)
+        self._entries[entry_id] = (label, keys)
+
+    def add_many(self, items):
+        """افزودن گروهی (entry_id, label, aliases)؛ آرایه فقط یک بار مرتب می‌شود، نه insort برای هر کلید"""
+        items = list(items)
+        for entry_id, label, aliases in items:
+            self.remove(entry_id)
+        for entry_id, label, aliases in items:
+            keys = self._entry_keys(entry_id, label, aliases)
+            self._keys.extend(keys)
+            self._entries[entry_id] = (label, keys)
+        self._keys.sort()
+
+    def remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def lookup(self, prefix, limit=DEFAULT_LIMIT):
+        """آیتم‌هایی که یکی از کلمات نامشان با پیشوند شروع می‌شود؛ تطابق از ابتدای نام اول می‌آید"""
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+        keys = self._keys
+        position = bisect_left(keys, (prefix,))
+        best = {}
+        for key, word_position, entry_id in keys[position:position + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            if entry_id in self._entries and word_position < best.get(entry_id, word_position + 1):
+                best[entry_id] = word_position
+        ranked = sorted(best, key=lambda entry_id: (best[entry_id] > 0, len(self._entries[entry_id][0])))
+        return [(entry_id, self._entries[entry_id][0]) for entry_id in ranked[:limit]]
+
+
+def _build_index():
+    from gym.models import SportType
+    from restaurants.models import City
+
+    def rows():
+        for vertical in VERTICALS:
+            for pk, name in get_model(vertical).objects.order_by().values_list('pk', 'name').iterator():
+                yield (vertical, pk), name, ()
+        for city in City.objects.all():
+            yield ('city', city.name), city.get_name_display(), [city.name]
+        for sport in SportType.objects.all():
+            yield ('sport_type', sport.name), sport.get_name_display(), [sport.name]
+
+    index = PrefixIndex()
+    index.add_many(rows())
+    return index
+
+
+_index = ProcessLocal('search:autocomplete', _build_index)
+
+
+def get_index():
+    """ایندکس فعلی این پروسه؛ در صورت تغییر نسخه مشترک از نو ساخته می‌شود"""
+    return _index.get()
+
+
+def update_entry(entry_id, label, aliases=()):
+    _index.update(lambda index: index.add(entry_id, label, aliases))
+
+
+def remove_entry(entry_id):
+    _index.update(lambda index: index.remove(entry_id))
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """پیشنهادهای تکمیل خودکار به شکل قابل ارسال در JSON"""
+    suggestions = []
+    for (kind, value), label in get_index().lookup(query, limit):
+        suggestion = {'type': kind, 'label': label, 'value': value}
+        if kind in DETAIL_URLS:
+            suggestion['url'] = reverse(DETAIL_URLS[kind], args=[value])
+        suggestions.append(suggestion)
+    return suggestions
@@ -0,0 +1,221 @@
+"""
+ایندکس فیلترها (facet) با bitset برای هر مقدار شهر، محدوده قیمت، نوع ورزش، امکانات و نوع وعده.
+
+برای هر بخش و هر مقدار فیلتر یک عدد صحیح پایتون نگه داشته می‌شود که بیت i آن
+یعنی آیتم با شناسه i آن مقدار را دارد. ترکیب فیلترها (OR داخل یک فیلتر یا AND
+با match=all، و AND بین فیلترها) با عملگرهای بیتی محاسبه می‌شود و فقط مجموعه
+شناسه‌ها به ORM داده می‌شود. تغییرات با سیگنال‌های post_save/post_delete و
+m2m_changed به‌صورت افزایشی اعمال می‌شوند.
+"""
+from django.db.models import Exists, OuterRef
+
+from core.versioning import ProcessLocal
+
+from .registry import VERTICALS, get_model
+
+# پارامتر GET هر فیلتر ← نام فیلد مدل
+FACETS = {
+    'gym': {
+        'city': 'city',
+        'price_range': 'price_range',
+        'sport_type': 'sport_types',
+        'facility': 'facilities',
+    },
+    'restaurant': {
+        'city': 'city',
+        'meal_type': 'meal_types',
+    },
+    'trainer': {
+        'city': 'city',
+        'sport_type': 'sport_types',
+    },
+}
+
+# بالاتر از این تعداد شناسه، فیلتر با زیرکوئری‌های EXISTS انجام می‌شود تا IN بیش از حد بزرگ نشود
+MAX_IN_IDS = 5000
+
+
+def iter_bits(bits):
+    """شناسه‌های متناظر با بیت‌های یک bitset به ترتیب صعودی"""
+    digits = bin(bits)[:1:-1]
+    position = digits.find('1')
+    while position != -1:
+        yield position
+        position = digits.find('1', position + 1)
+
+
+def is_many_to_many(model, field):
+    return model._meta.get_field(field).many_to_many
+
+
+class FacetIndex:
+    """bitsetهای یک بخش: همه آیتم‌ها و آیتم‌های هر مقدار هر فیلتر"""
+
+    def __init__(self, vertical):
+        self.vertical = vertical
+        self.model = get_model(vertical)
+        self.all = 0
+        self.bits = {facet: {} for facet in FACETS[vertical]}
+
+    @classmethod
+    def build(cls, vertical):
+        index = cls(vertical)
+        model = index.model
+        single = {facet: field for facet, field in FACETS[vertical].items() if not is_many_to_many(model, field)}
+        rows = model.objects.order_by().values_list('pk', *(f'{field}__name' for field in single.values()))
+        for pk, *values in rows.iterator():
+            index.all |= 1 << pk
+            for facet, value in zip(single, values):
+                if value is not None:
+                    index._set(facet, value, pk)
+        for facet, field in FACETS[vertical].items():
+            if facet in single:
+                continue
+            rows = model.objects.order_by().filter(**{f'{field}__isnull': False}).values_list('pk', f'{field}__name')
+            for pk, value in rows.iterator():
+                index._set(facet, value, pk)
+        return index
+
+    def _set(self, facet, value, pk):
+        values = self.bits[facet]
+        values[value] = values.get(value, 0) | (1 << pk)
+
+    def _clear(self, facet, pk):
+        mask = ~(1 << pk)
+        values = self.bits[facet]
+        for value in values:
+            values[value] &= mask
+
+    def update_single(self, instance):
+        """بروزرسانی آیتم و فیلترهای کلید خارجی آن (شهر، محدوده قیمت) بعد از ذخیره"""
+        pk = instance.pk
+        self.all |= 1 << pk
+        for facet, field in FACETS[self.vertical].items():
+            if is_many_to_many(self.model, field):
+                continue
+            self._clear(facet, pk)
+            related = getattr(instance, field)
+            if related is not None:
+                self._set(facet, related.name, pk)
+
+    def add_values(self, facet, pks, values):
+        for pk in pks:
+            for value in values:
+                self._set(facet, value, pk)
+
+    def remove_values(self, facet, pks, values):
+        mask = ~sum(1 << pk for pk in pks)
+        for value in values:
+            if value in self.bits[facet]:
+                self.bits[facet][value] &= mask
+
+    def clear_facet(self, facet, pk):
+        self._clear(facet, pk)
+
+    def remove(self, pk):
+        self.all &= ~(1 << pk)
+        for facet in self.bits:
+            self._clear(facet, pk)
+
+    def facet_bits(self, facet, values, match_all=False):
+        """bitset یک فیلتر: OR مقادیر انتخاب‌شده یا با match_all اشتراک آن‌ها"""
+        bitsets = [self.bits[facet].get(value, 0) for value in values]
+        result = bitsets[0]
+        for bits in bitsets[1:]:
+            result = result & bits if match_all else result | bits
+        return result
+
+    def match(self, selected, match_all=False):
+        """bitset آیتم‌هایی که همه فیلترهای انتخاب‌شده را دارند؛ بدون فیلتر None"""
+        result = None
+        for facet, values in selected.items():
+            if not values:
+                continue
+            bits = self.facet_bits(facet, values, match_all)
+            result = bits if result is None else result & bits
+        return result
+
+
+_indexes = {
+    vertical: ProcessLocal(f'search:facets:{vertical}', lambda vertical=vertical: FacetIndex.build(vertical))
+    for vertical in VERTICALS
+}
+
+
+def get_index(vertical):
+    return _indexes[vertical].get()
+
+
+def update(vertical, change):
+    _indexes[vertical].update(change)
+
+
+def invalidate(vertical):
+    _indexes[vertical].invalidate()
+
+
+def _orm_filter(queryset, vertical, selected, match_all):
+    """همان فیلترها با EXISTS روی جدول‌های میانی، بدون JOIN و DISTINCT"""
+    model = queryset.model
+    for facet, values in selected.items():
+        if not values:
+            continue
+        field = FACETS[vertical][facet]
+        if not is_many_to_many(model, field):
+            queryset = queryset.filter(**{f'{field}__name__in': values})
+            continue
+        through = model._meta.get_field(field).remote_field.through
+        source = model._meta.get_field(field).m2m_field_name()
+        target = model._meta.get_field(field).m2m_reverse_field_name()
+        lookups = [values] if not match_all else [[value] for value in values]
+        for group in lookups:
+            queryset = queryset.filter(Exists(through.objects.filter(
+                **{source: OuterRef('pk'), f'{target}__name__in': group}
+            )))
+    return queryset
+
+
+def facet_queryset(queryset, vertical, selected, match_all=False):
+    """اعمال فیلترهای انتخاب‌شده روی کوئری‌ست با کمک bitsetها"""
+    bits = get_index(vertical).match(selected, match_all)
+    if bits is None:
+        return queryset
+    count = bits.bit_count()
+    if count <= MAX_IN_IDS:
+        return queryset.filter(pk__in=list(iter_bits(bits)))
+    excluded = get_index(vertical).all & ~bits
+    if excluded.bit_count() <= MAX_IN_IDS:
+        return queryset.exclude(pk__in=list(iter_bits(excluded)))
+    return _orm_filter(queryset, vertical, selected, match_all)
+
+
+def bits_from_ids(ids):
+    """ساخت bitset از لیست شناسه‌ها در زمان خطی"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        buffer[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def facet_counts(vertical, selected, match_all=False, base_bits=None):
+    """
+    تعداد نتایج هر گزینه هر فیلتر با در نظر گرفتن بقیه فیلترهای فعال، در یک گذر روی bitsetها.
+
+    شمارش هر فیلتر بدون انتخاب‌های خود آن فیلتر انجام می‌شود (با match_all، انتخاب‌های
+    فعلی آن فیلتر هم اعمال می‌شود چون هر گزینه نتیجه را محدودتر می‌کند). base_bits
+    آیتم‌هایی است که فیلترهای غیر از facet (جستجو، حداقل امتیاز) را دارند.
+    """
+    index = get_index(vertical)
+    base = index.all if base_bits is None else index.all & base_bits
+    counts = {}
+    for facet, values in index.bits.items():
+        others = {other: chosen for other, chosen in selected.items() if other != facet}
+        scope = index.match(others, match_all)
+        scope = base if scope is None else base & scope
+        if match_all and selected.get(facet):
+            scope &= index.facet_bits(facet, selected[facet], match_all=True)
+        counts[facet] = {value: (scope & bits).bit_count() for value, bits in values.items()}
+    return counts
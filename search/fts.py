@@ -0,0 +1,153 @@
+"""
+بک‌اند اختیاری جستجو با جدول مجازی FTS5 در SQLite و توکنایزر trigram.
+
+متن نرمال‌شده نام، آدرس و توضیحات در جدول search_fts نگهداری می‌شود تا جستجوی
+زیررشته‌ای (مثل icontains) برای متن فارسی با ایندکس انجام شود. اگر دیتابیس
+SQLite نباشد یا FTS5/trigram در دسترس نباشد، جستجو به ایندکس معکوس برمی‌گردد.
+"""
+from django.conf import settings
+from django.db import connection
+
+from core.versioning import bump_version, get_version
+
+from .normalizer import normalize, stem, words
+from .registry import FIELD_WEIGHTS, VERTICALS, max_results
+
+TABLE = 'search_fts'
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "vertical UNINDEXED, name, address, description, tokenize='trigram')"
+)
+DROP_SQL = f"DROP TABLE IF EXISTS {TABLE}"
+
+# trigram فقط عبارت‌های حداقل سه‌حرفی را پیدا می‌کند
+MIN_TERM_LENGTH = 3
+
+# کد هر بخش در rowid تا حذف و بروزرسانی یک آیتم با کلید اصلی جدول انجام شود
+_VERTICAL_CODES = {vertical: code for code, vertical in enumerate(VERTICALS, start=1)}
+_ROWID_FACTOR = 4
+
+VERSION_NAME = 'search:fts'
+_available = {}
+
+
+def rowid_for(vertical, object_id):
+    return object_id * _ROWID_FACTOR + _VERTICAL_CODES[vertical]
+
+
+def is_supported(conn):
+    """آیا این اتصال SQLite از FTS5 با توکنایزر trigram پشتیبانی می‌کند؟"""
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.search_fts_probe USING fts5(x, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp.search_fts_probe")
+        except Exception:
+            return False
+    return True
+
+
+def is_enabled():
+    """
+    بک‌اند FTS5 فعال است اگر تنظیمات اجازه دهد و جدول مجازی ساخته شده باشد.
+
+    جواب مثبت تا پایان پروسه نگه داشته می‌شود؛ جواب منفی فقط تا وقتی که نسخه
+    search:fts (که با ساخت یا حذف جدول بالا می‌رود) عوض نشده است.
+    """
+    if getattr(settings, 'SEARCH_BACKEND', 'auto') not in ('auto', 'fts5'):
+        return False
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if _available.get(key) is True:
+        return True
+    missing = ('missing', get_version(VERSION_NAME))
+    if _available.get(key) != missing:
+        exists = TABLE in connection.introspection.table_names(include_views=False)
+        _available[key] = True if exists else missing
+    return _available[key] is True
+
+
+def table_changed():
+    """اطلاع به همه پروسه‌ها بعد از ساخت یا حذف جدول FTS"""
+    _available.clear()
+    bump_version(VERSION_NAME)
+
+
+INSERT_SQL = f"INSERT INTO {TABLE} (rowid, vertical, name, address, description) VALUES (%s, %s, %s, %s, %s)"
+
+
+def _row(vertical, instance):
+    return [rowid_for(vertical, instance.pk), vertical, *(normalize(getattr(instance, field, '')) for field in FIELD_WEIGHTS)]
+
+
+def index_object(vertical, instance):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [rowid_for(vertical, instance.pk)])
+        cursor.execute(INSERT_SQL, _row(vertical, instance))
+
+
+def index_many(vertical, instances):
+    """درج دسته‌ای آیتم‌هایی که هنوز در جدول نیستند (برای بازسازی کامل)"""
+    with connection.cursor() as cursor:
+        cursor.executemany(INSERT_SQL, [_row(vertical, instance) for instance in instances])
+
+
+def remove_object(vertical, object_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [rowid_for(vertical, object_id)])
+
+
+def clear(vertical):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE vertical = %s", [vertical])
+
+
+def match_expression(query):
+    """ساخت عبارت MATCH از کلمات سه‌حرفی و بلندتر؛ برای عبارت بی‌استفاده None برمی‌گرداند"""
+    terms = [stem(term) for term in words(query)]
+    terms = [term for term in dict.fromkeys(terms) if len(term) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    return ' AND '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def ranked_matches(query, vertical=None, limit=None):
+    """
+    مانند index.ranked_matches ولی با جدول FTS5؛ اگر عبارت برای trigram
+    قابل استفاده نباشد None برمی‌گرداند تا فراخواننده به مسیر دیگر برگردد.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return None
+    if limit is None:
+        limit = max_results()
+
+    weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS.values())
+    sql = f"SELECT vertical, rowid, -bm25({TABLE}, 0, {weights}) AS score FROM {TABLE} WHERE {TABLE} MATCH %s"
+    params = [expression]
+    if vertical:
+        sql += " AND vertical = %s"
+        params.append(vertical)
+    sql += " ORDER BY score DESC, rowid LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row_vertical, rowid // _ROWID_FACTOR, score) for row_vertical, rowid, score in cursor.fetchall()]
+
+
+def count_matches(query, vertical=None):
+    """تعداد کل نتایج ranked_matches؛ None اگر عبارت برای trigram قابل استفاده نباشد"""
+    expression = match_expression(query)
+    if expression is None:
+        return None
+    sql = f"SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s"
+    params = [expression]
+    if vertical:
+        sql += " AND vertical = %s"
+        params.append(vertical)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from core.pagecache import invalidate_pages
+from jobs.queue import enqueue, register
+
+from . import fts
+from .models import SearchPosting
+from .normalizer import tokenize
+from .registry import FIELD_WEIGHTS, VERTICALS, get_model, max_results
+
+# سقف تکرار یک توکن در یک فیلد برای جلوگیری از اسپم کلمات کلیدی
+MAX_TERM_FREQUENCY = 3
+MAX_QUERY_TOKENS = 8
+# بزرگ‌ترین نویسه یونیکد؛ برای جستجوی پیشوندی با بازه روی ایندکس
+_PREFIX_END = '\U0010ffff'
+
+
+def build_postings(vertical, instance):
+    """ساخت سطرهای ایندکس برای یک آیتم"""
+    weights = defaultdict(float)
+    for field, field_weight in FIELD_WEIGHTS.items():
+        frequencies = defaultdict(int)
+        for token in tokenize(getattr(instance, field, '')):
+            frequencies[token] += 1
+        for token, frequency in frequencies.items():
+            weights[token] += field_weight * min(frequency, MAX_TERM_FREQUENCY)
+    return [
+        SearchPosting(term=term, vertical=vertical, object_id=instance.pk, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def batches(model, batch_size=1000):
+    """آیتم‌های یک مدل در دسته‌های batch_size تایی، فقط با فیلدهای قابل جستجو"""
+    instances = model._default_manager.order_by().only('pk', *FIELD_WEIGHTS)
+    batch = []
+    for instance in instances.iterator(chunk_size=batch_size):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild_vertical(vertical, model=None, use_fts=None, batch_size=1000):
+    """
+    بازسازی کامل ایندکس یک بخش (و جدول FTS5 در صورت فعال بودن)؛ تعداد آیتم‌ها را برمی‌گرداند.
+
+    model برای اجرا داخل مایگریشن با مدل تاریخی داده می‌شود.
+    """
+    if model is None:
+        model = get_model(vertical)
+    if use_fts is None:
+        use_fts = fts.is_enabled()
+    indexed = 0
+    with transaction.atomic():
+        SearchPosting.objects.filter(vertical=vertical).delete()
+        if use_fts:
+            fts.clear(vertical)
+        for batch in batches(model, batch_size):
+            postings = [posting for instance in batch for posting in build_postings(vertical, instance)]
+            SearchPosting.objects.bulk_create(postings, batch_size=1000)
+            if use_fts:
+                fts.index_many(vertical, batch)
+            indexed += len(batch)
+        transaction.on_commit(lambda: invalidate_pages(vertical))
+    return indexed
+
+
+def migration_models(apps, connection):
+    """(بخش، مدل تاریخی) بخش‌هایی که جدولشان در دیتابیس ساخته شده است"""
+    tables = set(connection.introspection.table_names(include_views=False))
+    for vertical, label in VERTICALS.items():
+        model = apps.get_model(label)
+        if model._meta.db_table in tables:
+            yield vertical, model
+
+
+def index_object(vertical, instance):
+    """بازسازی ایندکس یک آیتم"""
+    postings = build_postings(vertical, instance)
+    with transaction.atomic():
+        remove_object(vertical, instance.pk)
+        SearchPosting.objects.bulk_create(postings)
+
+
+def remove_object(vertical, object_id):
+    SearchPosting.objects.filter(vertical=vertical, object_id=object_id).delete()
+
+
+@register('search.sync')
+def sync_object(vertical, object_id):
+    """هم‌گام کردن ایندکس یک آیتم با دیتابیس؛ آیتم حذف‌شده از ایندکس پاک می‌شود"""
+    # صفحه‌های جستجویی که بین ذخیره و اجرای این کار کش شده‌اند نتیجه قدیمی دارند
+    transaction.on_commit(lambda: invalidate_pages(vertical))
+    instance = get_model(vertical).objects.filter(pk=object_id).first()
+    if instance is None:
+        remove_object(vertical, object_id)
+        if fts.is_enabled():
+            fts.remove_object(vertical, object_id)
+        return
+    index_object(vertical, instance)
+    if fts.is_enabled():
+        fts.index_object(vertical, instance)
+
+
+def enqueue_sync(vertical, object_id):
+    enqueue('search.sync', key=f'search:{vertical}:{object_id}', vertical=vertical, object_id=object_id)
+
+
+def _query_tokens(query):
+    tokens = list(dict.fromkeys(tokenize(query)))
+    return tokens[:MAX_QUERY_TOKENS]
+
+
+def _term_condition(token):
+    # توکن‌های تک‌حرفی دقیق و بقیه پیشوندی تطبیق داده می‌شوند (باشگاه ← باشگاهها)
+    if len(token) < 2:
+        return Q(term=token)
+    return Q(term__gte=token, term__lt=token + _PREFIX_END)
+
+
+def _matching_rows(tokens, vertical=None):
+    """(بخش، شناسه، امتیاز) آیتم‌هایی که همه توکن‌ها را دارند، بدون مرتب‌سازی"""
+    conditions = [_term_condition(token) for token in tokens]
+    postings = SearchPosting.objects.filter(reduce(or_, conditions))
+    if vertical:
+        postings = postings.filter(vertical=vertical)
+
+    matched = {
+        f'matched_{i}': Max(Case(When(condition, then=1), default=0, output_field=IntegerField()))
+        for i, condition in enumerate(conditions)
+    }
+    return (
+        postings.values('vertical', 'object_id')
+        .annotate(score=Sum('weight'), **matched)
+        .filter(**{name: 1 for name in matched})
+    )
+
+
+def ranked_matches(query, vertical=None, limit=None):
+    """
+    شناسه آیتم‌هایی که همه توکن‌های عبارت را دارند، مرتب‌شده بر اساس امتیاز.
+    خروجی لیستی از (بخش، شناسه، امتیاز) است؛ برای عبارت خالی None برمی‌گرداند.
+    """
+    tokens = _query_tokens(query)
+    if not tokens:
+        return None
+    if limit is None:
+        limit = max_results()
+    rows = _matching_rows(tokens, vertical).order_by('-score', 'object_id').values_list('vertical', 'object_id', 'score')
+    return list(rows[:limit])
+
+
+def count_ranked_matches(query, vertical=None):
+    """تعداد کل نتایج ranked_matches بدون سقف؛ برای عبارت خالی None"""
+    tokens = _query_tokens(query)
+    if not tokens:
+        return None
+    return _matching_rows(tokens, vertical).order_by().count()
+
+
+def find_matches(query, vertical=None, limit=None):
+    """نتایج رتبه‌بندی‌شده از FTS5 در صورت فعال بودن، وگرنه از ایندکس معکوس"""
+    if fts.is_enabled():
+        matches = fts.ranked_matches(query, vertical, limit)
+        if matches is not None:
+            return matches
+    return ranked_matches(query, vertical, limit)
+
+
+def count_matches(query, vertical=None):
+    """تعداد کل نتایج find_matches از همان بک‌اند"""
+    if fts.is_enabled():
+        count = fts.count_matches(query, vertical)
+        if count is not None:
+            return count
+    return count_ranked_matches(query, vertical)
+
+
+def search_queryset(queryset, vertical, query):
+    """فیلتر و رتبه‌بندی یک کوئری‌ست با ایندکس جستجو (تطابق نام امتیاز بیشتری دارد)"""
+    matches = find_matches(query, vertical)
+    if matches is None:
+        return queryset
+    ids = [object_id for _, object_id, _ in matches]
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).alias(search_rank=rank).order_by('search_rank')
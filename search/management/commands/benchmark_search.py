@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from gym.models import Gym
+from search import fts, index
+from search.models import SearchPosting
+from search.registry import max_results
+
+NAME_WORDS = ['باشگاه', 'مجموعه', 'ورزشی', 'یوگا', 'بدنسازی', 'استخر', 'پارس', 'آریا', 'المپیک', 'ستاره', 'قهرمان', 'نور', 'سلامت', 'کراس‌فیت', 'پیلاتس']
+STREET_WORDS = ['تهران', 'کرج', 'اصفهان', 'شیراز', 'خیابان', 'ولیعصر', 'انقلاب', 'آزادی', 'میدان', 'کوچه', 'بلوار', 'کشاورز', 'پلاک', 'سعادت‌آباد', 'نارمک']
+DESCRIPTION_WORDS = ['کلاس', 'مربی', 'حرفه‌ای', 'بانوان', 'آقایان', 'سونا', 'جکوزی', 'پارکینگ', 'رختکن', 'کافه', 'تجهیزات', 'جدید', 'ساعت', 'کاری', 'تخفیف', 'ویژه']
+
+DEFAULT_QUERIES = ['یوگا', 'باشگاه پارس', 'ولیعصر', 'سعادت', 'استخر تهران', 'مربی حرفه‌ای بانوان', 'کراس']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark FTS5 search against the inverted index and icontains paths on a seeded catalog (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--query', action='append', dest='queries', help='Query to benchmark (repeatable)')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        paths = {
+            'inverted index': lambda query: index.ranked_matches(query, 'gym'),
+            'icontains': self._icontains,
+        }
+        if fts.is_enabled():
+            paths = {'fts5 trigram': self._fts, **paths}
+        else:
+            self.stdout.write(self.style.WARNING('FTS5 table is not available; benchmarking fallback paths only'))
+
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                for name, run in paths.items():
+                    self._report(name, run, queries, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, rows):
+        rng = random.Random(42)
+        started = time.perf_counter()
+        batch_size = 2000
+        for offset in range(0, rows, batch_size):
+            gyms = Gym.objects.bulk_create([
+                Gym(
+                    name=' '.join(rng.sample(NAME_WORDS, 3)),
+                    address=' '.join(rng.sample(STREET_WORDS, 5)),
+                    description=' '.join(rng.sample(DESCRIPTION_WORDS, 8)),
+                )
+                for _ in range(min(batch_size, rows - offset))
+            ])
+            SearchPosting.objects.bulk_create(
+                [posting for gym in gyms for posting in index.build_postings('gym', gym)], batch_size=1000
+            )
+            if fts.is_enabled():
+                fts.index_many('gym', gyms)
+        self.stdout.write(f'Seeded {rows} gyms in {time.perf_counter() - started:.1f}s')
+
+    def _fts(self, query):
+        # مثل find_matches فقط وقتی عبارت برای trigram قابل استفاده نیست (None) به ایندکس معکوس برمی‌گردد
+        matches = fts.ranked_matches(query, 'gym')
+        return index.ranked_matches(query, 'gym') if matches is None else matches
+
+    def _icontains(self, query):
+        return list(
+            Gym.objects.filter(
+                Q(name__icontains=query) | Q(address__icontains=query) | Q(description__icontains=query)
+            ).values_list('pk', flat=True)[:max_results()]
+        )
+
+    def _report(self, name, run, queries, repeat):
+        timings = []
+        hits = 0
+        for query in queries:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results = run(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            hits += len(results or [])
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{name:>16}: mean {statistics.mean(timings):7.2f} ms  '
+            f'median {statistics.median(timings):7.2f} ms  p95 {p95:7.2f} ms  hits/query {hits / len(queries):.0f}'
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from search import fts
+from search.index import rebuild_vertical
+from search.registry import VERTICALS
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index (inverted index and FTS5 table) for gyms, restaurants and trainers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vertical', choices=list(VERTICALS), help='Only rebuild one vertical')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        verticals = [options['vertical']] if options['vertical'] else list(VERTICALS)
+        use_fts = fts.is_enabled()
+
+        for vertical in verticals:
+            indexed = rebuild_vertical(vertical, use_fts=use_fts, batch_size=options['batch_size'])
+            backend = 'inverted index + FTS5' if use_fts else 'inverted index'
+            self.stdout.write(self.style.SUCCESS(f'{vertical}: {indexed} items indexed ({backend})'))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+from search.index import migration_models, rebuild_vertical
+
+
+def backfill_index(apps, schema_editor):
+    # آیتم‌های موجود پیش از این مایگریشن وگرنه تا اجرای دستی rebuild_search_index در جستجو پیدا نمی‌شدند
+    for vertical, model in migration_models(apps, schema_editor.connection):
+        rebuild_vertical(vertical, model, use_fts=False)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("gym", "0001_initial"),
+        ("restaurants", "0005_mealtype_remove_restaurant_meal_type_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64, verbose_name="توکن")),
+                (
+                    "vertical",
+                    models.CharField(
+                        choices=[
+                            ("gym", "باشگاه"),
+                            ("restaurant", "رستوران"),
+                            ("trainer", "مربیان"),
+                        ],
+                        max_length=20,
+                        verbose_name="بخش",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(verbose_name="شناسه آیتم"),
+                ),
+                ("weight", models.FloatField(verbose_name="وزن")),
+            ],
+            options={
+                "verbose_name": "ایندکس جستجو",
+                "verbose_name_plural": "ایندکس جستجو",
+                "indexes": [
+                    models.Index(
+                        fields=["term", "vertical"], name="search_term_vertical_idx"
+                    ),
+                    models.Index(
+                        fields=["vertical", "object_id"], name="search_object_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from search import fts
+from search.index import batches, migration_models
+
+
+def create_fts_table(apps, schema_editor):
+    # فقط روی SQLite با پشتیبانی FTS5/trigram؛ در غیر این صورت ایندکس معکوس استفاده می‌شود
+    if fts.is_supported(schema_editor.connection):
+        schema_editor.execute(fts.CREATE_SQL)
+        # جدول خالی بلافاصله فعال می‌شد و تا بازسازی دستی هیچ نتیجه‌ای نمی‌داد
+        for vertical, model in migration_models(apps, schema_editor.connection):
+            for batch in batches(model):
+                fts.index_many(vertical, batch)
+        fts.table_changed()
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(fts.DROP_SQL)
+        fts.table_changed()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class SearchPosting(models.Model):
+    """یک سطر از ایندکس معکوس: توکن نرمال‌شده و وزن آن در یک آیتم"""
+    VERTICAL_CHOICES = [
+        ('gym', 'باشگاه'),
+        ('restaurant', 'رستوران'),
+        ('trainer', 'مربیان'),
+    ]
+
+    term = models.CharField(max_length=64, verbose_name="توکن")
+    vertical = models.CharField(max_length=20, choices=VERTICAL_CHOICES, verbose_name="بخش")
+    object_id = models.PositiveBigIntegerField(verbose_name="شناسه آیتم")
+    weight = models.FloatField(verbose_name="وزن")
+
+    class Meta:
+        verbose_name = "ایندکس جستجو"
+        verbose_name_plural = "ایندکس جستجو"
+        indexes = [
+            models.Index(fields=['term', 'vertical'], name='search_term_vertical_idx'),
+            models.Index(fields=['vertical', 'object_id'], name='search_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} - {self.vertical}:{self.object_id}"
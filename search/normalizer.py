@@ -0,0 +1,55 @@
+import re
+
+
+ZWNJ = '\u200c'
+
+# یکسان‌سازی حروف عربی با فارسی، حذف اعراب، کشیده و نویسه‌های نامرئی و تبدیل ارقام فارسی/عربی به لاتین
+_CHAR_MAP = {
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    'ـ': '',  # کشیده
+    ZWNJ: '', '\u200d': '', '\u200e': '', '\u200f': '', '\ufeff': '',
+}
+_CHAR_MAP.update({chr(code): '' for code in range(0x064B, 0x0660)})  # اعراب
+_CHAR_MAP[chr(0x0670)] = ''
+_CHAR_MAP.update({chr(0x06F0 + digit): str(digit) for digit in range(10)})
+_CHAR_MAP.update({chr(0x0660 + digit): str(digit) for digit in range(10)})
+_TRANSLATION = str.maketrans(_CHAR_MAP)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+MAX_TOKEN_LENGTH = 64
+
+# پسوندهای جمع رایج که پیش از ایندکس حذف می‌شوند (باشگاه‌ها ← باشگاه)
+PLURAL_SUFFIXES = ('هایی', 'های', 'ها')
+
+
+def normalize(text):
+    """یکسان‌سازی متن فارسی برای جستجو"""
+    if not text:
+        return ''
+    return text.translate(_TRANSLATION).casefold()
+
+
+def stem(token):
+    """حذف پسوند جمع از توکن‌های به اندازه کافی بلند"""
+    for suffix in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def words(text):
+    """کلمات نرمال‌شده متن، بدون حذف پسوند و کلمات توقف"""
+    return _TOKEN_RE.findall(normalize(text).replace('_', ' '))
+
+
+def tokenize(text):
+    """تبدیل متن به توکن‌های نرمال‌شده (بدون کلمات توقف)"""
+    return [stem(token)[:MAX_TOKEN_LENGTH] for token in words(text) if token not in STOPWORDS]
+
+
+STOPWORDS = frozenset(normalize(word) for word in ['و', 'در', 'به', 'از', 'که', 'با', 'را', 'این', 'آن', 'برای', 'تا', 'یا'])
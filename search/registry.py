@@ -0,0 +1,42 @@
+from django.apps import apps
+from django.conf import settings
+
+
+# بخش‌های قابل جستجو (هم‌نام با بخش‌های تبلیغات) و مدل هر کدام
+VERTICALS = {
+    'gym': 'gym.Gym',
+    'restaurant': 'restaurants.Restaurant',
+    'trainer': 'trainers.Trainer',
+}
+
+# نام URL صفحه جزئیات هر بخش
+DETAIL_URLS = {
+    'gym': 'gym:detail',
+    'restaurant': 'restaurants:detail',
+    'trainer': 'trainers:detail',
+}
+
+# وزن هر فیلد در رتبه‌بندی؛ تطابق در نام بیشترین امتیاز را دارد
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'address': 2.0,
+    'description': 1.0,
+}
+
+
+def max_results():
+    """سقف تعداد نتایج یک جستجو (تنظیم SEARCH_MAX_RESULTS)"""
+    return getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+
+
+def get_model(vertical):
+    return apps.get_model(VERTICALS[vertical])
+
+
+def get_vertical(model):
+    """نام بخش متناظر با یک مدل (یا None)"""
+    label = model._meta.label
+    for vertical, model_label in VERTICALS.items():
+        if model_label == label:
+            return vertical
+    return None
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from gym.models import SportType
+from restaurants.models import City
+
+from . import autocomplete, facets, index
+from .registry import VERTICALS, get_model
+
+
+def _connect(vertical):
+    def on_save(sender, instance, **kwargs):
+        # ایندکس معکوس و FTS در صف پس‌زمینه؛ چند ذخیره پشت‌سرهم یک بار ایندکس می‌شوند
+        index.enqueue_sync(vertical, instance.pk)
+        entry_id, name = (vertical, instance.pk), instance.name
+        transaction.on_commit(lambda: autocomplete.update_entry(entry_id, name))
+        transaction.on_commit(lambda: facets.update(vertical, lambda facet_index: facet_index.update_single(instance)))
+
+    def on_delete(sender, instance, **kwargs):
+        index.enqueue_sync(vertical, instance.pk)
+        entry_id, pk = (vertical, instance.pk), instance.pk
+        transaction.on_commit(lambda: autocomplete.remove_entry(entry_id))
+        transaction.on_commit(lambda: facets.update(vertical, lambda facet_index: facet_index.remove(pk)))
+
+    model = get_model(vertical)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'search_index:{vertical}')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'search_index:{vertical}')
+
+
+def _connect_choice_model(kind, model):
+    """شهرها و انواع ورزش فقط در تکمیل خودکار ایندکس می‌شوند"""
+    def on_save(sender, instance, **kwargs):
+        entry_id, label, name = (kind, instance.name), instance.get_name_display(), instance.name
+        transaction.on_commit(lambda: autocomplete.update_entry(entry_id, label, [name]))
+
+    def on_delete(sender, instance, **kwargs):
+        entry_id = (kind, instance.name)
+        transaction.on_commit(lambda: autocomplete.remove_entry(entry_id))
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'search_autocomplete:{kind}')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'search_autocomplete:{kind}')
+
+
+def _connect_facets(vertical):
+    """نگهداری bitsetهای فیلتر با m2m_changed و باطل کردن آن‌ها با تغییر مقادیر فیلتر"""
+    model = get_model(vertical)
+    for facet, field_name in facets.FACETS[vertical].items():
+        field = model._meta.get_field(field_name)
+        value_model = field.related_model
+
+        def on_value_change(sender, vertical=vertical, **kwargs):
+            transaction.on_commit(lambda: facets.invalidate(vertical))
+
+        uid = f'search_facets:{vertical}:{value_model._meta.label}'
+        post_save.connect(on_value_change, sender=value_model, weak=False, dispatch_uid=uid)
+        post_delete.connect(on_value_change, sender=value_model, weak=False, dispatch_uid=uid)
+
+        if field.many_to_many:
+            m2m_changed.connect(
+                _m2m_handler(vertical, facet),
+                sender=field.remote_field.through,
+                weak=False,
+                dispatch_uid=f'search_facets:{vertical}:{facet}',
+            )
+
+
+def _m2m_handler(vertical, facet):
+    def on_m2m_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if reverse:
+            # instance مقدار فیلتر است (مثلاً یک نوع ورزش) و pk_set شناسه آیتم‌ها
+            if action == 'post_clear':
+                transaction.on_commit(lambda: facets.invalidate(vertical))
+                return
+            pks, values = set(pk_set), [instance.name]
+        else:
+            pk = instance.pk
+            if action == 'post_clear':
+                transaction.on_commit(lambda: facets.update(vertical, lambda facet_index: facet_index.clear_facet(facet, pk)))
+                return
+            pks, values = [pk], list(model.objects.filter(pk__in=pk_set).values_list('name', flat=True))
+        method = 'add_values' if action == 'post_add' else 'remove_values'
+        transaction.on_commit(
+            lambda: facets.update(vertical, lambda facet_index: getattr(facet_index, method)(facet, pks, values))
+        )
+    return on_m2m_changed
+
+
+for _vertical in VERTICALS:
+    _connect(_vertical)
+    _connect_facets(_vertical)
+
+_connect_choice_model('city', City)
+_connect_choice_model('sport_type', SportType)
@@ -0,0 +1,261 @@
+import shutil
+import tempfile
+import threading
+import time
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.cache import AtomicFileBasedCache
+from core.versioning import ProcessLocal, bump_version, check_shared_cache, get_version
+from core.pagecache import invalidate_pages
+from gym.models import Gym, SportType
+from jobs.queue import run_pending
+from restaurants.models import City, Restaurant
+
+from . import facets, fts
+from .index import find_matches
+from .normalizer import normalize, tokenize
+from .autocomplete import PrefixIndex, _build_index
+
+
+class SharedVersionTests(TestCase):
+    def test_process_local_cache_fails_the_system_check(self):
+        self.assertEqual(check_shared_cache(), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([error.id for error in check_shared_cache()], ['core.E001'])
+
+    def test_file_cache_counters_are_atomic_between_workers(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        workers = [AtomicFileBasedCache(location, {}) for _ in range(4)]
+        workers[0].add('counter', 0, None)
+
+        def bump(worker):
+            for _ in range(25):
+                worker.incr('counter')
+
+        threads = [threading.Thread(target=bump, args=(worker,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(workers[-1].get('counter'), 100)
+        self.assertFalse(workers[1].add('counter', 0, None))
+
+    def test_bumped_counter_keeps_no_expiry(self):
+        version = bump_version('test:persistent')
+        bump_version('test:persistent')
+        later = time.time() + 3600
+        with mock.patch('django.core.cache.backends.filebased.time.time', return_value=later):
+            self.assertEqual(get_version('test:persistent'), version + 1)
+
+    def test_incr_keeps_an_existing_expiry(self):
+        cache.set('short-lived', 1, 60)
+        self.assertEqual(cache.incr('short-lived'), 2)
+        with mock.patch('django.core.cache.backends.filebased.time.time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get('short-lived'))
+
+    def test_other_worker_rebuilds_after_save(self):
+        # ایندکس یک worker دیگر با همان نسخه مشترک
+        other_worker = ProcessLocal('search:autocomplete', _build_index)
+        self.assertEqual(other_worker.get().lookup('آفتاب'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            gym = Gym.objects.create(name='باشگاه آفتاب', address='address')
+        self.assertEqual(other_worker.get().lookup('آفتاب'), [(('gym', gym.pk), 'باشگاه آفتاب')])
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(name='tehran')
+        self.yoga = SportType.objects.create(name='yoga')
+
+    def test_listing_created_after_build_matches_filters(self):
+        selected = {'city': ['tehran'], 'sport_type': ['yoga']}
+        other_worker = ProcessLocal('search:facets:gym', lambda: facets.FacetIndex.build('gym'))
+        self.assertEqual(other_worker.get().match(selected), 0)
+        self.assertEqual(facets.get_index('gym').match(selected), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gym = Gym.objects.create(name='باشگاه ستاره', address='address', city=self.city)
+            gym.sport_types.add(self.yoga)
+
+        self.assertEqual(other_worker.get().match(selected), 1 << gym.pk)
+        filtered = facets.facet_queryset(Gym.objects.all(), 'gym', selected)
+        self.assertEqual(list(filtered), [gym])
+        self.assertContains(self.client.get('/', {'city': 'tehran', 'sport_type': 'yoga'}), 'باشگاه ستاره')
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        tehran, shiraz = City.objects.create(name='tehran'), City.objects.create(name='shiraz')
+        yoga, swim = SportType.objects.create(name='yoga'), SportType.objects.create(name='swim')
+        self.gyms = []
+        for city, sports in ((tehran, [yoga, swim]), (tehran, [yoga]), (shiraz, [swim]), (shiraz, [])):
+            gym = Gym.objects.create(name=f'gym{len(self.gyms)}', address='address', city=city)
+            gym.sport_types.set(sports)
+            self.gyms.append(gym)
+        facets.invalidate('gym')
+        # ایندکس ساخته‌شده از سطرهای این تست با rollback دیتابیس باطل نمی‌شود
+        self.addCleanup(facets.invalidate, 'gym')
+        invalidate_pages('gym')
+
+    def counts(self, selected, **kwargs):
+        counts = facets.facet_counts('gym', selected, **kwargs)
+        return counts['city'], counts['sport_type']
+
+    def test_option_counts_exclude_their_own_selection(self):
+        self.assertEqual(self.counts({}), ({'tehran': 2, 'shiraz': 2}, {'yoga': 2, 'swim': 2}))
+        self.assertEqual(
+            self.counts({'city': ['tehran']}),
+            ({'tehran': 2, 'shiraz': 2}, {'yoga': 2, 'swim': 1}),
+        )
+
+    def test_any_and_all_match_modes(self):
+        selected = {'sport_type': ['yoga', 'swim']}
+        self.assertEqual(self.counts(selected), ({'tehran': 2, 'shiraz': 1}, {'yoga': 2, 'swim': 2}))
+        self.assertEqual(
+            self.counts(selected, match_all=True),
+            ({'tehran': 1, 'shiraz': 0}, {'yoga': 1, 'swim': 1}),
+        )
+
+    def test_counts_are_limited_to_search_and_rating_results(self):
+        base_bits = facets.bits_from_ids([self.gyms[1].pk, self.gyms[2].pk])
+        self.assertEqual(
+            self.counts({}, base_bits=base_bits),
+            ({'tehran': 1, 'shiraz': 1}, {'yoga': 1, 'swim': 1}),
+        )
+        Gym.objects.filter(pk=self.gyms[0].pk).update(avg_rating=5)
+        response = self.client.get('/', {'rating': '4'})
+        self.assertEqual(response.context['facet_counts']['city'], {'tehran': 1, 'shiraz': 0})
+        self.assertEqual(response.context['facet_counts']['sport_type'], {'yoga': 1, 'swim': 1})
+
+
+class SearchSyncTests(TestCase):
+    def test_search_page_cached_before_indexing_is_invalidated(self):
+        invalidate_pages('gym')
+        with self.captureOnCommitCallbacks(execute=True):
+            Gym.objects.create(name='باشگاه کوهستان', address='address')
+        # ایندکس هنوز در صف است و صفحه خالی کش می‌شود
+        self.assertNotContains(self.client.get('/', {'search': 'کوهستان'}), 'باشگاه کوهستان')
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        self.assertContains(self.client.get('/', {'search': 'کوهستان'}), 'باشگاه کوهستان')
+
+
+class UnifiedSearchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(6):
+                Gym.objects.create(name=f'باشگاه یوگا {i}', address='address')
+            self.restaurant = Restaurant.objects.create(name='کافه یوگا', address='address')
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+
+    @override_settings(SEARCH_MAX_RESULTS=4)
+    def test_vertical_over_the_limit_does_not_hide_others(self):
+        for backend in ('fts5', 'index'):
+            with self.subTest(backend=backend), override_settings(SEARCH_BACKEND=backend):
+                self.assert_vertical_counts(self.client.get('/search/', {'q': 'یوگا', 'limit': 2}).json())
+
+    def assert_vertical_counts(self, data):
+        self.assertEqual(data['counts'], {'gym': 6, 'restaurant': 1, 'trainer': 0})
+        self.assertTrue(data['truncated'])
+        verticals = [result['vertical'] for result in data['results']]
+        self.assertEqual(verticals.count('gym'), 2)
+        self.assertIn({'vertical': 'restaurant', 'id': self.restaurant.pk}, [
+            {'vertical': result['vertical'], 'id': result['id']} for result in data['results']
+        ])
+        scores = [result['score'] for result in data['results']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+class FtsAvailabilityTests(TestCase):
+    def test_missing_table_is_rechecked_after_it_is_created(self):
+        self.addCleanup(fts._available.clear)
+        with connection.cursor() as cursor:
+            cursor.execute(fts.DROP_SQL)
+        fts._available.clear()
+        self.assertFalse(fts.is_enabled())
+
+        # پروسه دیگری جدول را می‌سازد؛ این پروسه با بالا رفتن نسخه دوباره بررسی می‌کند
+        with connection.cursor() as cursor:
+            cursor.execute(fts.CREATE_SQL)
+        bump_version(fts.VERSION_NAME)
+        self.assertTrue(fts.is_enabled())
+
+    def test_migration_fills_the_table_with_existing_rows(self):
+        self.addCleanup(fts._available.clear)
+        gym = Gym.objects.create(name='باشگاه قدیمی', address='address')
+        with connection.cursor() as cursor:
+            cursor.execute(fts.DROP_SQL)
+            migration = import_module('search.migrations.0002_search_fts')
+            migration.create_fts_table(apps, SimpleNamespace(connection=connection, execute=cursor.execute))
+        self.assertTrue(fts.is_enabled())
+        self.assertEqual([(vertical, pk) for vertical, pk, _ in fts.ranked_matches('قدیمی')], [('gym', gym.pk)])
+
+
+class PrefixIndexTests(TestCase):
+    def test_bulk_build_matches_incremental_adds(self):
+        items = [
+            (('gym', 2), 'باشگاه یوگا', ()),
+            (('gym', 1), 'یوگا سنتر', ()),
+            (('city', 'tehran'), 'تهران', ['tehran']),
+        ]
+        incremental = PrefixIndex()
+        for item in items:
+            incremental.add(*item)
+        bulk = PrefixIndex()
+        bulk.add_many(items)
+        self.assertEqual(bulk._keys, incremental._keys)
+        self.assertEqual(bulk.lookup('یوگا'), [(('gym', 1), 'یوگا سنتر'), (('gym', 2), 'باشگاه یوگا')])
+
+        # افزودن دوباره یک شناسه کلیدهای قبلی آن را جایگزین می‌کند
+        bulk.add_many([(('gym', 2), 'باشگاه شنا', ())])
+        self.assertEqual(bulk.lookup('یوگا'), [(('gym', 1), 'یوگا سنتر')])
+        self.assertEqual(len(bulk._keys), len(incremental._keys))
+
+
+class NormalizerTests(SimpleTestCase):
+    def test_arabic_letters_diacritics_and_digits_are_folded(self):
+        self.assertEqual(normalize('كافه علي'), 'کافه علی')
+        self.assertEqual(normalize('آبِ مُعدني'), 'اب معدنی')
+        self.assertEqual(normalize('تهـــران'), 'تهران')
+        self.assertEqual(normalize('۱۲ ١٢ Gym'), '12 12 gym')
+
+    def test_zwnj_and_plural_suffixes(self):
+        self.assertEqual(normalize('باشگاه‌ها'), 'باشگاهها')
+        self.assertEqual(tokenize('باشگاه‌های ورزشی'), ['باشگاه', 'ورزشی'])
+        self.assertEqual(tokenize('باشگاه‌ها'), tokenize('باشگاهها'))
+        # پسوند از کلمه کوتاه حذف نمی‌شود
+        self.assertEqual(tokenize('ماها'), ['ماها'])
+
+    def test_stopwords_are_dropped(self):
+        self.assertEqual(tokenize('باشگاه و استخر در تهران'), ['باشگاه', 'استخر', 'تهران'])
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.by_address = Gym.objects.create(name='باشگاه کیان', address='خیابان استخر')
+            self.by_name = Gym.objects.create(name='استخر کیان', address='خیابان ولیعصر')
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+
+    def test_name_match_ranks_above_address_match(self):
+        for backend in ('fts5', 'index'):
+            with self.subTest(backend=backend), override_settings(SEARCH_BACKEND=backend):
+                ids = [pk for _, pk, _ in find_matches('استخر', 'gym')]
+                self.assertEqual(ids, [self.by_name.pk, self.by_address.pk])
+
+    def test_arabic_spelling_finds_persian_name(self):
+        for backend in ('fts5', 'index'):
+            with self.subTest(backend=backend), override_settings(SEARCH_BACKEND=backend):
+                ids = [pk for _, pk, _ in find_matches('استخر كيان', 'gym')]
+                self.assertEqual(ids, [self.by_name.pk, self.by_address.pk])
+                self.assertEqual([pk for _, pk, _ in find_matches('وليعصر كيان', 'gym')], [self.by_name.pk])
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'search'
+
+urlpatterns = [
+    path('', views.unified_search, name='unified'),
+    path('autocomplete/', views.autocomplete_view, name='autocomplete'),
+]
@@ -0,0 +1,77 @@
+from django.http import JsonResponse
+from django.urls import reverse
+
+from . import autocomplete
+from .index import count_matches, find_matches
+from .registry import DETAIL_URLS, VERTICALS, get_model
+
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 20
+
+
+def unified_search(request):
+    """جستجوی یکجا در باشگاه‌ها، رستوران‌ها و مربیان روی ایندکس مشترک با تعداد کوئری محدود"""
+    query = request.GET.get('q', '').strip()
+    try:
+        top_n = min(max(int(request.GET.get('limit', DEFAULT_TOP_N)), 1), MAX_TOP_N)
+    except ValueError:
+        top_n = DEFAULT_TOP_N
+
+    counts = {vertical: 0 for vertical in VERTICALS}
+    response = {'query': query, 'counts': counts, 'truncated': False, 'results': []}
+    if not query:
+        return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+    # برای هر بخش یک شمارش و یک top-N جدا، تا پر شدن سقف نتایج در یک بخش
+    # شمارش و نتایج بخش‌های دیگر را صفر نکند
+    top = {vertical: [] for vertical in VERTICALS}
+    matches = []
+    for vertical in VERTICALS:
+        counts[vertical] = count_matches(query, vertical) or 0
+        if not counts[vertical]:
+            continue
+        hits = find_matches(query, vertical, limit=top_n) or []
+        top[vertical] = [(object_id, score) for _, object_id, score in hits]
+        matches.extend(hits)
+    # ادغام نتایج بخش‌ها بر اساس امتیاز
+    matches.sort(key=lambda match: (-match[2], match[1]))
+    response['truncated'] = any(counts[vertical] > len(top[vertical]) for vertical in VERTICALS)
+
+    # حداکثر یک کوئری برای هر بخش جهت اطلاعات نمایشی
+    items = {}
+    for vertical, hits in top.items():
+        if not hits:
+            continue
+        objects = get_model(vertical).objects.select_related('city').only(
+            'name', 'avg_rating', 'rating_count', 'city__name'
+        ).in_bulk([object_id for object_id, _ in hits])
+        for object_id, obj in objects.items():
+            items[(vertical, object_id)] = obj
+
+    for vertical, object_id, score in matches:
+        obj = items.get((vertical, object_id))
+        if obj is None:
+            continue
+        response['results'].append({
+            'vertical': vertical,
+            'id': obj.pk,
+            'name': obj.name,
+            'city': obj.city.get_name_display() if obj.city else None,
+            'avg_rating': round(obj.avg_rating, 1),
+            'rating_count': obj.rating_count,
+            'url': reverse(DETAIL_URLS[vertical], args=[obj.pk]),
+            'score': score,
+        })
+
+    return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+
+def autocomplete_view(request):
+    """پیشنهادهای تکمیل خودکار از ایندکس پیشوندی داخل حافظه (بدون کوئری دیتابیس)"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT)), 1), MAX_TOP_N)
+    except ValueError:
+        limit = autocomplete.DEFAULT_LIMIT
+    suggestions = autocomplete.suggest(query, limit) if query else []
+    return JsonResponse({'query': query, 'suggestions': suggestions}, json_dumps_params={'ensure_ascii': False})
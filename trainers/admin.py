@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from core.covers import CoverImageAdminMixin
 from .models import Trainer, TrainerPhoneNumber, TrainerImage, TrainerComment, TrainerRating
 
 
@@ -12,18 +14,20 @@ class TrainerPhoneNumberInline(admin.TabularInline):
 class TrainerImageInline(admin.TabularInline):
     model = TrainerImage
     extra = 1
+    fields = ['image', 'description', 'order']
     verbose_name = "عکس"
     verbose_name_plural = "عکس‌های مربی"
 
 
 @admin.register(Trainer)
-class TrainerAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'created_at']
+class TrainerAdmin(CoverImageAdminMixin, admin.ModelAdmin):
+    cover_entity_field = 'trainer'
+    list_display = ['name', 'city', 'avg_rating', 'rating_count', 'created_at']
     list_filter = ['city', 'sport_types', 'created_at']
     search_fields = ['name', 'address', 'description']
     inlines = [TrainerPhoneNumberInline, TrainerImageInline]
     filter_horizontal = ['sport_types']
-    fields = ['name', 'city', 'address', 'description', 'resume', 'sport_types']
+    fields = ['name', 'city', 'address', 'description', 'resume', 'sport_types', 'cover_image', 'cover_pinned']
     verbose_name = "مربی"
     verbose_name_plural = "مربیان"
 
@@ -0,0 +1,28 @@
+from core.cardcache import track_card_children, track_card_relations
+from core.conditional import track_detail_children
+from core.covers import track_covers
+from core.pagecache import track_pages
+from core.ratings import track_ratings
+from core.thumbnails import track_derivatives
+from .models import Trainer, TrainerComment, TrainerImage, TrainerPhoneNumber, TrainerRating
+
+
+track_ratings(TrainerRating, 'trainer')
+
+# هر تغییری که روی محتوای لیست مربیان اثر دارد نسخه کش صفحه را بالا می‌برد
+for _model in (Trainer, TrainerRating, TrainerImage, TrainerPhoneNumber):
+    track_pages(_model, 'trainer')
+
+# کارت‌های لیست: تغییر عکس، تلفن و رابطه‌ها کارت مربی را باطل می‌کند
+track_card_children(TrainerImage, 'trainer')
+track_card_children(TrainerPhoneNumber, 'trainer')
+track_card_relations(Trainer, 'trainer')
+
+# عکس کاور با هر افزودن، جابه‌جایی یا حذف عکس دوباره محاسبه می‌شود
+track_covers(TrainerImage, 'trainer')
+
+# نسخه‌های کوچک و WebP هر عکس بعد از آپلود ساخته می‌شوند
+track_derivatives(TrainerImage, 'image', ('thumb', 'card', 'hero'))
+
+# نظرها فقط در صفحه جزئیات دیده می‌شوند؛ اعتبارسنج GET شرطی از updated_at والد ساخته می‌شود
+track_detail_children(TrainerComment, 'trainer')
@@ -16,5 +16,3 @@ def star_rating(value):
         else:
             stars.append('☆')
     return stars
-
-
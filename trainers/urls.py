@@ -6,6 +6,7 @@ app_name = 'trainers'
 urlpatterns = [
     path('', views.trainer_list, name='list'),
     path('<int:pk>/', views.trainer_detail, name='detail'),
+    path('<int:pk>/comment/', views.trainer_comment, name='comment'),
 ]
 
 
@@ -1,42 +1,49 @@
+from django.db.models import prefetch_related_objects
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 from django.contrib import messages
-from django.db.models import Avg, Count, Q
 from .models import Trainer, TrainerComment, TrainerRating
 from .forms import TrainerCommentForm
-from restaurants.models import City, Advertisement
-from gym.models import SportType
+from core.cardcache import render_cards
+from core.conditional import conditional_detail
+from core.lookups import get_lookup
+from core.pagecache import cached_list_page
+from core.pagination import DEFAULT_SORT, LIST_ORDERINGS, paginate_list
+from core.ratings import rating_summary
+from search.facets import bits_from_ids, facet_counts, facet_queryset
+from search.index import search_queryset
+from restaurants import ad_stats
+from restaurants.ads import get_sidebar_ads, refresh_sidebars
 
 
+# ستون‌ها و روابطی که در کارت لیست نمایش داده می‌شوند؛ عکس کاور با join از
+# cover_image (همراه پیش‌نمایش کوچکش) و امتیاز از ستون‌های تجمیعی خوانده می‌شود
+CARD_FIELDS = (
+    'id', 'name', 'address', 'avg_rating', 'rating_sum', 'rating_count', 'created_at', 'updated_at',
+    'cover_image__image', 'cover_image__derivatives_ready',
+    'cover_image__image_width', 'cover_image__placeholder', 'cover_image__dominant_color',
+)
+CARD_PREFETCH = ('phone_numbers',)
+
+
+@cached_list_page('trainer', refresh=refresh_sidebars('trainer'))
 def trainer_list(request):
     """نمایش لیست تمام مربیان با صفحه‌بندی و فیلتر"""
-    trainers_list = Trainer.objects.prefetch_related(
-        'phone_numbers', 
-        'images', 
-        'ratings',
-        'city',
-        'sport_types'
-    ).annotate(
-        avg_rating=Avg('ratings__rating'),
-        total_ratings=Count('ratings')
-    )
+    # فقط ستون‌های کارت؛ روابط کارت‌ها فقط برای کارت‌هایی که در کش نیستند prefetch می‌شوند
+    trainers_list = Trainer.objects.select_related('cover_image').only(*CARD_FIELDS)
     
     # فیلترها
     city_filter = request.GET.get('city')
     rating_filter = request.GET.get('rating')
     sport_types_filter = request.GET.getlist('sport_type')
     search_query = request.GET.get('search', '').strip()
+    sort = request.GET.get('sort', '')
+    match_mode = request.GET.get('match', '')
     
-    # جستجوی پیشرفته
+    # جستجوی پیشرفته با ایندکس معکوس (رتبه‌بندی با اولویت نام)
     if search_query:
-        trainers_list = trainers_list.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    if city_filter:
-        trainers_list = trainers_list.filter(city__name=city_filter)
+        trainers_list = search_queryset(trainers_list, 'trainer', search_query)
     
     if rating_filter:
         try:
@@ -45,32 +52,49 @@ def trainer_list(request):
         except ValueError:
             pass
     
-    if sport_types_filter:
-        trainers_list = trainers_list.filter(sport_types__name__in=sport_types_filter).distinct()
+    # فیلترهای بخش‌ها (facet)؛ شمارش هر گزینه روی نتایج جستجو و امتیاز محاسبه می‌شود
+    selected_facets = {
+        'city': [city_filter] if city_filter else [],
+        'sport_type': sport_types_filter,
+    }
+    base_bits = None
+    if search_query or rating_filter:
+        base_bits = bits_from_ids(trainers_list.order_by().values_list('pk', flat=True))
+    facet_counts_by_option = facet_counts('trainer', selected_facets, match_all=match_mode == 'all', base_bits=base_bits)
+    
+    # فیلترها با ایندکس bitset (OR بین مقادیر هر فیلتر، یا AND با match=all)
+    trainers_list = facet_queryset(trainers_list, 'trainer', selected_facets, match_all=match_mode == 'all')
+    
+    # مرتب‌سازی روی ستون‌های ایندکس‌شده؛ جستجو بدون مرتب‌سازی صریح ترتیب رتبه را نگه می‌دارد
+    ordering = None
+    if not search_query or sort in LIST_ORDERINGS:
+        ordering = LIST_ORDERINGS.get(sort, LIST_ORDERINGS[DEFAULT_SORT])
+        trainers_list = trainers_list.order_by(*ordering)
     
-    # صفحه‌بندی: 9 مربی در هر صفحه
-    paginator = Paginator(trainers_list, 9)
-    page_number = request.GET.get('page', 1)
-    trainers = paginator.get_page(page_number)
+    # صفحه‌بندی: 9 مربی در هر صفحه (cursor روی کلید مرتب‌سازی، بدون COUNT در صفحات عمیق)
+    trainers = paginate_list(request, trainers_list, 9, ordering)
+    cards = render_cards('trainer', trainers, 'trainers/card.html', 'trainer', prefetch=CARD_PREFETCH)
     
-    # دریافت تبلیغات فعال برای مربیان
-    left_ads = Advertisement.objects.filter(section='trainer', position='right', is_active=True).order_by('order')[:3]
-    right_ads = Advertisement.objects.filter(section='trainer', position='left', is_active=True).order_by('order')[:3]
+    # تبلیغات سایدبار از کش جایگاه‌ها (نگاشت RTL داخل سرویس)
+    left_ads, right_ads = get_sidebar_ads('trainer')
+    ad_stats.record_impressions(left_ads + right_ads)
     
-    # دریافت لیست‌ها برای فیلتر
-    cities = City.objects.all()
-    # ترتیب نوع ورزش: سایر موارد در آخر
-    sport_types_list = list(SportType.objects.all())
-    sport_types = sorted(sport_types_list, key=lambda x: (x.name == 'other', x.name))
+    # دریافت لیست‌ها برای فیلتر از کش جدول‌های مرجع (سایر موارد در آخر)
+    cities = get_lookup('cities')
+    sport_types = get_lookup('sport_types')
     
     context = {
         'trainers': trainers,
+        'cards': cards,
         'left_ads': left_ads,
         'right_ads': right_ads,
         'cities': cities,
         'sport_types': sport_types,
         'current_city': city_filter,
         'current_rating': rating_filter,
+        'current_sort': sort,
+        'current_match': match_mode,
+        'facet_counts': facet_counts_by_option,
         'current_sport_types': sport_types_filter,
         'search_query': search_query,
     }
@@ -78,21 +102,41 @@ def trainer_list(request):
     return render(request, 'trainers/list.html', context)
 
 
+def _trainer_detail_context(trainer):
+    """داده‌های عمومی صفحه جزئیات (بدون فرم و پیام‌های کاربر)"""
+    # خلاصه امتیاز از ستون‌های تجمیعی و یک کوئری برای توزیع ستاره‌ها
+    summary = rating_summary(trainer)
+    
+    # نمایش کامنت‌های تایید شده
+    comments = trainer.comments.filter(is_approved=True)
+    
+    return {
+        'trainer': trainer,
+        'comments': comments,
+        'avg_rating': summary['average'],
+        'total_ratings': summary['count'],
+        'rating_histogram': summary['histogram'],
+    }
+
+
+@conditional_detail(Trainer, 'trainers/detail.html')
 def trainer_detail(request, pk):
-    """نمایش جزئیات یک مربی"""
+    """نمایش جزئیات یک مربی؛ بدنه عمومی و قابل کش بدون توکن CSRF و پیام‌ها"""
+    # فرم‌های قدیمی که به آدرس جزئیات ارسال می‌شوند
+    if request.method == 'POST':
+        return trainer_comment(request, pk)
+    
     trainer = get_object_or_404(
-        Trainer.objects.prefetch_related('phone_numbers', 'images', 'comments', 'ratings'),
+        Trainer.objects.select_related('cover_image').prefetch_related('phone_numbers', 'images'),
         pk=pk
     )
-    
-    # محاسبه میانگین ریتینگ
-    ratings = trainer.ratings.all()
-    avg_rating = 0
-    if ratings.exists():
-        avg_rating = sum(r.rating for r in ratings) / ratings.count()
-    
-    # نمایش کامنت‌های تایید شده
-    comments = trainer.comments.filter(is_approved=True)
+    return render(request, 'trainers/detail.html', _trainer_detail_context(trainer))
+
+
+@never_cache
+def trainer_comment(request, pk):
+    """فرم ثبت نظر و پیام‌های کاربر؛ بخش شخصی صفحه جزئیات که جداگانه بارگذاری می‌شود"""
+    trainer = get_object_or_404(Trainer, pk=pk)
     
     # فرم کامنت
     if request.method == 'POST':
@@ -111,16 +155,15 @@ def trainer_detail(request, pk):
             comment.save()
             
             messages.success(request, 'نظر و امتیاز شما با موفقیت ثبت شد!')
-            return redirect('trainers:detail', pk=trainer.pk)
+            return redirect(reverse('trainers:detail', args=[trainer.pk]) + '#comment-form')
     else:
         form = TrainerCommentForm()
     
-    context = {
-        'trainer': trainer,
-        'comments': comments,
-        'avg_rating': round(avg_rating, 1) if avg_rating > 0 else 0,
-        'total_ratings': ratings.count(),
-        'form': form,
-    }
+    if request.GET.get('partial'):
+        return render(request, 'trainers/comment_form.html', {'trainer': trainer, 'form': form})
     
+    # بدون جاوااسکریپت یا با خطای فرم: کل صفحه همراه با فرم
+    prefetch_related_objects([trainer], 'phone_numbers', 'images')
+    context = _trainer_detail_context(trainer)
+    context['form'] = form
     return render(request, 'trainers/detail.html', context)